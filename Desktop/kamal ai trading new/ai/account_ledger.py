@@ -0,0 +1,228 @@
+"""Running account state for the risk gates, updated from fills and mark prices.
+
+Each TradeFill (symbol/side from ``fill.meta`` or from the OrderIntent registered with
+``expect``) and each mark price updates one symbol's position and the account totals by
+difference, so every event is O(1) regardless of how many symbols are held. After every event a
+new immutable AccountSnapshot is built from the totals and swapped in with one reference
+assignment: a gate reads ``ledger.snapshot`` once and gets capital, exposure, P&L and daily loss
+from the same event, with no lock and no copy. ``per_symbol_exposure`` in the snapshot is a
+read-only live view, not a copy, so it can be ahead of the totals when read from another thread.
+
+Orders accepted but not filled yet hold a reservation: ``expect`` reserves their notional, which
+counts in the snapshot's ``exposure`` and in its symbol's ``per_symbol_exposure`` (so a pending
+order also takes a position slot) until fills release it pro rata or ``cancel`` drops it. A gate
+therefore sees every order already sent, not only the filled ones.
+
+Daily loss is the loss since the start of the trading day: realized P&L booked today plus the
+change in unrealized P&L since the day rolled (on the first event with a later date, or
+``roll_day``). The ledger starts flat; the initial snapshot supplies capital and limits.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
+from core.bus import global_bus
+from core.events import MarketBar, MarkPrice, OrderIntent, TradeFill, iter_bars
+from ai.risk_gates import AccountSnapshot
+from signal_bus import TOPIC_FILLS, TOPIC_MARKS
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class Position:
+    qty: float = 0.0       # signed: > 0 long, < 0 short
+    avg_price: float = 0.0
+    mark: float = 0.0
+
+    @property
+    def unrealized(self) -> float:
+        return self.qty * (self.mark - self.avg_price)
+
+    @property
+    def exposure(self) -> float:
+        return abs(self.qty) * self.mark
+
+class AccountLedger:
+    def __init__(self, initial: AccountSnapshot, max_tracked_orders: int = 65536):
+        self.initial = initial
+        self.positions: Dict[str, Position] = {}
+        self._per_symbol: Dict[str, float] = {}
+        # id -> (symbol, sign, qty left, notional still reserved)
+        self._orders: "OrderedDict[str, Tuple[str, float, float, float]]" = OrderedDict()
+        self._pending: Dict[str, float] = {}  # symbol -> reserved notional
+        self.pending = 0.0
+        self.max_tracked_orders = max_tracked_orders
+        self.exposure = 0.0
+        self.realized = 0.0
+        self.unrealized = 0.0
+        self._day: Optional[date] = None
+        self._realized_at_open = 0.0
+        self._unrealized_at_open = 0.0
+        self._daily_loss_at_open = initial.daily_loss
+        self.fills = self.marks = self.unmatched = 0
+        self.snapshot = initial
+        self._publish()
+
+    def expect(self, order: OrderIntent, notional: Optional[float] = None) -> None:
+        """Register an order so its fills can be attributed (TradeFill has no symbol or side) and
+        reserve its ``notional`` (default: qty at its limit price, else at the symbol's mark) until
+        it fills or is cancelled."""
+        if notional is None:
+            p = self.positions.get(order.symbol)
+            price = order.price or (p.mark if p is not None else 0.0)
+            notional = abs(order.qty) * price
+        notional = abs(notional)
+        self._orders[order.id] = (order.symbol, 1.0 if order.side.upper() == "BUY" else -1.0, order.qty, notional)
+        self._reserve(order.symbol, notional)
+        if len(self._orders) > self.max_tracked_orders:
+            symbol, _, _, reserved = self._orders.popitem(last=False)[1]
+            self._reserve(symbol, -reserved)
+        self._publish()
+
+    def cancel(self, order_id: str) -> bool:
+        """Forget an order that will not (or no longer) fill and release its reservation. Returns
+        whether the order was known."""
+        known = self._orders.pop(order_id, None)
+        if known is None:
+            return False
+        self._reserve(known[0], -known[3])
+        self._publish()
+        return True
+
+    def _reserve(self, symbol: str, notional: float) -> None:
+        left = self._pending.get(symbol, 0.0) + notional
+        if left <= 1e-9:
+            self._pending.pop(symbol, None)
+        else:
+            self._pending[symbol] = left
+        self.pending = self.pending + notional if self._pending else 0.0
+        p = self.positions.get(symbol)
+        self._per_symbol[symbol] = (p.exposure if p is not None else 0.0) + self._pending.get(symbol, 0.0)
+
+    def _resolve(self, fill: TradeFill) -> Optional[Tuple[str, float]]:
+        known = self._orders.get(fill.order_id)
+        if known is not None:
+            symbol, sign, left, reserved = known
+            released = reserved if fill.executed_qty >= left - 1e-12 else reserved * fill.executed_qty / left
+            left -= fill.executed_qty
+            if left <= 1e-12:
+                del self._orders[fill.order_id]
+            else:
+                self._orders[fill.order_id] = (symbol, sign, left, reserved - released)
+            self._reserve(symbol, -released)
+        meta = fill.meta or {}
+        if "symbol" in meta and "side" in meta:
+            return meta["symbol"], 1.0 if str(meta["side"]).upper() == "BUY" else -1.0
+        return None if known is None else known[:2]
+
+    def on_fill(self, fill: TradeFill) -> None:
+        resolved = self._resolve(fill)
+        if resolved is None:
+            self.unmatched += 1
+            log.warning("fill for unknown order %s ignored", fill.order_id)
+            return
+        symbol, sign = resolved
+        self._roll_if_new_day(fill.ts)
+        self.fills += 1
+        p = self.positions.get(symbol)
+        if p is None:
+            p = self.positions[symbol] = Position()
+        before_u, before_e = p.unrealized, p.exposure
+        dq, price = sign * fill.executed_qty, fill.avg_price
+        if p.qty == 0 or (p.qty > 0) == (dq > 0):
+            p.avg_price = (p.avg_price * abs(p.qty) + price * abs(dq)) / (abs(p.qty) + abs(dq))
+            p.qty += dq
+        else:
+            closed = min(abs(dq), abs(p.qty))
+            self.realized += closed * (price - p.avg_price) * (1.0 if p.qty > 0 else -1.0)
+            flipped = abs(dq) > abs(p.qty)
+            p.qty += dq
+            if flipped:
+                p.avg_price = price
+            elif abs(p.qty) <= 1e-12:
+                p.qty = p.avg_price = 0.0
+        p.mark = price
+        self._apply(symbol, p, before_u, before_e)
+
+    def mark(self, symbol: str, price: float, ts: Optional[datetime] = None) -> None:
+        p = self.positions.get(symbol)
+        if ts is not None:
+            self._roll_if_new_day(ts)
+        if p is None or price <= 0:
+            return
+        self.marks += 1
+        before_u, before_e = p.unrealized, p.exposure
+        p.mark = price
+        self._apply(symbol, p, before_u, before_e)
+
+    def on_event(self, item: Any) -> None:
+        if isinstance(item, TradeFill):
+            self.on_fill(item)
+        elif isinstance(item, MarkPrice):
+            self.mark(item.symbol, item.price, item.ts)
+        else:
+            for bar in iter_bars([item]):
+                self.mark(bar.symbol, bar.c, bar.ts)
+
+    def on_bar(self, bar: MarketBar) -> None:
+        self.mark(bar.symbol, bar.c, bar.ts)
+
+    def _apply(self, symbol: str, p: Position, before_u: float, before_e: float) -> None:
+        self.unrealized += p.unrealized - before_u
+        self.exposure += p.exposure - before_e
+        self._per_symbol[symbol] = p.exposure + self._pending.get(symbol, 0.0)
+        self._publish()
+
+    def _roll_if_new_day(self, ts: datetime) -> None:
+        day = ts.date()
+        if self._day is None:
+            self._day = day
+        elif day > self._day:
+            self.roll_day(day)
+
+    def roll_day(self, day: Optional[date] = None) -> None:
+        """Start a new trading day: daily loss is measured from the current P&L."""
+        self._day = day
+        self._realized_at_open = self.realized
+        self._unrealized_at_open = self.unrealized
+        self._daily_loss_at_open = 0.0
+        self._publish()
+
+    @property
+    def daily_loss(self) -> float:
+        pnl = (self.realized - self._realized_at_open) + (self.unrealized - self._unrealized_at_open)
+        return max(self._daily_loss_at_open - pnl, 0.0)
+
+    def _publish(self) -> None:
+        a = self.initial
+        self.snapshot = AccountSnapshot(capital=a.capital + self.realized, exposure=self.exposure + self.pending,
+                                        per_symbol_exposure=MappingProxyType(self._per_symbol),
+                                        max_risk_per_trade=a.max_risk_per_trade, max_total_exposure=a.max_total_exposure,
+                                        daily_loss=self.daily_loss, max_daily_loss=a.max_daily_loss,
+                                        realized_pnl=self.realized, unrealized_pnl=self.unrealized)
+
+    async def run(self, max_batch: int = 256) -> None:
+        """Consume the fills and marks topics until cancelled."""
+        fills, marks = global_bus.subscribe(TOPIC_FILLS), global_bus.subscribe(TOPIC_MARKS)
+        await asyncio.gather(self._consume(fills, max_batch), self._consume(marks, max_batch))
+
+    async def _consume(self, q, max_batch: int) -> None:
+        while True:
+            batch = await q.get_batch(max_batch)
+            try:
+                for item in batch:
+                    try:
+                        self.on_event(item)
+                    except Exception:
+                        log.exception("ledger failed on %r", item)
+            finally:
+                q.batch_done(len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"fills": self.fills, "marks": self.marks, "unmatched_fills": self.unmatched,
+                "open_positions": sum(1 for p in self.positions.values() if p.qty), "tracked_orders": len(self._orders),
+                "pending_exposure": self.pending}
@@ -1,35 +1,192 @@
 from __future__ import annotations
 import asyncio
-from core.bus import global_bus
-from core.events import MarketBar, Signal, OrderIntent
+import logging
+import time
+from typing import Dict, List
+from core.bus import global_bus, ConflatingQueue, symbol_key
+from core.events import MarketBar, Signal, OrderIntent, iter_bars, merge_bars
 from signal_bus import publish_order_intent, get_signals_queue, TOPIC_TICKS
 from ai.decision_maker import DecisionMaker
 from ai.model_manager import ModelManager
 from ai.llm_interface import RuleBasedExplainer
 from ai.risk_gates import AccountSnapshot
+from ai.partitioning import HashRing, PartitionStats
+from ai.inference_batcher import InferenceBatcher
+from ai.model_registry import ModelRegistry
+from ai.account_ledger import AccountLedger
+from ai.feature_hub import FeatureHub
+from risk_management.rule_engine import RuleEngine
+from core.latency import global_latency, now_ns, LatencyBudget, STAGE_BUS, STAGE_PUBLISH, STAGE_TICK_TO_ORDER
+
+log = logging.getLogger(__name__)
 
 class AutoTradeAgent:
-    def __init__(self, model_manager: ModelManager, account: AccountSnapshot):
+    """Routes ticks to ``workers`` partitions by consistent hash of the symbol: each symbol is
+    handled in order by one worker, different symbols run concurrently. Workers are tasks on one
+    event loop sharing the DecisionMaker and account, so shared state only changes between awaits.
+
+    A tick message counts as done on the ticks topic (``join()``) once its bars are dispatched to
+    the partitions, not once they are handled; ``await agent.drain()`` after that join waits
+    until every dispatched bar has been handled (or coalesced into one that has).
+
+    With ``snapshot_path`` set, feature state is restored from it on start (if younger than
+    ``snapshot_max_age_s``) and re-saved every ``snapshot_interval_s`` seconds and on shutdown.
+
+    ``inference_window_ms`` (None = one predict_proba per tick) batches the workers' model calls
+    through an InferenceBatcher; it only pays off with ``workers > 1``. ``inference_executor``
+    (ai.inference_executor.ThreadInference / ProcessInference) moves model calls off the event loop.
+
+    With ``registry`` and ``model_name``, the model is hot-swapped to the registry's current
+    version of ``model_name`` (polled every ``registry_poll_s``) while ticks keep flowing.
+    ``online_trainer`` (ai.online_learning.OnlineTrainer) learns from every scored bar.
+
+    Every tick must turn into an order within ``latency_budget`` (default: the
+    ``block_if_latency_ms_above`` safeguard in config/ai_policies.yaml) of its ingest time;
+    orders that would leave later are dropped and counted in ``decision_maker.deadline_counts``.
+
+    ``coalesce="latest"`` keeps only the newest queued bar per symbol in each partition, so a
+    worker that falls behind decides on current prices instead of replaying the backlog;
+    ``coalesce="ohlcv"`` folds the skipped bars into it (core.events.merge_bars). Collapsed ticks
+    are counted per partition in ``partition_stats()["coalesced"]``. Every bar still reaches the
+    feature store (and the online trainer), in one batch per drained backlog, so the rolling
+    windows are computed over adjacent prices even when decisions are skipped.
+
+    With ``ledger`` (ai.account_ledger.AccountLedger), decisions are gated on its live snapshot
+    instead of the static ``account``: ticks mark its positions, accepted orders are reserved in
+    it (so a burst of ticks cannot exceed the limits before any fill arrives) and registered so
+    their fills can be attributed, and it consumes the fills and marks topics.
+
+    ``rules`` (risk_management.rule_engine.RuleEngine, e.g. ``RuleEngine.load()``) replaces the
+    account-only gates with every configured pre-trade limit.
+
+    ``feature_hub`` (ai.feature_hub.FeatureHub) is advanced once per bar with the feature store,
+    so strategies registered on it read their indicators without recomputing them."""
+
+    COALESCE_MODES = (None, "latest", "ohlcv")
+
+    def __init__(self, model_manager: ModelManager, account: AccountSnapshot, workers: int = 1,
+                 snapshot_path: str | None = None, snapshot_interval_s: float = 30.0, snapshot_max_age_s: float | None = 8 * 3600,
+                 inference_window_ms: float | None = None, inference_max_batch: int = 256, inference_executor=None,
+                 registry: ModelRegistry | None = None, model_name: str | None = None, registry_poll_s: float = 5.0,
+                 online_trainer=None, latency_budget: LatencyBudget | None = None, coalesce: str | None = None,
+                 ledger: AccountLedger | None = None, rules: RuleEngine | None = None, feature_hub: FeatureHub | None = None):
+        if coalesce not in self.COALESCE_MODES:
+            raise ValueError(f"unknown coalesce mode: {coalesce!r}")
+        self.coalesce = coalesce
         self.model_manager = model_manager
-        self.decision_maker = DecisionMaker(model_manager, RuleBasedExplainer())
+        self.batcher = (InferenceBatcher(model_manager, inference_max_batch, inference_window_ms, executor=inference_executor)
+                        if inference_window_ms is not None else None)
+        self.decision_maker = DecisionMaker(model_manager, RuleBasedExplainer(), snapshot_path=snapshot_path,
+                                            snapshot_max_age_s=snapshot_max_age_s, batcher=self.batcher, executor=inference_executor,
+                                            trainer=online_trainer, budget=latency_budget, rules=rules,
+                                            hub=feature_hub, ledger=ledger)
+        self.online_trainer = online_trainer
+        self.snapshot_interval_s = snapshot_interval_s
+        self.registry = registry
+        self.model_name = model_name
+        self.registry_poll_s = registry_poll_s
         self.account = account
+        self.ledger = ledger
+        self.ring = HashRing(workers)
+        self._partitions: List[asyncio.Queue] = []
+        self._stats = [PartitionStats(i) for i in range(workers)]
         self._running = False
 
     async def handle_tick(self, bar: MarketBar):
-        res = await self.decision_maker.decide_from_price(bar.symbol, bar.c, self.account)
+        if bar.ingest_ns:
+            global_latency.since(STAGE_BUS, bar.ingest_ns)
+        account = self.ledger.snapshot if self.ledger is not None else self.account
+        res = await self.decision_maker.decide_from_price(bar.symbol, bar.c, account, ingest_ns=bar.ingest_ns,
+                                                          ingested=self.coalesce is not None, high=bar.h, low=bar.l, volume=bar.v)
         if res.get("decision") == "ok":
             order: OrderIntent = res["order"]
+            t = now_ns()
+            deadline = self.decision_maker.budget.deadline(bar.ingest_ns)
+            if deadline and t >= deadline:
+                self.decision_maker.deadline_counts["stale_after_decision"] += 1
+                if self.ledger is not None:
+                    self.ledger.cancel(order.id)
+                return
             await publish_order_intent(order)
+            t = global_latency.since(STAGE_PUBLISH, t)
+            if bar.ingest_ns:
+                global_latency.record(STAGE_TICK_TO_ORDER, t - bar.ingest_ns)
+            self.decision_maker.explain(res)  # only for orders actually sent
 
-    async def run(self):
-        q = global_bus.topic(TOPIC_TICKS)
-        self._running = True
-        while self._running:
+    async def _worker(self, idx: int) -> None:
+        q, stats = self._partitions[idx], self._stats[idx]
+        while True:
             bar = await q.get()
+            t0 = time.perf_counter()
             try:
                 await self.handle_tick(bar)
+            except Exception:
+                stats.errors += 1
+                log.exception("partition %d failed on %s", idx, bar.symbol)
             finally:
+                stats.busy_s += time.perf_counter() - t0
+                stats.processed += 1
                 q.task_done()
 
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_interval_s)
+            try:
+                self.decision_maker.save_snapshot()
+            except OSError:
+                log.exception("feature snapshot to %s failed", self.decision_maker.snapshot_path)
+
+    async def run(self):
+        q = global_bus.subscribe(TOPIC_TICKS)
+        self._partitions = [self._partition_queue() for _ in range(self.ring.partitions)]
+        workers = [asyncio.create_task(self._worker(i)) for i in range(self.ring.partitions)]
+        if self.decision_maker.snapshot_path:
+            workers.append(asyncio.create_task(self._snapshot_loop()))
+        if self.registry is not None and self.model_name:
+            workers.append(asyncio.create_task(self.registry.follow(self.model_name, self.model_manager, self.registry_poll_s)))
+        if self.online_trainer is not None:
+            workers.append(asyncio.create_task(self.online_trainer.run()))
+        if self.ledger is not None:
+            workers.append(asyncio.create_task(self.ledger.run()))
+        self._running = True
+        try:
+            while self._running:
+                # when coalescing, take the whole backlog: it only lands in per-symbol slots
+                batch = await q.get_batch(max(256, q.qsize()) if self.coalesce else 256)
+                try:
+                    bars = list(iter_bars(batch))
+                    if self.coalesce:  # features see every bar; only the decision is coalesced
+                        self.decision_maker.ingest([b.symbol for b in bars], [b.c for b in bars], [b.h for b in bars],
+                                                   [b.l for b in bars], [b.v for b in bars])
+                    for bar in bars:
+                        if self.ledger is not None:
+                            self.ledger.on_bar(bar)
+                        self._partitions[self.ring.partition(bar.symbol)].put_nowait(bar)
+                finally:
+                    q.batch_done(len(batch))
+        finally:
+            for w in workers:
+                w.cancel()
+            if self.decision_maker.snapshot_path:
+                try:
+                    self.decision_maker.save_snapshot()
+                except Exception:  # don't mask the reason the loop exited
+                    log.exception("final feature snapshot to %s failed", self.decision_maker.snapshot_path)
+
+    async def drain(self) -> None:
+        """Wait until every bar dispatched so far has been handled."""
+        await asyncio.gather(*(q.join() for q in self._partitions))
+
+    def _partition_queue(self) -> asyncio.Queue:
+        if self.coalesce is None:
+            return asyncio.Queue()
+        return ConflatingQueue(symbol_key, merge=merge_bars if self.coalesce == "ohlcv" else None)
+
+    def partition_stats(self) -> List[Dict[str, float]]:
+        for stats, q in zip(self._stats, self._partitions):
+            stats.depth = q.qsize()
+            stats.coalesced = getattr(q, "merged", 0)
+        return [s.as_dict() for s in self._stats]
+
     def stop(self):
         self._running = False
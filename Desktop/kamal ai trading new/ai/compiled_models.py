@@ -0,0 +1,259 @@
+"""Fitted sklearn models flattened into numpy arrays and evaluated without sklearn.
+
+``compile_model`` supports linear regressors, LogisticRegression (binary and multinomial), binary
+log-loss SGDClassifier, decision trees, random forests / extra trees and gradient boosting.
+Trees from the whole ensemble are packed into one node table whose leaves point at themselves;
+each vectorized step moves every (row, tree) pair still at an internal node down one level. As
+in sklearn, inputs are compared against split thresholds as float32.
+
+Every evaluator exposes ``predict`` and ModelManager-style ``predict_proba`` (regressors return
+``[1 - p, p]``), and round-trips through ``arrays``/``from_arrays`` for storage.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List
+import numpy as np
+
+# identity: regression value; logistic/softmax: raw scores; probability: averaged class fractions
+LINKS = ("identity", "logistic", "softmax", "probability")
+
+def _rows(X) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float64)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+def _link(raw: np.ndarray, link: str) -> np.ndarray:
+    """Raw (n, k) scores to (n, k) class probabilities, or the values themselves for identity."""
+    if link == "logistic":
+        p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+        return np.column_stack([1.0 - p, p])
+    if link == "softmax":
+        e = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return e / e.sum(axis=1, keepdims=True)
+    return raw
+
+class _Compiled:
+    kind = ""
+
+    def __init__(self, link: str, classes: np.ndarray):
+        if link not in LINKS:
+            raise ValueError(f"unknown link {link!r}")
+        self.link = link
+        self.classes = np.asarray(classes)
+
+    @property
+    def is_classifier(self) -> bool:
+        return self.link != "identity"
+
+    def decision_function(self, X) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_proba(self, X) -> np.ndarray:
+        raw = self.decision_function(X)
+        if self.is_classifier:
+            return _link(raw, self.link)
+        p = raw[:, 0]
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        raw = self.decision_function(X)
+        if not self.is_classifier:
+            return raw[:, 0]
+        if self.link == "logistic":
+            return self.classes[(raw[:, 0] > 0).astype(np.int64)]
+        return self.classes[raw.argmax(axis=1)]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "_Compiled":
+        raise NotImplementedError
+
+class LinearEvaluator(_Compiled):
+    kind = "linear"
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, link: str = "identity", classes=()):
+        super().__init__(link, classes)
+        self.coef = np.asarray(coef, dtype=np.float64)          # (n_features, k)
+        self.intercept = np.asarray(intercept, dtype=np.float64)  # (k,)
+
+    def decision_function(self, X) -> np.ndarray:
+        return _rows(X) @ self.coef + self.intercept
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"coef": self.coef, "intercept": self.intercept, "link": np.array(self.link), "classes": self.classes}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "LinearEvaluator":
+        return cls(arrays["coef"], arrays["intercept"], str(arrays["link"]), arrays["classes"])
+
+class TreeEnsembleEvaluator(_Compiled):
+    """raw = base + scale * (sum of the leaf values reached in every tree)."""
+    kind = "trees"
+    scalar_pairs = 128  # (rows x trees) at or below which trees are walked in pure Python
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, depth: int,
+                 scale: float = 1.0, base=0.0, link: str = "identity", classes=(), children=None, is_leaf=None):
+        super().__init__(link, classes)
+        # arrays are kept as given (no copies), so memory-mapped ones stay shared between processes;
+        # ``children``/``is_leaf`` are stored with them and only derived for freshly compiled models
+        self.feature = np.asarray(feature, dtype=np.int64)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        if children is None:
+            children = np.stack([np.asarray(right, dtype=np.int64), np.asarray(left, dtype=np.int64)])
+        self.children = np.asarray(children, dtype=np.int64)  # indexed by go_left
+        self.right, self.left = self.children
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)  # (n_nodes, k)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.depth = int(depth)
+        self.scale = float(scale)
+        self.base = np.broadcast_to(np.asarray(base, dtype=np.float64), (self.value.shape[1],)).copy()
+        self.is_leaf = (self.left == np.arange(len(self.left))) if is_leaf is None else np.asarray(is_leaf, dtype=bool)
+        self._views = None
+
+    def leaves(self, X) -> np.ndarray:
+        """Leaf index reached by each row in each tree, shape (n_rows, n_trees)."""
+        X = _rows(X).astype(np.float32).astype(np.float64)
+        n, f = X.shape
+        if n * len(self.roots) <= self.scalar_pairs:
+            return self._walk(X)
+        flat = X.ravel()
+        base = np.repeat(np.arange(0, n * f, f), len(self.roots))
+        node = np.tile(self.roots, n)
+        nan = np.isnan(flat).any()
+        for _ in range(self.depth):
+            x = flat[base + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if nan:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = self.children[go_left.view(np.int8), node]
+            if self.is_leaf[node].all():
+                break
+        return node.reshape(n, -1)
+
+    def _walk(self, X: np.ndarray) -> np.ndarray:
+        """Per-pair Python walk: cheaper than numpy dispatch for a handful of (row, tree) pairs."""
+        if self._views is None:  # memoryviews index like lists without copying the node table
+            self._views = tuple(memoryview(np.ascontiguousarray(a)) for a in (
+                self.feature, self.threshold, self.left, self.right, self.missing_left, self.is_leaf))
+        feature, threshold, left, right, missing, leaf = self._views
+        out = []
+        for x in X.tolist():
+            for node in self.roots.tolist():
+                while not leaf[node]:
+                    v = x[feature[node]]
+                    if v <= threshold[node] or (v != v and missing[node]):
+                        node = left[node]
+                    else:
+                        node = right[node]
+                out.append(node)
+        return np.array(out, dtype=np.int64).reshape(len(X), -1)
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.base + self.scale * self.value[self.leaves(X)].sum(axis=1)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"feature": self.feature, "threshold": self.threshold, "children": self.children, "is_leaf": self.is_leaf,
+                "missing_left": self.missing_left, "value": self.value, "roots": self.roots,
+                "depth": np.array(self.depth), "scale": np.array(self.scale), "base": self.base,
+                "link": np.array(self.link), "classes": self.classes}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "TreeEnsembleEvaluator":
+        a = arrays
+        if "children" in a:
+            right, left = a["children"]
+        else:  # stored before children/is_leaf were
+            left, right = a["left"], a["right"]
+        return cls(a["feature"], a["threshold"], left, right, a["missing_left"], a["value"], a["roots"],
+                   int(a["depth"]), float(a["scale"]), a["base"], str(a["link"]), a["classes"],
+                   a.get("children"), a.get("is_leaf"))
+
+EVALUATORS = {LinearEvaluator.kind: LinearEvaluator, TreeEnsembleEvaluator.kind: TreeEnsembleEvaluator}
+
+def _pack(trees: List[Any], columns: List[int], normalize: bool) -> Dict[str, Any]:
+    """Concatenate sklearn ``tree_`` objects; tree i contributes leaf values to output ``columns[i]``."""
+    k = max(columns) + 1 if columns else 1
+    feature, threshold, left, right, missing, value, roots = [], [], [], [], [], [], []
+    offset, depth = 0, 0
+    for t, col in zip(trees, columns):
+        n = t.node_count
+        leaf = t.children_left == -1
+        idx = np.arange(n)
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(np.where(leaf, np.inf, t.threshold))
+        left.append(np.where(leaf, idx, t.children_left) + offset)
+        right.append(np.where(leaf, idx, t.children_right) + offset)
+        mgl = getattr(t, "missing_go_to_left", None)
+        missing.append(np.zeros(n, dtype=bool) if mgl is None else np.asarray(mgl, dtype=bool) & ~leaf)
+        v = t.value[:, 0, :]
+        if normalize:
+            total = v.sum(axis=1, keepdims=True)
+            v = np.divide(v, total, out=np.zeros_like(v), where=total > 0)
+        block = np.zeros((n, k if v.shape[1] == 1 else v.shape[1]))
+        if v.shape[1] == 1:
+            block[:, col] = v[:, 0]
+        else:
+            block[:] = v
+        value.append(block)
+        roots.append(offset)
+        offset += n
+        depth = max(depth, t.max_depth)
+    return {"feature": np.concatenate(feature), "threshold": np.concatenate(threshold), "left": np.concatenate(left),
+            "right": np.concatenate(right), "missing_left": np.concatenate(missing), "value": np.concatenate(value),
+            "roots": np.array(roots), "depth": depth}
+
+def compile_model(model: Any) -> _Compiled:
+    """Flatten a fitted sklearn estimator. Raises TypeError for unsupported estimators."""
+    name = type(model).__name__
+    classes = getattr(model, "classes_", np.array([]))
+    if name == "LogisticRegression":
+        coef, intercept = np.atleast_2d(model.coef_), np.atleast_1d(model.intercept_)
+        return LinearEvaluator(coef.T, intercept, "logistic" if len(classes) == 2 else "softmax", classes)
+    if name == "SGDClassifier":
+        # multiclass SGD normalizes one-vs-rest probabilities, which is not a softmax
+        if model.loss != "log_loss" or len(classes) != 2:
+            raise TypeError("only binary SGDClassifier(loss='log_loss') is supported")
+        return LinearEvaluator(np.atleast_2d(model.coef_).T, np.atleast_1d(model.intercept_), "logistic", classes)
+    if name in ("LinearRegression", "Ridge", "Lasso", "ElasticNet", "SGDRegressor", "LassoLars", "BayesianRidge", "HuberRegressor"):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.ndim != 1:
+            raise TypeError(f"{name} with multiple targets is not supported")
+        return LinearEvaluator(coef[:, None], np.atleast_1d(model.intercept_).astype(np.float64))
+    if name in ("DecisionTreeClassifier", "DecisionTreeRegressor"):
+        model_trees = [model]
+        is_clf = name.endswith("Classifier")
+    elif name in ("RandomForestClassifier", "ExtraTreesClassifier", "RandomForestRegressor", "ExtraTreesRegressor"):
+        model_trees = list(model.estimators_)
+        is_clf = name.endswith("Classifier")
+    elif name in ("GradientBoostingClassifier", "GradientBoostingRegressor"):
+        return _compile_gradient_boosting(model)
+    else:
+        raise TypeError(f"cannot compile {name}")
+    if getattr(model_trees[0], "n_outputs_", 1) != 1:
+        raise TypeError(f"{name} with multiple outputs is not supported")
+    packed = _pack([t.tree_ for t in model_trees], [0] * len(model_trees), normalize=is_clf)
+    link = "probability" if is_clf else "identity"
+    return TreeEnsembleEvaluator(**packed, scale=1.0 / len(model_trees), link=link, classes=classes)
+
+def _compile_gradient_boosting(model: Any) -> TreeEnsembleEvaluator:
+    name = type(model).__name__
+    if model.init_ == "zero":
+        base = 0.0
+    elif type(model.init_).__name__ in ("DummyClassifier", "DummyRegressor"):
+        base = np.asarray(model._raw_predict_init(np.zeros((1, model.n_features_in_))))[0]
+    else:
+        raise TypeError(f"{name} with a custom init estimator is not supported")
+    stages = model.estimators_  # (n_stages, K)
+    trees, columns = [], []
+    for stage in stages:
+        for col, est in enumerate(stage):
+            trees.append(est.tree_)
+            columns.append(col)
+    packed = _pack(trees, columns, normalize=False)
+    if name == "GradientBoostingRegressor":
+        link, classes = "identity", np.array([])
+    else:
+        classes = model.classes_
+        link = "logistic" if len(classes) == 2 else "softmax"
+    return TreeEnsembleEvaluator(**packed, scale=model.learning_rate, base=base, link=link, classes=classes)
@@ -1,30 +1,234 @@
 from __future__ import annotations
-from typing import Any, Dict
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
 from core.events import OrderIntent, new_id
-from ai.feature_store import RollingFeatureComputer
+from core.latency import global_latency, now_ns, LatencyBudget, STAGE_FEATURES, STAGE_PREDICT, STAGE_RISK, STAGE_EXPLAIN
+from ai.vector_features import VectorFeatureStore
+from ai.feature_hub import FeatureHub
 from ai.model_manager import ModelManager
+from ai.inference_batcher import InferenceBatcher
 from ai.llm_interface import LLMInterface, RuleBasedExplainer
-from ai.risk_gates import gate_pretrade, AccountSnapshot, RiskError
+from ai.explanations import ExplanationService
+from signal_bus import publish_explanation
+from ai.risk_gates import gate_pretrade, gate_pretrade_batch, AccountSnapshot, RiskError
+from risk_management.rule_engine import RuleEngine
+from ai.account_ledger import AccountLedger
 
 class DecisionMaker:
-    def __init__(self, model_manager: ModelManager, llm: LLMInterface | None = None):
+    def __init__(self, model_manager: ModelManager, llm: LLMInterface | None = None, snapshot_path: str | None = None, snapshot_max_age_s: float | None = None, batcher: InferenceBatcher | None = None, executor=None, trainer=None, explainer: ExplanationService | None = None, budget: LatencyBudget | None = None, rules: RuleEngine | None = None, hub: FeatureHub | None = None,
+                 ledger: AccountLedger | None = None):
         self.model_manager = model_manager
+        # with a RuleEngine, orders are gated on every configured limit
+        self.rules = rules
+        # with a ledger, gates read its snapshot when they run instead of the ``account`` passed in,
+        # and every accepted order is reserved in it at once, so later decisions (and later entries
+        # of a batch) count it before it fills; a caller that then drops the order must
+        # ``ledger.cancel`` it. Without one, every decision sees only ``account``.
+        self.ledger = ledger
+        self.budget = budget or LatencyBudget.load()
+        # stale / fallback_score / no_fallback / explanation_skipped / stale_after_decision
+        self.deadline_counts: Counter = Counter()
+        self._last_score: Dict[str, tuple] = {}  # symbol -> (score, now_ns() when scored)
+        self.no_score = 0  # decisions skipped because the model gave no score (timeout / error)
+        self.trainer = trainer
+        self.batcher = batcher
+        self.executor = executor
         self.llm = llm or RuleBasedExplainer()
-        self.featureer = RollingFeatureComputer()
+        self.explainer = explainer or ExplanationService(self.llm, on_explanation=publish_explanation)
+        self.snapshot_path = snapshot_path
+        restored = VectorFeatureStore.restore(snapshot_path, snapshot_max_age_s) if snapshot_path else None
+        self.feature_store = restored or VectorFeatureStore()
+        # with a hub, every bar advances it (and through it the feature store) once, so the
+        # strategies and computers reading from it share this pass
+        self.hub = hub
+        if hub is not None:
+            hub.attach(self.feature_store)
 
-    async def decide_from_price(self, symbol: str, price: float, account: AccountSnapshot) -> Dict[str, Any]:
-        self.featureer.update(price)
-        feats = self.featureer.features()
-        try:
-            score = float(self.model_manager.predict_proba([list(feats.values())])[0][1])
-        except Exception:
-            score = 0.0
+    def _update_features(self, symbols: Sequence[str], prices, highs=None, lows=None, volumes=None) -> np.ndarray:
+        if self.hub is not None:
+            return self.hub.update(symbols, prices, highs, lows, volumes)
+        return self.feature_store.update_features(symbols, prices)
+
+    def save_snapshot(self) -> int:
+        """Persist feature state to ``snapshot_path`` (no-op returning 0 when unset)."""
+        return self.feature_store.snapshot(self.snapshot_path) if self.snapshot_path else 0
+
+    def _stale(self, deadline: int, t: int) -> Dict[str, Any]:
+        self.deadline_counts["stale"] += 1
+        return {"decision": "stale", "reason": f"latency budget exceeded by {(t - deadline) / 1e6:.1f} ms"}
+
+    def _no_score(self, feats: Dict[str, float]) -> Dict[str, Any]:
+        self.no_score += 1
+        return {"decision": "no_score", "reason": "model unavailable", "feats": feats}
+
+    def _fallback_score(self, symbol: str, t: int) -> Optional[float]:
+        """The symbol's last model score if it is recent enough to reuse (see LatencyBudget), else None."""
+        last = self._last_score.get(symbol)
+        if last is None or t - last[1] > self.budget.fallback_max_age_ms * 1e6:
+            self.deadline_counts["no_fallback"] += 1
+            return None
+        self.deadline_counts["fallback_score"] += 1
+        return last[0]
+
+    def _no_fallback(self, feats: Dict[str, float]) -> Dict[str, Any]:
+        return {"decision": "no_score", "reason": "no time to score and no recent score to reuse", "feats": feats}
+
+    def ingest(self, symbols: Sequence[str], prices: Sequence[float], highs=None, lows=None, volumes=None) -> None:
+        """Feed a batch of prices to the feature store (and the online trainer) without deciding on
+        them, for callers that decide on only some of the bars: they then call
+        ``decide_from_price(..., ingested=True)``, whose features may already include later bars."""
+        t = now_ns()
+        X = self._update_features(symbols, prices, highs, lows, volumes)
+        if self.trainer is not None:
+            for s, row, p in zip(symbols, X.tolist(), prices):
+                self.trainer.observe(s, row, p)
+        global_latency.since(STAGE_FEATURES, t)
+
+    async def decide_from_price(self, symbol: str, price: float, account: AccountSnapshot, ingest_ns: int = 0,
+                                ingested: bool = False, high: float | None = None, low: float | None = None,
+                                volume: float | None = None) -> Dict[str, Any]:
+        t = now_ns()
+        deadline = self.budget.deadline(ingest_ns)
+        # features are updated even for a stale tick so the rolling windows see every price
+        if not ingested:
+            self._update_features([symbol], [price], None if high is None else [high], None if low is None else [low],
+                                  None if volume is None else [volume])
+        feats = self.feature_store.features(symbol)
+        row = list(feats.values())
+        if self.trainer is not None and not ingested:
+            self.trainer.observe(symbol, row, price)
+        t = global_latency.since(STAGE_FEATURES, t)
+        if deadline and t >= deadline:
+            return self._stale(deadline, t)
+        if deadline and deadline - t < self.budget.min_predict_ms * 1e6:
+            score = self._fallback_score(symbol, t)
+            if score is None:
+                return self._no_fallback(feats)
+        else:
+            score = await self._score_one(symbol, row)
+        t = global_latency.since(STAGE_PREDICT, t)
+        if score is None:
+            return self._no_score(feats)
+        if self.ledger is not None:
+            account = self.ledger.snapshot
         desired_notional = account.capital * 0.02 * score
         try:
-            gate_pretrade(account, desired_notional)
+            if self.rules is not None:
+                reason = self.rules.check(account, desired_notional, symbol=symbol)
+                if reason is not None:
+                    raise RiskError(reason)
+            else:
+                gate_pretrade(account, desired_notional)
         except RiskError as e:
             return {"decision": "blocked", "reason": str(e), "score": score, "feats": feats}
-        prompt = f"Explain concisely why a trade with symbol={symbol}, price={price}, features={feats}, score={score} is a good idea."
-        explanation = await self.llm.explain(prompt)
-        order = OrderIntent(id=new_id(), symbol=symbol, qty=round(desired_notional / (price if price>0 else 1), 6), side="BUY" if score>0.5 else "SELL", price=None, type="MARKET", meta={"score": score, "explanation": explanation})
-        return {"decision": "ok", "order": order, "explanation": explanation, "score": score, "feats": feats}
+        finally:
+            t = global_latency.since(STAGE_RISK, t)
+        return self._accept(symbol, price, feats, score, desired_notional, ingest_ns)
+
+    def explain(self, res: Dict[str, Any]) -> Optional[str]:
+        """Request the explanation of an accepted decision and store it in ``res["explanation"]``:
+        the cached text, or None while one is generated and attached later by order id. Call it
+        once the order is published, so orders dropped before that spend no LLM budget. Skipped
+        when less than ``min_explain_ms`` of the tick's latency budget is left."""
+        if res.get("decision") != "ok":
+            return None
+        t = now_ns()
+        order: OrderIntent = res["order"]
+        deadline = self.budget.deadline(order.meta.get("ingest_ns", 0))
+        if deadline and deadline - t < self.budget.min_explain_ms * 1e6:
+            self.deadline_counts["explanation_skipped"] += 1
+            return None
+        res["explanation"] = self.explainer.request(order.id, order.symbol, res["feats"], res["score"])
+        global_latency.since(STAGE_EXPLAIN, t)
+        return res["explanation"]
+
+    async def _score_one(self, symbol: str, row: List[float]) -> Optional[float]:
+        """P(up) for the row, or None when the model timed out or failed: never trade on that."""
+        try:
+            if self.batcher is not None:
+                score = float((await self.batcher.predict_proba(row))[1])
+            elif self.executor is not None:
+                score = float((await self.executor.predict_proba([row]))[0][1])
+            else:
+                score = float(self.model_manager.predict_proba([row])[0][1])
+        except Exception:
+            return None
+        self._last_score[symbol] = (score, now_ns())
+        return score
+
+    def _accept(self, symbol: str, price: float, feats: Dict[str, float], score: float, desired_notional: float, ingest_ns: int) -> Dict[str, Any]:
+        # the order goes out now; its explanation is requested by whoever publishes it (``explain``)
+        order = OrderIntent(id=new_id(), symbol=symbol, qty=round(desired_notional / (price if price>0 else 1), 6), side="BUY" if score>0.5 else "SELL", price=None, type="MARKET", meta={"score": score, "ingest_ns": ingest_ns, "decided_ns": now_ns()})
+        if self.ledger is not None:
+            self.ledger.expect(order, desired_notional)
+        return {"decision": "ok", "order": order, "explanation": None, "score": score, "feats": feats}
+
+    async def decide_batch(self, symbols: Sequence[str], prices: Sequence[float], account: AccountSnapshot, ingest_ns=0,
+                           highs=None, lows=None, volumes=None) -> List[Dict[str, Any]]:
+        """decide_from_price for a whole tick cycle, entry by entry in order (a repeated symbol sees its
+        earlier entries' prices), with features, scoring, sizing and gating done as arrays. ``ingest_ns``
+        is a scalar or one value per entry."""
+        n = len(symbols)
+        if n == 0:
+            return []
+        t = now_ns()
+        store = self.feature_store
+        prices = np.asarray(prices, dtype=float)
+        X = self._update_features(symbols, prices, highs, lows, volumes)
+        names = store.feature_names
+        feats = [dict(zip(names, r)) for r in X.tolist()]
+        if self.trainer is not None:
+            for s, f, p in zip(symbols, feats, prices.tolist()):
+                self.trainer.observe(s, list(f.values()), p)
+        t = global_latency.since(STAGE_FEATURES, t)
+        ingest = np.broadcast_to(np.asarray(ingest_ns, dtype=np.int64), (n,))
+        deadlines = np.where(ingest > 0, ingest + int(self.budget.budget_ms * 1e6), 0)
+        left = np.where(deadlines > 0, deadlines - t, np.iinfo(np.int64).max)
+        stale = left <= 0
+        modelled = left >= self.budget.min_predict_ms * 1e6
+        scores = np.full(n, np.nan)  # NaN: no score, no order
+        if modelled.any():
+            idx = np.flatnonzero(modelled)
+            try:
+                if self.executor is not None:
+                    proba = await self.executor.predict_proba(X[idx])
+                else:
+                    proba = self.model_manager.predict_proba(X[idx])
+                scores[idx] = np.asarray(proba, dtype=float)[:, 1]
+                scored = now_ns()
+                self._last_score.update((symbols[i], (float(scores[i]), scored)) for i in idx.tolist())
+            except Exception:
+                pass  # rows stay NaN
+        no_fallback = np.zeros(n, dtype=bool)
+        for i in np.flatnonzero(~modelled & ~stale).tolist():
+            score = self._fallback_score(symbols[i], t)
+            if score is not None:
+                scores[i] = score
+            else:
+                no_fallback[i] = True
+        t = global_latency.since(STAGE_PREDICT, t)
+        if self.ledger is not None:
+            account = self.ledger.snapshot
+        notionals = account.capital * 0.02 * scores
+        # a batch gates exactly like the per-entry loop: earlier accepted entries count iff they
+        # would have been reserved in the ledger
+        cumulative = self.ledger is not None
+        if self.rules is not None:
+            reasons = self.rules.evaluate(account, notionals, symbols=symbols, cumulative=cumulative)[1]
+        else:
+            reasons = gate_pretrade_batch(account, notionals, cumulative=cumulative)
+        t = global_latency.since(STAGE_RISK, t)
+        out = []
+        for i, (s, p, score, notional, reason) in enumerate(zip(symbols, prices.tolist(), scores.tolist(), notionals.tolist(), reasons)):
+            if stale[i]:
+                out.append(self._stale(int(deadlines[i]), t))
+            elif no_fallback[i]:
+                out.append(self._no_fallback(feats[i]))
+            elif score != score:
+                out.append(self._no_score(feats[i]))
+            elif reason is not None:
+                out.append({"decision": "blocked", "reason": reason, "score": score, "feats": feats[i]})
+            else:
+                out.append(self._accept(s, p, feats[i], score, notional, int(ingest[i])))
+        return out
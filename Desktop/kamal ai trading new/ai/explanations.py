@@ -0,0 +1,137 @@
+"""LLM explanations generated off the order path and attached to orders afterwards by id.
+
+Prompts are built from quantized inputs (features to ``sig_digits`` significant digits, score to
+``score_step``), and the blake2b digest of the quantized (symbol, features, score) is the cache
+key, so near-identical decisions share one explanation. Concurrent requests for a key in flight
+join that call instead of issuing another one. LLM calls are limited to ``max_concurrency`` at
+a time and ``rate_per_s`` (token bucket of ``burst``); beyond ``max_pending`` outstanding keys,
+new requests are dropped and counted, since an explanation is never worth queueing for.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import math
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from core.events import OrderExplanation
+from core.latency import global_latency, now_ns, STAGE_LLM
+from ai.llm_interface import LLMInterface
+
+log = logging.getLogger(__name__)
+
+def _round_sig(x: float, digits: int) -> float:
+    if x == 0 or not math.isfinite(x):
+        return x
+    return round(x, digits - 1 - int(math.floor(math.log10(abs(x)))))
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        self.rate = rate_per_s
+        self.burst = burst
+        self.tokens = float(burst)
+        self._last: Optional[float] = None
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            if self._last is not None:
+                self.tokens = min(self.burst, self.tokens + (t - self._last) * self.rate)
+            self._last = t
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class ExplanationService:
+    def __init__(self, llm: LLMInterface, max_concurrency: int = 4, rate_per_s: float = 5.0, burst: int = 5,
+                 max_pending: int = 256, cache_size: int = 4096, sig_digits: int = 3, score_step: float = 0.05,
+                 timeout_s: float = 30.0, max_tokens: int = 256,
+                 on_explanation: Optional[Callable[[OrderExplanation], Any]] = None):
+        self.llm = llm
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.sig_digits = sig_digits
+        self.score_step = score_step
+        self.timeout_s = timeout_s
+        self.max_tokens = max_tokens
+        self.on_explanation = on_explanation
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._max_concurrency = max_concurrency
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, List[str]] = {}
+        self._tasks: set = set()
+        self.by_order: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = self.calls = self.joined = self.dropped = self.errors = 0
+
+    def prompt(self, symbol: str, features: Mapping[str, float], score: float) -> Tuple[str, str]:
+        """(cache key, prompt) for the quantized decision inputs."""
+        feats = ", ".join(f"{k}={_round_sig(float(v), self.sig_digits):g}" for k, v in features.items())
+        q = round(round(score / self.score_step) * self.score_step, 6)
+        text = f"Explain concisely why a trade with symbol={symbol}, features={{{feats}}}, score={q:g} is a good idea."
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest(), text
+
+    def request(self, order_id: str, symbol: str, features: Mapping[str, float], score: float) -> Optional[str]:
+        """Return the cached explanation, or schedule one for ``order_id`` and return None. Never awaits."""
+        key, text = self.prompt(symbol, features, score)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            self._attach(order_id, cached, True)
+            return cached
+        waiting = self._inflight.get(key)
+        if waiting is not None:
+            waiting.append(order_id)
+            self.joined += 1
+            return None
+        if len(self._inflight) >= self.max_pending:
+            self.dropped += 1
+            return None
+        self._inflight[key] = [order_id]
+        task = asyncio.get_running_loop().create_task(self._generate(key, text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return None
+
+    async def _generate(self, key: str, text: str) -> None:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._max_concurrency)
+        try:
+            async with self._sem:
+                await self.bucket.acquire()
+                self.calls += 1
+                t = now_ns()
+                result = await asyncio.wait_for(self.llm.explain(text, max_tokens=self.max_tokens), self.timeout_s)
+                global_latency.since(STAGE_LLM, t)
+        except Exception:
+            self.errors += 1
+            log.exception("explanation failed for %s", key)
+            self._inflight.pop(key, None)
+            return
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        for order_id in self._inflight.pop(key, []):
+            self._attach(order_id, result, False)
+
+    def _attach(self, order_id: str, text: str, cached: bool) -> None:
+        self.by_order[order_id] = text
+        if len(self.by_order) > self.cache_size:
+            self.by_order.popitem(last=False)
+        if self.on_explanation is not None:
+            self.on_explanation(OrderExplanation(order_id, text, cached))
+
+    def get(self, order_id: str) -> Optional[str]:
+        return self.by_order.get(order_id)
+
+    async def drain(self) -> None:
+        """Wait for every scheduled explanation (tests and shutdown)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "llm_calls": self.calls, "joined_inflight": self.joined, "dropped": self.dropped,
+                "errors": self.errors, "inflight": len(self._inflight), "cached": len(self._cache)}
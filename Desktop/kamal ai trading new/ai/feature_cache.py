@@ -0,0 +1,87 @@
+"""Batch materialization of feature-graph outputs over historical OHLCV, cached on disk.
+
+Each materialized set is a directory of one ``.npy`` file per feature (loaded back with
+``mmap_mode="r"``) plus ``meta.json``, under
+``<root>/<symbol>/<feature-set hash>/<first ts>_<last ts>_<rows>``. The feature-set hash
+covers the feature names and their expression structure, so changing a definition
+invalidates the cache; a digest of the input columns guards against revised history.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Mapping, Sequence
+import numpy as np
+from ai.feature_graph import FEATURES, FeatureGraph, _columns
+
+FORMAT_VERSION = 1
+
+def feature_set_hash(names: Sequence[str], graph: FeatureGraph = FEATURES) -> str:
+    spec = [(n, graph.outputs[n].key) for n in names]
+    return hashlib.blake2b(repr((FORMAT_VERSION, spec)).encode(), digest_size=10).hexdigest()
+
+def _range(data: Mapping[str, Any], n: int) -> tuple:
+    index = getattr(data, "index", None)
+    if index is not None and hasattr(index, "asi8") and n:
+        ts = index.as_unit("ns").asi8
+        return int(ts[0]), int(ts[-1])
+    return 0, max(n - 1, 0)
+
+def _digest(cols: Mapping[str, np.ndarray]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for name in sorted(cols):
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(cols[name]).tobytes())
+    return h.hexdigest()
+
+class FeatureMaterializer:
+    def __init__(self, root: str = "data/features", graph: FeatureGraph = FEATURES):
+        self.root = root
+        self.graph = graph
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, symbol: str, names: Sequence[str], data: Mapping[str, Any]) -> str:
+        n = len(data["close"])
+        start, end = _range(data, n)
+        return os.path.join(self.root, symbol, feature_set_hash(names, self.graph), f"{start}_{end}_{n}")
+
+    def materialize(self, symbol: str, data: Mapping[str, Any], names: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Feature columns for ``data`` (DataFrame or dict of OHLCV arrays), computed once and then
+        served from disk as read-only memory maps."""
+        names = list(names)
+        plan = self.graph.plan(names)
+        digest = _digest(_columns(data, plan.sources))
+        target = self.path(symbol, names, data)
+        cached = self._load(target, names, digest)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        values = plan.compute(data)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(target), prefix=".tmp-")
+        try:
+            for i, name in enumerate(names):
+                np.save(os.path.join(tmp, f"{i}.npy"), values[name])
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+                json.dump({"version": FORMAT_VERSION, "names": names, "digest": digest, "rows": len(data["close"])}, fh)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.replace(tmp, target)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return self._load(target, names, digest)
+
+    def _load(self, target: str, names: Sequence[str], digest: str):
+        try:
+            with open(os.path.join(target, "meta.json"), encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != FORMAT_VERSION or meta.get("names") != list(names) or meta.get("digest") != digest:
+            return None
+        return {name: np.load(os.path.join(target, f"{i}.npy"), mmap_mode="r") for i, name in enumerate(names)}
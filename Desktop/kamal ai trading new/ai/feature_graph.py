@@ -0,0 +1,525 @@
+"""Declarative feature graph shared by the feature store and the trading strategies.
+
+Features are expressions over the OHLCV sources (``close.rolling(21).mean()``, ``rsi(14)``).
+Consumers register named outputs into one FeatureGraph; structurally identical
+subexpressions become one node within a Plan. A Plan evaluates only the nodes its
+requested outputs depend on, either streaming (one bar at a time, O(1) per node) or in
+batch over whole columns, and can report the time spent in each node. Separate plans do
+not share work: for that, consumers read from one ai.feature_hub.FeatureHub, which streams
+a single plan over everything registered and is advanced once per bar, so e.g. the 21-bar
+close mean used by the feature store and by IntradayStrategy is computed once per bar.
+
+Every operator's batch kernel performs the same floating-point operations in the same
+order as its streaming kernel (rolling sums are cumulative sums of shifted add/remove
+deltas), so both modes produce identical values.
+"""
+from __future__ import annotations
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from ai.streaming_stats import EMA, RollingWindow
+
+SOURCES = ("open", "high", "low", "close", "volume")
+OPS = frozenset({"source", "const", "add", "sub", "mul", "div", "neg", "abs", "clip_lower", "replace_zero",
+                 "maximum", "shift", "rolling_mean", "rolling_std", "rolling_max", "rolling_min", "ema"})
+
+class Expr:
+    __slots__ = ("op", "inputs", "params", "key")
+
+    def __init__(self, op: str, inputs: Sequence["Expr"] = (), params: Tuple = ()):
+        if op not in OPS:
+            raise ValueError(f"unknown feature op {op!r}")
+        self.op = op
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)
+        self.key = (op, tuple(i.key for i in self.inputs), self.params)
+
+    def __repr__(self) -> str:
+        return f"Expr({label(self)})"
+
+    def _bin(self, op: str, other, swap: bool = False) -> "Expr":
+        other = other if isinstance(other, Expr) else const(other)
+        return Expr(op, (other, self) if swap else (self, other))
+
+    def __add__(self, other): return self._bin("add", other)
+    def __radd__(self, other): return self._bin("add", other, swap=True)
+    def __sub__(self, other): return self._bin("sub", other)
+    def __rsub__(self, other): return self._bin("sub", other, swap=True)
+    def __mul__(self, other): return self._bin("mul", other)
+    def __rmul__(self, other): return self._bin("mul", other, swap=True)
+    def __truediv__(self, other): return self._bin("div", other)
+    def __rtruediv__(self, other): return self._bin("div", other, swap=True)
+    def __neg__(self): return Expr("neg", (self,))
+    def __abs__(self): return Expr("abs", (self,))
+
+    def rolling(self, window: int) -> "_Rolling":
+        return _Rolling(self, window)
+
+    def shift(self, periods: int = 1) -> "Expr":
+        """Value ``periods`` bars ago; before that much history exists, the first value seen."""
+        return Expr("shift", (self,), (periods,))
+
+    def diff(self) -> "Expr":
+        return self - self.shift(1)
+
+    def ema(self, span: int) -> "Expr":
+        return Expr("ema", (self,), (span,))
+
+    def clip_lower(self, floor: float) -> "Expr":
+        return Expr("clip_lower", (self,), (float(floor),))
+
+    def replace_zero(self, value: float) -> "Expr":
+        return Expr("replace_zero", (self,), (float(value),))
+
+class _Rolling:
+    """Rolling windows include partial windows (min_periods=1)."""
+
+    def __init__(self, x: Expr, window: int):
+        self.x, self.window = x, window
+
+    def mean(self) -> Expr: return Expr("rolling_mean", (self.x,), (self.window,))
+    def std(self) -> Expr: return Expr("rolling_std", (self.x,), (self.window,))
+    def max(self) -> Expr: return Expr("rolling_max", (self.x,), (self.window,))
+    def min(self) -> Expr: return Expr("rolling_min", (self.x,), (self.window,))
+
+def source(name: str) -> Expr:
+    if name not in SOURCES:
+        raise ValueError(f"unknown source {name!r}")
+    return Expr("source", params=(name,))
+
+def const(value: float) -> Expr:
+    return Expr("const", params=(float(value),))
+
+def maximum(*exprs: Expr) -> Expr:
+    return Expr("maximum", exprs)
+
+open_, high, low, close, volume = (source(s) for s in SOURCES)
+
+def rsi(n: int, x: Expr = close) -> Expr:
+    """Rolling-mean RSI (the definition IntradayStrategy has always used)."""
+    d = x.diff()
+    gain = d.clip_lower(0).rolling(n).mean()
+    loss = (-d).clip_lower(0).rolling(n).mean()
+    return 100 - 100 / (1 + gain / loss.replace_zero(1e-9))
+
+def true_range() -> Expr:
+    prev = close.shift(1)
+    return maximum(high - low, abs(high - prev), abs(low - prev))
+
+def atr(n: int) -> Expr:
+    return true_range().rolling(n).mean()
+
+def zscore(n: int, x: Expr = close) -> Expr:
+    # a flat window has x == mean exactly, so dividing by inf yields 0 rather than nan
+    return (x - x.rolling(n).mean()) / x.rolling(n).std().replace_zero(float("inf"))
+
+def vwap(n: int) -> Expr:
+    return (close * volume).rolling(n).mean() / volume.rolling(n).mean()
+
+_CATALOG: Dict[str, Callable[[int], Expr]] = {
+    "ma": lambda n: close.rolling(n).mean(),
+    "momentum": lambda n: close - close.rolling(n).mean(),
+    "rsi": rsi, "atr": atr, "zscore": zscore, "vwap": vwap,
+    "std": lambda n: close.rolling(n).std(),
+    "ema": lambda n: close.ema(n),
+    "high": lambda n: high.rolling(n).max(),
+    "low": lambda n: low.rolling(n).min(),
+}
+
+def catalog(name: str) -> Expr:
+    """Expression for a catalog feature name such as "rsi_14" or "ma_21"."""
+    kind, _, n = name.rpartition("_")
+    if kind not in _CATALOG or not n.isdigit():
+        raise ValueError(f"unknown feature {name!r}; expected <{'|'.join(_CATALOG)}>_<window>")
+    return _CATALOG[kind](int(n))
+
+def label(e: Expr) -> str:
+    a = [label(i) for i in e.inputs]
+    p = e.params
+    if e.op == "source":
+        return p[0]
+    if e.op == "const":
+        return repr(p[0])
+    if e.op in _INFIX:
+        return f"({a[0]} {_INFIX[e.op]} {a[1]})"
+    if e.op == "neg":
+        return f"-{a[0]}"
+    if e.op == "abs":
+        return f"abs({a[0]})"
+    if e.op == "maximum":
+        return f"maximum({', '.join(a)})"
+    if e.op.startswith("rolling_"):
+        return f"{a[0]}.rolling({p[0]}).{e.op[8:]}()"
+    return f"{a[0]}.{e.op}({', '.join(map(repr, p))})"
+
+_INFIX = {"add": "+", "sub": "-", "mul": "*", "div": "/"}
+
+# kernels: streaming ``step(*inputs)`` and ``batch(*arrays)`` with identical arithmetic
+
+class _Kernel:
+    def __init__(self, *params):
+        self.params = params
+
+class _Const(_Kernel):
+    def step(self):
+        return self.params[0]
+
+    def batch(self, n=0):
+        return np.full(n, self.params[0])
+
+class _Elementwise(_Kernel):
+    fn: Callable = None
+    vfn: Callable = None
+
+    def step(self, *args):
+        return type(self).fn(*args)
+
+    def batch(self, *arrays):
+        with np.errstate(all="ignore"):
+            return type(self).vfn(*arrays)
+
+def _elementwise(fn, vfn=None):
+    return type("_K", (_Elementwise,), {"fn": staticmethod(fn), "vfn": staticmethod(vfn or fn)})
+
+def _div(a, b):
+    return a / b if b != 0 else float("nan")
+
+class _ClipLower(_Kernel):
+    def step(self, x):
+        v = self.params[0]
+        return x if x > v else v
+
+    def batch(self, x):
+        return np.where(x > self.params[0], x, self.params[0])
+
+class _ReplaceZero(_Kernel):
+    def step(self, x):
+        return x if x != 0 else self.params[0]
+
+    def batch(self, x):
+        return np.where(x != 0, x, self.params[0])
+
+class _Maximum(_Kernel):
+    def step(self, *xs):
+        m = xs[0]
+        for x in xs[1:]:
+            m = m if m >= x else x
+        return m
+
+    def batch(self, *xs):
+        m = xs[0]
+        for x in xs[1:]:
+            m = np.where(m >= x, m, x)
+        return m
+
+class _Shift(_Kernel):
+    def __init__(self, periods: int):
+        super().__init__(periods)
+        self.buf: deque = deque(maxlen=periods + 1)
+
+    def step(self, x):
+        self.buf.append(x)
+        return self.buf[0]
+
+    def batch(self, x):
+        k = self.params[0]
+        if len(x) == 0:
+            return x.copy()
+        return np.concatenate([np.full(min(k, len(x)), x[0]), x[:-k]]) if k else x.copy()
+
+def _window_sums(x: np.ndarray, w: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """RollingWindow's (s, sq, n, shift) after every push, with the same re-centring schedule.
+
+    Pushes run in segments of ``w``: segment r starts from the sums recomputed at its
+    predecessor's last index (0 for r = 0) and accumulates ``new - evicted`` deltas centred on
+    that index's value, and its own last index is recomputed from the full window. Each segment
+    is a row of a (segments x w) matrix, so one row-wise cumsum replays the sequential sums.
+    """
+    N = len(x)
+    R = -(-N // w)
+    idx = np.arange(N)
+    rc = np.arange(w - 1, N, w)  # re-centre indices
+    seg_shift = np.concatenate([x[:1], x[rc]])[:R]
+    shift = seg_shift[idx // w]
+    shift[rc] = x[rc]
+    full = idx >= w
+    d = x - shift
+    od = np.where(full, np.concatenate([np.zeros(min(w, N)), x[:-w]]) - shift, 0.0)
+    if len(rc):
+        dv = np.lib.stride_tricks.sliding_window_view(x, w)[rc - w + 1] - x[rc, None]
+    else:
+        dv = np.zeros((0, w))
+    rs, rsq = np.cumsum(dv, axis=1)[:, -1], np.cumsum(dv * dv, axis=1)[:, -1]
+    out = []
+    for delta, recomputed in ((d - od, rs), (d * d - od * od, rsq)):
+        # row r: [segment start sums, its first w - 1 deltas]; the row's last push is recomputed
+        m = np.zeros((R, w))
+        m.reshape(-1)[:N] = delta
+        m[:, 1:] = m[:, :-1].copy()
+        m[:, 0] = np.concatenate([[0.0], recomputed])[:R]
+        acc = np.cumsum(m, axis=1)
+        res = np.empty((R, w))
+        res[:, :-1] = acc[:, 1:]
+        res[:len(rc), -1] = recomputed
+        out.append(res.reshape(-1)[:N])
+    return out[0], out[1], np.minimum(idx + 1, w), shift
+
+class _RollingMean(_Kernel):
+    def __init__(self, w: int):
+        super().__init__(w)
+        self.win = RollingWindow(w)
+
+    def step(self, x):
+        self.win.push(x)
+        return self.win.mean
+
+    def batch(self, x):
+        if len(x) == 0:
+            return x.copy()
+        s, _, n, shift = _window_sums(x, self.params[0])
+        return shift + s / n
+
+class _RollingStd(_RollingMean):
+    def step(self, x):
+        self.win.push(x)
+        return self.win.std
+
+    def batch(self, x):
+        if len(x) == 0:
+            return x.copy()
+        s, sq, n, _ = _window_sums(x, self.params[0])
+        m = s / n
+        return np.sqrt(np.maximum(sq / n - m * m, 0.0))
+
+class _RollingMax(_Kernel):
+    pad = -np.inf
+    reduce = staticmethod(np.max)
+
+    def __init__(self, w: int):
+        super().__init__(w)
+        self.win = RollingWindow(w, track_minmax=True)
+
+    def step(self, x):
+        self.win.push(x)
+        return self.win.max
+
+    def batch(self, x):
+        w = self.params[0]
+        if len(x) == 0:
+            return x.copy()
+        padded = np.concatenate([np.full(w - 1, self.pad), x])
+        return self.reduce(np.lib.stride_tricks.sliding_window_view(padded, w), axis=1)
+
+class _RollingMin(_RollingMax):
+    pad = np.inf
+    reduce = staticmethod(np.min)
+
+    def step(self, x):
+        self.win.push(x)
+        return self.win.min
+
+class _EMA(_Kernel):
+    def __init__(self, span: int):
+        super().__init__(span)
+        self.ema = EMA(span)
+
+    def step(self, x):
+        self.ema.push(x)
+        return self.ema.value
+
+    def batch(self, x):
+        # a recurrence: replayed element by element to stay identical to the streaming path
+        e, out = EMA(self.params[0]), np.empty(len(x))
+        for i, v in enumerate(x.tolist()):
+            e.push(v)
+            out[i] = e.value
+        return out
+
+KERNELS: Dict[str, Optional[type]] = {
+    "source": None,
+    "const": _Const,
+    "add": _elementwise(lambda a, b: a + b),
+    "sub": _elementwise(lambda a, b: a - b),
+    "mul": _elementwise(lambda a, b: a * b),
+    "div": _elementwise(_div, lambda a, b: np.where(b != 0, a / b, np.nan)),
+    "neg": _elementwise(lambda a: -a),
+    "abs": _elementwise(abs, np.abs),
+    "clip_lower": _ClipLower,
+    "replace_zero": _ReplaceZero,
+    "maximum": _Maximum,
+    "shift": _Shift,
+    "rolling_mean": _RollingMean,
+    "rolling_std": _RollingStd,
+    "rolling_max": _RollingMax,
+    "rolling_min": _RollingMin,
+    "ema": _EMA,
+}
+
+class FeatureGraph:
+    def __init__(self):
+        self.outputs: Dict[str, Expr] = {}
+        self._nodes: Dict[tuple, Expr] = {}
+
+    def _intern(self, e: Expr) -> Expr:
+        node = self._nodes.get(e.key)
+        if node is None:
+            for i in e.inputs:
+                self._intern(i)
+            node = self._nodes[e.key] = e
+        return node
+
+    def register(self, name: str, expr: Expr) -> Expr:
+        prev = self.outputs.get(name)
+        if prev is not None and prev.key != expr.key:
+            raise ValueError(f"feature {name!r} is already registered as {label(prev)}")
+        self.outputs[name] = node = self._intern(expr)
+        return node
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.outputs
+
+    @property
+    def node_count(self) -> int:
+        return len(self._nodes)
+
+    def plan(self, names: Iterable[str]) -> "Plan":
+        names = list(names)
+        missing = [n for n in names if n not in self.outputs]
+        if missing:
+            raise KeyError(f"unregistered features: {missing}")
+        return Plan(self, names)
+
+class Plan:
+    """Topologically ordered nodes needed for ``names``; shared subexpressions appear once."""
+
+    def __init__(self, graph: FeatureGraph, names: List[str]):
+        self.names = names
+        self.nodes: List[Expr] = []
+        index: Dict[tuple, int] = {}
+
+        def visit(e: Expr) -> int:
+            i = index.get(e.key)
+            if i is None:
+                for inp in e.inputs:
+                    visit(inp)
+                i = index[e.key] = len(self.nodes)
+                self.nodes.append(e)
+            return i
+
+        self.out_slots = [visit(graph.outputs[n]) for n in names]
+        self.index = index
+        self.inputs = [tuple(index[i.key] for i in e.inputs) for e in self.nodes]
+        self.sources = sorted({e.params[0] for e in self.nodes if e.op == "source"})
+        self.consumers: List[List[str]] = [[] for _ in self.nodes]
+        for name, slot in zip(names, self.out_slots):
+            self._mark(slot, name, set())
+        self.calls = [0] * len(self.nodes)
+        self.cost_ns = [0] * len(self.nodes)
+
+    def _mark(self, slot: int, name: str, seen: set) -> None:
+        if slot in seen:
+            return
+        seen.add(slot)
+        self.consumers[slot].append(name)
+        for i in self.inputs[slot]:
+            self._mark(i, name, seen)
+
+    def stream(self, profile: bool = False, provided: Sequence[str] = ()) -> "StreamEvaluator":
+        return StreamEvaluator(self, profile, provided)
+
+    def compute(self, data: Mapping[str, Any], profile: bool = False) -> Dict[str, np.ndarray]:
+        """Evaluate over whole columns (a DataFrame or dict of arrays with OHLCV names)."""
+        cols = _columns(data, self.sources)
+        n = len(cols["close"]) if "close" in cols else len(next(iter(cols.values()), ()))
+        vals: List[np.ndarray] = []
+        clock = time.perf_counter_ns
+        for slot, e in enumerate(self.nodes):
+            t0 = clock() if profile else 0
+            if e.op == "source":
+                v = cols[e.params[0]]
+            elif e.op == "const":
+                v = _Const(*e.params).batch(n)
+            else:
+                v = KERNELS[e.op](*e.params).batch(*(vals[i] for i in self.inputs[slot]))
+            vals.append(v)
+            if profile:
+                self.cost_ns[slot] += clock() - t0
+                self.calls[slot] += 1
+        return {name: vals[slot] for name, slot in zip(self.names, self.out_slots)}
+
+    def cost_report(self) -> List[Dict[str, Any]]:
+        rows = [{"node": label(e), "calls": c, "total_ms": t / 1e6, "mean_us": t / c / 1e3 if c else 0.0,
+                 "consumers": list(self.consumers[i])}
+                for i, (e, c, t) in enumerate(zip(self.nodes, self.calls, self.cost_ns)) if e.op not in ("source", "const")]
+        return sorted(rows, key=lambda r: -r["total_ms"])
+
+def _columns(data: Mapping[str, Any], sources: Sequence[str]) -> Dict[str, np.ndarray]:
+    cols = {}
+    for s in sources:
+        if s in data:
+            cols[s] = np.asarray(data[s], dtype=float)
+        elif s in ("high", "low", "open"):
+            cols[s] = np.asarray(data["close"], dtype=float)
+        elif s == "volume":
+            cols[s] = np.ones(len(data["close"]))
+        else:
+            raise KeyError(f"missing source column {s!r}")
+    return cols
+
+class StreamEvaluator:
+    """Steps a plan one bar at a time. Outputs named in ``provided`` are not computed: their values
+    are passed to each ``update`` (e.g. from a VectorFeatureStore that computes them for all
+    symbols at once), and nodes only they depend on are skipped."""
+
+    def __init__(self, plan: Plan, profile: bool = False, provided: Sequence[str] = ()):
+        self.plan = plan
+        self.profile = profile
+        self._vals: List[float] = [0.0] * len(plan.nodes)
+        self._ready = False
+        self._provided = [plan.out_slots[plan.names.index(n)] for n in provided]
+        skip, needed = set(self._provided), set()
+        stack = list(plan.out_slots)
+        while stack:
+            slot = stack.pop()
+            if slot not in needed:
+                needed.add(slot)
+                if slot not in skip:
+                    stack.extend(plan.inputs[slot])
+        self._sources = [(slot, e.params[0]) for slot, e in enumerate(plan.nodes) if e.op == "source" and slot in needed]
+        self._steps = []
+        for slot, e in enumerate(plan.nodes):
+            if e.op == "source" or slot in skip or slot not in needed:
+                continue
+            if e.op == "const":
+                self._vals[slot] = e.params[0]
+                continue
+            self._steps.append((slot, KERNELS[e.op](*e.params).step, plan.inputs[slot]))
+
+    def update(self, close: float, high: float | None = None, low: float | None = None, volume: float = 1.0,
+               open: float | None = None, provided: Sequence[float] = ()) -> None:
+        bar = {"close": close, "high": close if high is None else high, "low": close if low is None else low,
+               "volume": volume, "open": close if open is None else open}
+        vals = self._vals
+        for slot, name in self._sources:
+            vals[slot] = bar[name]
+        for slot, v in zip(self._provided, provided):
+            vals[slot] = v
+        if self.profile:
+            clock, plan = time.perf_counter_ns, self.plan
+            for slot, step, ins in self._steps:
+                t0 = clock()
+                vals[slot] = step(*[vals[i] for i in ins])
+                plan.cost_ns[slot] += clock() - t0
+                plan.calls[slot] += 1
+        else:
+            for slot, step, ins in self._steps:
+                vals[slot] = step(*[vals[i] for i in ins])
+        self._ready = True
+
+    def values(self) -> Dict[str, float]:
+        if not self._ready:
+            return {name: 0.0 for name in self.plan.names}
+        return {name: self._vals[slot] for name, slot in zip(self.plan.names, self.plan.out_slots)}
+
+FEATURES = FeatureGraph()
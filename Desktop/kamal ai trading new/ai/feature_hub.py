@@ -0,0 +1,80 @@
+"""One streaming evaluation of every registered feature, shared by all its consumers.
+
+A Plan shares nodes only among its own outputs, so strategies and feature computers that each
+build a plan recompute common subexpressions. A FeatureHub builds one plan over everything
+registered in its graph and keeps one StreamEvaluator per symbol; advancing it once per bar runs
+each node once per bar, and consumers read their outputs from it instead of computing them.
+
+An attached VectorFeatureStore computes its moving averages and momentum for all symbols at
+once; the hub takes those values from the store's rows instead of stepping the same nodes again.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from ai.feature_graph import FEATURES, FeatureGraph, StreamEvaluator, catalog
+from ai.vector_features import VectorFeatureStore
+
+class FeatureHub:
+    """Register consumers (``graph.register``, ``attach``) first: the plan is fixed on the first
+    ``update`` and later registrations are an error."""
+
+    def __init__(self, graph: FeatureGraph | None = None, profile: bool = False):
+        self.graph = FEATURES if graph is None else graph
+        self.profile = profile
+        self.store: Optional[VectorFeatureStore] = None
+        self._store_cols: Dict[str, int] = {}  # output name -> column of store.feature_names
+        self.plan = None
+        self._provided: List[str] = []
+        self._cols: List[int] = []
+        self._evals: Dict[str, StreamEvaluator] = {}
+        self._counts: Dict[str, int] = {}
+
+    def attach(self, store: VectorFeatureStore) -> None:
+        """Take the store's features from its rows; the hub then also updates the store."""
+        if self.plan is not None:
+            raise RuntimeError("cannot attach a feature store after the hub has started")
+        names = [f"ma_{w}" for w in store.window_sizes] + (["momentum_8"] if 8 in store.window_sizes else [])
+        for name in names:
+            self.graph.register(name, catalog(name))
+        self.store = store
+        self._store_cols = {name: store.feature_names.index(name) for name in names}
+
+    def _start(self) -> None:
+        self.plan = self.graph.plan(list(self.graph.outputs))
+        self._provided = [n for n in self.plan.names if n in self._store_cols]
+        self._cols = [self._store_cols[n] for n in self._provided]
+
+    def update(self, symbols: Sequence[str], close, high=None, low=None, volume=None) -> Optional[np.ndarray]:
+        """Advance every symbol's features by one bar per entry, in order. Returns the attached
+        store's feature row for each entry (as VectorFeatureStore.update_features), or None."""
+        if self.plan is None:
+            self._start()
+        elif len(self.graph.outputs) != len(self.plan.names):
+            raise RuntimeError("features were registered after the hub started; register every consumer first")
+        n = len(symbols)
+        X = self.store.update_features(symbols, close) if self.store is not None else None
+        provided = X[:, self._cols].tolist() if X is not None and self._cols else [()] * n
+        close = np.asarray(close, dtype=float).tolist()
+        high = close if high is None else np.asarray(high, dtype=float).tolist()
+        low = close if low is None else np.asarray(low, dtype=float).tolist()
+        volume = [1.0] * n if volume is None else np.asarray(volume, dtype=float).tolist()
+        for s, c, h, l, v, p in zip(symbols, close, high, low, volume, provided):
+            ev = self._evals.get(s)
+            if ev is None:
+                ev = self._evals[s] = self.plan.stream(profile=self.profile, provided=self._provided)
+            ev.update(c, h, l, v, provided=p)
+            self._counts[s] = self._counts.get(s, 0) + 1
+        return X
+
+    def values(self, symbol: str, names: Sequence[str] | None = None) -> Dict[str, float]:
+        """``symbol``'s outputs (all, or ``names``) as of its last update; zeros before the first."""
+        ev = self._evals.get(symbol)
+        vals = ev.values() if ev is not None else {n: 0.0 for n in self.graph.outputs}
+        return vals if names is None else {n: vals[n] for n in names}
+
+    def count(self, symbol: str) -> int:
+        """Bars seen for ``symbol``."""
+        return self._counts.get(symbol, 0)
+
+    def cost_report(self):
+        return self.plan.cost_report() if self.plan is not None else []
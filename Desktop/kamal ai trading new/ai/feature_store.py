@@ -1,25 +1,44 @@
 from __future__ import annotations
-from collections import deque
-from typing import Deque, Dict, List
+from typing import TYPE_CHECKING, Dict, List, Sequence
+from ai.feature_graph import FeatureGraph, catalog, const
+if TYPE_CHECKING:
+    from ai.feature_hub import FeatureHub
 
 class RollingFeatureComputer:
-    def __init__(self, window_sizes: List[int] = [3, 8, 21]):
-        self.windows: Dict[int, Deque[float]] = {w: deque(maxlen=w) for w in window_sizes}
+    """Moving averages and momentum, plus optional catalog ``extras`` (e.g. "rsi_14", "atr_14",
+    "zscore_21", "vwap_21"), evaluated incrementally through a private feature graph by default.
 
-    def update(self, price: float):
-        for q in self.windows.values():
-            q.append(price)
+    With ``hub`` the features are registered into ``hub.graph`` and read from the hub for
+    ``symbol``, so nodes shared with other consumers run once per bar; ``update`` then advances
+    the hub for ``symbol``, so feed each bar through only one of the hub's feeders."""
 
-    def features(self) -> Dict[str, float]:
-        out = {}
-        for w, q in self.windows.items():
-            if len(q) == 0:
-                out[f"ma_{w}"] = 0.0
-            else:
-                out[f"ma_{w}"] = sum(q) / len(q)
-        if len(self.windows[next(iter(self.windows))]) > 0:
-            last = next(iter(self.windows.values()))[-1]
-            out["momentum_8"] = last - out.get("ma_8", last)
+    def __init__(self, window_sizes: List[int] = [3, 8, 21], extras: Sequence[str] = (), graph: FeatureGraph | None = None,
+                 profile: bool = False, hub: "FeatureHub | None" = None, symbol: str = ""):
+        self.hub, self.symbol = hub, symbol
+        graph = hub.graph if hub is not None else FeatureGraph() if graph is None else graph
+        exprs = {f"ma_{w}": catalog(f"ma_{w}") for w in window_sizes}
+        # momentum is measured against ma_8 and is flat when that window is not configured, so the
+        # layout matches VectorFeatureStore either way
+        exprs["momentum_8"] = catalog("momentum_8") if 8 in window_sizes else const(0.0)
+        for name in extras:
+            exprs.setdefault(name, catalog(name))
+        for name, expr in exprs.items():
+            graph.register(name, expr)
+        self.names = list(exprs)
+        if hub is None:
+            self.plan = graph.plan(self.names)
+            self.evaluator = self.plan.stream(profile=profile)
+
+    def update(self, price: float, high: float | None = None, low: float | None = None, volume: float = 1.0):
+        if self.hub is not None:
+            self.hub.update([self.symbol], [price], None if high is None else [high], None if low is None else [low], [volume])
         else:
-            out["momentum_8"] = 0.0
-        return out
+            self.evaluator.update(price, high, low, volume)
+
+    def features(self) -> Dict[str, float]:
+        if self.hub is not None:
+            return self.hub.values(self.symbol, self.names)
+        return self.evaluator.values()
+
+    def cost_report(self):
+        return self.hub.cost_report() if self.hub is not None else self.plan.cost_report()
@@ -0,0 +1,88 @@
+"""Micro-batching front end for ModelManager.predict_proba.
+
+Concurrent callers (e.g. the agent's partition workers) each submit one feature row; rows are
+stacked and scored with a single predict_proba once ``max_batch`` rows are pending or
+``max_wait_ms`` has passed since the first one, whichever comes first. ``max_wait_ms=0`` flushes
+on the next event-loop iteration: it only batches requests that are already queued, so it adds
+almost no latency. Larger windows trade per-tick latency for fewer model calls. With an
+``executor`` (ai.inference_executor) the stacked batch is scored off the event loop.
+"""
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from ai.model_manager import ModelManager
+
+class InferenceBatcher:
+    def __init__(self, model_manager: ModelManager, max_batch: int = 256, max_wait_ms: float = 1.0, executor=None):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.model_manager = model_manager
+        self.executor = executor
+        self._tasks: set = set()
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._rows: List[Sequence[float]] = []
+        self._futures: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self.batches = 0
+        self.rows = 0
+        self.largest = 0
+
+    async def predict_proba(self, row: Sequence[float]) -> np.ndarray:
+        """Class probabilities for one feature row."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._rows.append(row)
+        self._futures.append(fut)
+        if len(self._rows) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self.flush) if self.max_wait_s > 0 else loop.call_soon(self.flush)
+        return await fut
+
+    def flush(self) -> None:
+        """Score every pending row now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, futures = self._rows, self._futures
+        if not rows:
+            return
+        self._rows, self._futures = [], []
+        self.batches += 1
+        self.rows += len(rows)
+        self.largest = max(self.largest, len(rows))
+        X = np.asarray(rows, dtype=float)
+        if self.executor is not None:
+            task = asyncio.get_running_loop().create_task(self._score_off_loop(X, futures))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        try:
+            probs = np.asarray(self.model_manager.predict_proba(X))
+        except Exception as e:
+            for f in futures:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        self._resolve(futures, probs)
+
+    async def _score_off_loop(self, X: np.ndarray, futures: List[asyncio.Future]) -> None:
+        try:
+            probs = await self.executor.predict_proba(X)
+        except Exception as e:
+            for f in futures:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        self._resolve(futures, probs)
+
+    def _resolve(self, futures: List[asyncio.Future], probs: np.ndarray) -> None:
+        for f, p in zip(futures, probs):
+            if not f.done():
+                f.set_result(p)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"batches": self.batches, "rows": self.rows, "largest": self.largest,
+                "mean_batch": self.rows / self.batches if self.batches else 0.0, "pending": len(self._rows)}
@@ -0,0 +1,299 @@
+"""Run ModelManager.predict_proba off the event loop.
+
+``ThreadInference`` suits models whose predict releases the GIL (numpy/sklearn kernels);
+``ProcessInference`` keeps a copy of the model in each worker process and passes feature rows
+through per-slot shared memory, for pure-Python models that would hold the GIL. Both bound the
+number of calls in flight to ``max_concurrency`` (a slot stays taken until its call really
+finishes, even after a timeout) and give every call ``timeout_ms`` end to end, including the
+wait for a slot. A call that times out or fails raises InferenceUnavailable: there is no score,
+so the decision path must not trade on the rows (a made-up neutral probability would still size
+and side an order).
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import multiprocessing
+import pickle
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ai.model_manager import ModelManager
+
+log = logging.getLogger(__name__)
+
+class InferenceUnavailable(RuntimeError):
+    """No score for the submitted rows: the call timed out or failed."""
+
+class _BoundedInference:
+    def __init__(self, max_concurrency: int, timeout_ms: float):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.max_concurrency = max_concurrency
+        self.timeout_s = timeout_ms / 1000.0
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._free: Optional[asyncio.Queue] = None
+
+    def _submit(self, slot: int, X: np.ndarray) -> Tuple[Future, float]:
+        """Start scoring ``X``; returns the future and any extra seconds this call may take."""
+        raise NotImplementedError
+
+    def _release(self, loop: asyncio.AbstractEventLoop, free: asyncio.Queue, slot: int) -> None:
+        try:
+            loop.call_soon_threadsafe(self._released, free, slot)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def _released(self, free: asyncio.Queue, slot: int) -> None:
+        """On the loop, once the call holding ``slot`` has really finished."""
+        free.put_nowait(slot)
+
+    async def predict_proba(self, X) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for slot in range(self.max_concurrency):
+                self._free.put_nowait(slot)
+        free = self._free
+        self.calls += 1
+        deadline = loop.time() + self.timeout_s
+        try:
+            slot = await asyncio.wait_for(free.get(), self.timeout_s)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise InferenceUnavailable(f"no inference slot within {self.timeout_s * 1000:g} ms") from None
+        try:
+            cf, grace_s = self._submit(slot, X)
+        except Exception as e:
+            free.put_nowait(slot)
+            self.errors += 1
+            log.exception("inference submit failed")
+            raise InferenceUnavailable("inference submit failed") from e
+        cf.add_done_callback(lambda _: self._release(loop, free, slot))
+        try:
+            return np.asarray(await asyncio.wait_for(asyncio.wrap_future(cf), max(deadline + grace_s - loop.time(), 0.0)), dtype=float)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise InferenceUnavailable(f"inference took longer than {self.timeout_s * 1000:g} ms") from None
+        except Exception as e:
+            self.errors += 1
+            log.exception("inference call failed")
+            raise InferenceUnavailable("inference call failed") from e
+
+    def stats(self) -> Dict[str, Any]:
+        in_flight = self.max_concurrency - self._free.qsize() if self._free is not None else 0
+        return {"calls": self.calls, "timeouts": self.timeouts, "errors": self.errors, "in_flight": in_flight}
+
+    def close(self) -> None:
+        pass
+
+class ThreadInference(_BoundedInference):
+    def __init__(self, model_manager: ModelManager, max_concurrency: int = 4, timeout_ms: float = 50.0,
+                 executor: Optional[Executor] = None):
+        super().__init__(max_concurrency, timeout_ms)
+        self.model_manager = model_manager
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="inference")
+
+    def _submit(self, slot: int, X: np.ndarray) -> Tuple[Future, float]:
+        return self.executor.submit(self.model_manager.predict_proba, X), 0.0
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# --- process workers ---------------------------------------------------------------------------
+
+_WORKER_MANAGER: Optional[ModelManager] = None
+_WORKER_MODEL = -1  # sequence number of the published model the worker has loaded
+_WORKER_SHM: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+_WORKER_MAX_SEGMENTS = 64
+
+def _worker_attach(name: str) -> shared_memory.SharedMemory:
+    shm = _WORKER_SHM.get(name)
+    if shm is None:
+        from core.ipc import _attach
+        shm = _WORKER_SHM[name] = _attach(name)
+        # segments replaced by the parent are never used again; a worker runs one call at a time
+        while len(_WORKER_SHM) > _WORKER_MAX_SEGMENTS:
+            try:
+                _WORKER_SHM.popitem(last=False)[1].close()
+            except BufferError:
+                pass
+    return shm
+
+def _worker_load(seq: int, blob: str) -> None:
+    global _WORKER_MANAGER, _WORKER_MODEL
+    from core.ipc import _attach
+    shm = _attach(blob)
+    try:
+        model, compiled = pickle.loads(shm.buf)
+    finally:
+        shm.close()
+    _WORKER_MANAGER = ModelManager(model)
+    _WORKER_MANAGER.compiled = compiled
+    _WORKER_MODEL = seq
+
+def _worker_ping(seq: int, blob: str) -> bool:
+    if seq != _WORKER_MODEL:
+        _worker_load(seq, blob)
+    return _WORKER_MANAGER is not None
+
+def _worker_predict(seq: int, blob: str, shm_name: Optional[str], shape: tuple, X: Optional[np.ndarray]) -> np.ndarray:
+    if seq != _WORKER_MODEL:
+        _worker_load(seq, blob)
+    if X is None:
+        X = np.ndarray(shape, dtype=np.float64, buffer=_worker_attach(shm_name).buf)
+    return np.asarray(_WORKER_MANAGER.predict_proba(X), dtype=float)
+
+def _publish_blob(model, compiled) -> shared_memory.SharedMemory:
+    payload = pickle.dumps((model, compiled), protocol=pickle.HIGHEST_PROTOCOL)
+    shm = shared_memory.SharedMemory(create=True, size=max(len(payload), 1))
+    shm.buf[:len(payload)] = payload
+    return shm
+
+class ProcessInference(_BoundedInference):
+    """One pool of worker processes for the executor's lifetime. The served model is pickled into
+    a shared-memory blob and every call names the blob it expects; a worker holding another
+    model reloads it in place before scoring. When ``model_manager`` is hot-swapped, the new
+    model is pickled on a background thread while calls keep being served by the previous one,
+    then calls switch over: a swap never respawns the pool or blocks the event loop.
+
+    The first call of each worker after a switch also unpickles the model, and starting the pool
+    (a spawn plus imports and model load) takes far longer than ``timeout_ms``, so those calls get
+    ``startup_timeout_ms`` on top; calls racing them may still time out. ``start()`` builds the
+    pool ahead of the first tick.
+
+    Each slot's shared-memory buffer is reallocated only when a call needs more room than it has,
+    by the call that holds the slot; a superseded model blob is unlinked once no call in flight
+    names it."""
+
+    def __init__(self, model_manager: ModelManager, workers: int = 2, max_concurrency: Optional[int] = None,
+                 timeout_ms: float = 50.0, max_rows: int = 256, mp_context: str = "spawn",
+                 startup_timeout_ms: float = 30000.0):
+        super().__init__(max_concurrency or workers, timeout_ms)
+        self.startup_timeout_s = startup_timeout_ms / 1000.0
+        self.model_manager = model_manager
+        self.workers = workers
+        self.max_rows = max_rows
+        self.ctx = multiprocessing.get_context(mp_context)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._served: Optional[tuple] = None
+        self._seq = -1
+        self._blobs: Dict[int, shared_memory.SharedMemory] = {}
+        self._publishing: Optional[Tuple[tuple, Future]] = None
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference-model")
+        self._fresh = 0  # calls left that may pay a worker's model load
+        self._slots: List[Optional[shared_memory.SharedMemory]] = [None] * self.max_concurrency
+        self._in_flight: List[Optional[int]] = [None] * self.max_concurrency  # model seq per busy slot
+        self.reloads = 0
+
+    def _served_key(self) -> tuple:
+        mm = self.model_manager
+        return (id(mm.model), id(mm.compiled), mm.version)
+
+    def _install(self, served: tuple, blob: shared_memory.SharedMemory) -> None:
+        self._seq += 1
+        self._blobs[self._seq] = blob
+        self._served = served
+        self._fresh = self.workers
+        self._collect()
+
+    def _ensure_model(self) -> None:
+        """Start publishing a swapped-in model in the background, and switch to it once ready."""
+        if self._publishing is not None:
+            served, fut = self._publishing
+            if not fut.done():
+                return
+            self._publishing = None
+            try:
+                self._install(served, fut.result())
+                self.reloads += 1
+            except Exception:
+                self._served = served  # keep serving the previous model rather than retry every call
+                log.exception("could not publish the swapped model to the inference workers")
+            return
+        served = self._served_key()
+        if served != self._served:
+            mm = self.model_manager
+            self._publishing = (served, self._loader.submit(_publish_blob, mm.model, mm.compiled))
+
+    def _ensure_pool(self) -> Tuple[ProcessPoolExecutor, bool]:
+        """The pool, and whether it was built just now (only ever on first use)."""
+        if self._pool is not None:
+            self._ensure_model()
+            return self._pool, False
+        mm = self.model_manager
+        self._install(self._served_key(), _publish_blob(mm.model, mm.compiled))
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=self.ctx)
+        return self._pool, True
+
+    def start(self) -> None:
+        """Build the pool and wait until every worker has loaded the model (blocking)."""
+        pool, _ = self._ensure_pool()
+        blob = self._blobs[self._seq].name
+        for f in [pool.submit(_worker_ping, self._seq, blob) for _ in range(self.workers)]:
+            f.result(self.startup_timeout_s)
+        self._fresh = 0
+
+    def _slot_buffer(self, slot: int, X: np.ndarray) -> shared_memory.SharedMemory:
+        shm = self._slots[slot]
+        if shm is None or shm.size < X.nbytes:
+            # this call holds the slot, so the previous call on it has finished with the buffer
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = self._slots[slot] = shared_memory.SharedMemory(create=True, size=max(self.max_rows * X.shape[1] * 8, 8))
+        return shm
+
+    def _submit(self, slot: int, X: np.ndarray) -> Tuple[Future, float]:
+        pool, fresh = self._ensure_pool()
+        grace_s = self.startup_timeout_s if fresh or self._fresh > 0 else 0.0
+        self._fresh = max(self._fresh - 1, 0)
+        seq, blob = self._seq, self._blobs[self._seq].name
+        if X.shape[0] > self.max_rows:
+            fut = pool.submit(_worker_predict, seq, blob, None, X.shape, X)
+        else:
+            shm = self._slot_buffer(slot, X)
+            np.ndarray(X.shape, dtype=np.float64, buffer=shm.buf)[:] = X
+            fut = pool.submit(_worker_predict, seq, blob, shm.name, X.shape, None)
+        self._in_flight[slot] = seq
+        return fut, grace_s
+
+    def _released(self, free: asyncio.Queue, slot: int) -> None:
+        self._in_flight[slot] = None
+        self._collect()
+        super()._released(free, slot)
+
+    def _collect(self) -> None:
+        """Unlink model blobs that are neither current nor named by a call in flight."""
+        for seq in [s for s in self._blobs if s != self._seq and s not in self._in_flight]:
+            blob = self._blobs.pop(seq)
+            blob.close()
+            blob.unlink()
+
+    def _free_slots(self) -> None:
+        for shm in self._slots:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._slots = [None] * self.max_concurrency
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self._loader.shutdown(wait=True)
+        blobs = list(self._blobs.values())
+        if self._publishing is not None and self._publishing[1].exception() is None:
+            blobs.append(self._publishing[1].result())
+        self._publishing = None
+        for blob in blobs:
+            blob.close()
+            blob.unlink()
+        self._blobs = {}
+        self._free_slots()
@@ -1,4 +1,7 @@
 from __future__ import annotations
+import asyncio
+import json
+import urllib.request
 from typing import Protocol, runtime_checkable
 
 @runtime_checkable
@@ -15,18 +18,45 @@ class RuleBasedExplainer:
         return "No strong textual explanation could be inferred from the prompt."
 
 class OpenAIAdapter:
-    def __init__(self, client=None):
+    def __init__(self, client=None, model: str = "gpt-4o-mini"):
         self.client = client
+        self.model = model
 
     async def explain(self, prompt: str, max_tokens: int = 256) -> str:
-        try:
-            import openai
-        except Exception as e:
-            raise RuntimeError("OpenAI SDK not available — install openai or use RuleBasedExplainer")
-        resp = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
+        if self.client is None:
+            try:
+                import openai
+            except Exception as e:
+                raise RuntimeError("OpenAI SDK not available — install openai or use RuleBasedExplainer")
+            self.client = openai.OpenAI()
+        # the SDK call is blocking; keep it off the event loop
+        resp = await asyncio.to_thread(
+            self.client.chat.completions.create,
+            model=self.model,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=max_tokens,
             temperature=0.1,
         )
         return resp.choices[0].message.content
+
+class HTTPChatAdapter:
+    """Any OpenAI-compatible ``/chat/completions`` endpoint (local servers, test stubs), no SDK needed."""
+
+    def __init__(self, base_url: str, model: str = "local", api_key: str | None = None, timeout_s: float = 30.0):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.timeout_s = timeout_s
+
+    def _post(self, prompt: str, max_tokens: int) -> str:
+        body = json.dumps({"model": self.model, "messages": [{"role": "user", "content": prompt}],
+                           "max_tokens": max_tokens, "temperature": 0.1}).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        req = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+            return json.load(resp)["choices"][0]["message"]["content"]
+
+    async def explain(self, prompt: str, max_tokens: int = 256) -> str:
+        return await asyncio.to_thread(self._post, prompt, max_tokens)
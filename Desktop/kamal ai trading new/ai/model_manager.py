@@ -1,20 +1,77 @@
 from __future__ import annotations
 from typing import Any
-import joblib, os
+import joblib, os, time
+import numpy as np
 
 class ModelManager:
     def __init__(self, model=None, model_path: str | None = None):
         self.model = model
         self.model_path = model_path
+        self.compiled = None
+        self.version: int | None = None
+        self.shadows = None
 
     def train(self, X, y):
         assert hasattr(self.model, "fit"), "model must implement fit"
         self.model.fit(X, y)
+        self.compiled = None
+
+    def compile(self, check_X=None, atol: float = 1e-9):
+        """Swap the hot path to a pure-numpy evaluator of the fitted model (see ai.compiled_models).
+        With ``check_X``, predictions are first compared against the model's own and a mismatch
+        beyond ``atol`` raises ValueError."""
+        from ai.compiled_models import compile_model
+        compiled = compile_model(self.model)
+        if check_X is not None:
+            self.compiled = None
+            expected = np.asarray(self._predict_proba(check_X), dtype=float)
+            got = compiled.predict_proba(check_X)
+            err = float(np.abs(got - expected).max()) if expected.size else 0.0
+            if err > atol:
+                raise ValueError(f"compiled {type(self.model).__name__} differs from the model by {err:.3g}")
+        self.compiled = compiled
+        return compiled
+
+    def swap(self, model, compiled=None, version: int | None = None) -> None:
+        """Replace the served model. Readers see either the old pair or the new one: the compiled
+        evaluator is cleared first, so in between they fall back to a consistent raw model."""
+        self.compiled = None
+        self.model = model
+        self.version = version
+        self.compiled = compiled
+
+    def add_shadow(self, name: str, model, sample_rate: float = 1.0) -> None:
+        """Score ``model`` on every live batch in the background (see ai.shadow); its output is
+        only compared with production, never returned."""
+        if self.shadows is None:
+            from ai.shadow import ShadowRunner
+            self.shadows = ShadowRunner()
+        self.shadows.add(name, model, sample_rate)
+
+    def remove_shadow(self, name: str) -> None:
+        if self.shadows is not None:
+            self.shadows.remove(name)
+
+    def shadow_report(self):
+        return self.shadows.snapshot() if self.shadows is not None else {}
 
     def predict_proba(self, X):
-        if hasattr(self.model, "predict_proba"):
-            return self.model.predict_proba(X)
-        preds = self.model.predict(X)
+        shadows = self.shadows
+        if shadows is None or not shadows.models:
+            return self._predict_proba(X)
+        t0 = time.perf_counter_ns()
+        out = self._predict_proba(X)
+        shadows.submit(X, out, time.perf_counter_ns() - t0)
+        return out
+
+    def _predict_proba(self, X):
+        compiled = self.compiled
+        if compiled is not None:
+            return compiled.predict_proba(X)
+        model = self.model
+        if hasattr(model, "predict_proba"):
+            return model.predict_proba(X)
+        preds = model.predict(X)
         return [[1 - p, p] for p in preds]
 
     def save(self, path: str | None = None):
@@ -29,4 +86,5 @@ class ModelManager:
         if not path or not os.path.exists(path):
             raise FileNotFoundError(f"Model not found: {path}")
         self.model = joblib.load(path)
+        self.compiled = None
         return self.model
@@ -0,0 +1,156 @@
+"""Versioned on-disk model registry.
+
+Layout: ``<root>/<name>/<version:06d>/`` holding ``meta.json``, ``model.joblib`` and, when the
+model can be compiled (ai.compiled_models), one ``compiled/<array>.npy`` per evaluator array.
+Versions are written to a temporary directory and renamed into place, and ``<root>/<name>/CURRENT``
+names the promoted version: only that one is served (``load``/``follow`` without a version), so a
+published version goes live only once someone promotes it. With ``keep``, each publish prunes all but the newest ``keep``
+versions (never the promoted one). Loading memory-maps the arrays (``mmap_mode="r"``), so worker
+processes serving the same version share one copy through the page cache.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import joblib
+import numpy as np
+from ai.compiled_models import EVALUATORS, compile_model
+from ai.model_manager import ModelManager
+
+log = logging.getLogger(__name__)
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ModelRegistry:
+    def __init__(self, root: str = "models/registry", keep: Optional[int] = None):
+        if keep is not None and keep < 1:
+            raise ValueError("keep must be >= 1")
+        self.root = root
+        self.keep = keep
+
+    def _dir(self, name: str, version: int) -> str:
+        return os.path.join(self.root, name, f"{version:06d}")
+
+    def versions(self, name: str) -> List[int]:
+        try:
+            entries = os.listdir(os.path.join(self.root, name))
+        except FileNotFoundError:
+            return []
+        return sorted(int(e) for e in entries if e.isdigit())
+
+    def current(self, name: str) -> Optional[int]:
+        """The promoted version, or None while none is."""
+        try:
+            with open(os.path.join(self.root, name, "CURRENT"), encoding="utf-8") as fh:
+                return int(fh.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, name: str, model: Any, metadata: Optional[Dict[str, Any]] = None, promote: bool = False,
+                compiled: Any = None) -> int:
+        """Store ``model`` as the next version of ``name`` and return that version. ``compiled`` is an
+        evaluator already built from ``model``; without it the model is compiled here."""
+        parent = os.path.join(self.root, name)
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        try:
+            joblib.dump(model, os.path.join(tmp, "model.joblib"))
+            if compiled is None:
+                try:
+                    compiled = compile_model(model)
+                except TypeError:
+                    pass
+            if compiled is not None:
+                os.mkdir(os.path.join(tmp, "compiled"))
+                for key, arr in compiled.arrays().items():
+                    np.save(os.path.join(tmp, "compiled", f"{key}.npy"), np.asarray(arr.tolist() if arr.dtype == object else arr))
+            while True:
+                version = (self.versions(name) or [0])[-1] + 1
+                meta = {"name": name, "version": version, "created_at": time.time(), "class": type(model).__name__,
+                        "compiled": compiled.kind if compiled is not None else None,
+                        "sha256": _sha256(os.path.join(tmp, "model.joblib")), "metadata": metadata or {}}
+                with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+                    json.dump(meta, fh, indent=2)
+                try:
+                    os.rename(tmp, self._dir(name, version))
+                    break
+                except OSError:
+                    if not os.path.isdir(self._dir(name, version)):
+                        raise  # a concurrent publisher took this version number otherwise
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if promote:
+            self.promote(name, version)
+        if self.keep is not None:
+            self.prune(name, self.keep)
+        return version
+
+    def prune(self, name: str, keep: int) -> List[int]:
+        """Delete all but the newest ``keep`` versions of ``name``, sparing the promoted one; returns
+        the versions removed. Processes still serving a removed version keep their mapped arrays."""
+        versions = self.versions(name)
+        promoted = self.current(name)
+        removed = [v for v in versions[:max(len(versions) - keep, 0)] if v != promoted]
+        for v in removed:
+            shutil.rmtree(self._dir(name, v), ignore_errors=True)
+        return removed
+
+    def promote(self, name: str, version: int) -> None:
+        if not os.path.isdir(self._dir(name, version)):
+            raise FileNotFoundError(f"{name} version {version} is not in {self.root}")
+        path = os.path.join(self.root, name, "CURRENT")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+            fh.write(str(version))
+        os.replace(f"{path}.tmp", path)
+
+    def metadata(self, name: str, version: Optional[int] = None) -> Dict[str, Any]:
+        version = self.current(name) if version is None else version
+        if version is None:
+            raise FileNotFoundError(f"no promoted version of {name} in {self.root}")
+        with open(os.path.join(self._dir(name, version), "meta.json"), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def load(self, name: str, version: Optional[int] = None, mmap: bool = True) -> Tuple[Any, Any, Dict[str, Any]]:
+        """(model, compiled evaluator or None, metadata) for ``version`` (default: the promoted one)."""
+        meta = self.metadata(name, version)
+        path = self._dir(name, meta["version"])
+        mode = "r" if mmap else None
+        model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode=mode)
+        compiled = None
+        if meta.get("compiled"):
+            folder = os.path.join(path, "compiled")
+            arrays = {f[:-4]: np.load(os.path.join(folder, f), mmap_mode=mode) for f in os.listdir(folder) if f.endswith(".npy")}
+            compiled = EVALUATORS[meta["compiled"]].from_arrays(arrays)
+        return model, compiled, meta
+
+    def load_into(self, manager: ModelManager, name: str, version: Optional[int] = None) -> int:
+        model, compiled, meta = self.load(name, version)
+        manager.swap(model, compiled, version=meta["version"])
+        return meta["version"]
+
+    async def follow(self, name: str, manager: ModelManager, interval_s: float = 5.0) -> None:
+        """Hot-swap ``manager`` to the promoted version of ``name`` whenever it changes (nothing is
+        served until a version is promoted). Loading runs in a thread; the swap itself is a few
+        reference assignments made between ticks."""
+        while True:
+            try:
+                version = self.current(name)
+                if version is not None and version != manager.version:
+                    model, compiled, meta = await asyncio.to_thread(self.load, name, version)
+                    manager.swap(model, compiled, version=meta["version"])
+                    log.info("model %s: now serving version %d", name, meta["version"])
+            except Exception:
+                log.exception("model %s: reload failed, keeping version %s", name, manager.version)
+            await asyncio.sleep(interval_s)
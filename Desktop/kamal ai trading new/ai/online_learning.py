@@ -0,0 +1,137 @@
+"""Incremental training from the live stream.
+
+``ForwardReturnLabeler`` holds each symbol's last ``horizon`` feature rows and, as later prices
+arrive, labels the row from ``horizon`` bars ago with whether the forward return since then
+beat ``threshold``. ``OnlineTrainer`` collects matured samples into micro-batches and, in a
+background worker, feeds them to a ``partial_fit`` estimator, then hot-swaps a copy into the
+live ModelManager. With a ModelRegistry, a version is published only every ``publish_every``
+updates or ``publish_interval_s`` seconds, whichever comes first; in between, the live model runs
+ahead of the registry under the last published version number. Published versions are
+candidates: other processes following the registry serve one only once it is promoted, which
+``promote=True`` does on every publish.
+"""
+from __future__ import annotations
+import asyncio
+import copy
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ai.compiled_models import compile_model
+from ai.model_manager import ModelManager
+from ai.model_registry import ModelRegistry
+
+log = logging.getLogger(__name__)
+
+class ForwardReturnLabeler:
+    def __init__(self, horizon: int = 5, threshold: float = 0.0):
+        if horizon < 1:
+            raise ValueError("horizon must be >= 1")
+        self.horizon = horizon
+        self.threshold = threshold
+        self._pending: Dict[str, Deque[Tuple[Sequence[float], float]]] = {}
+
+    def observe(self, symbol: str, features: Sequence[float], price: float) -> Optional[Tuple[Sequence[float], int]]:
+        """Record this bar's features; return the (features, label) sample that matured with it, if any."""
+        q = self._pending.get(symbol)
+        if q is None:
+            q = self._pending[symbol] = deque()
+        sample = None
+        if len(q) == self.horizon:
+            past, entry = q.popleft()
+            if entry > 0:
+                sample = (past, int(price / entry - 1.0 > self.threshold))
+        q.append((features, price))
+        return sample
+
+class OnlineTrainer:
+    def __init__(self, model_manager: ModelManager, estimator: Any, labeler: Optional[ForwardReturnLabeler] = None,
+                 batch_size: int = 256, classes: Sequence[int] = (0, 1), max_pending_batches: int = 8,
+                 registry: Optional[ModelRegistry] = None, name: Optional[str] = None,
+                 publish_every: Optional[int] = 20, publish_interval_s: Optional[float] = 300.0, promote: bool = False):
+        if not hasattr(estimator, "partial_fit"):
+            raise TypeError(f"{type(estimator).__name__} has no partial_fit")
+        self.model_manager = model_manager
+        self.estimator = estimator
+        self.labeler = labeler or ForwardReturnLabeler()
+        self.batch_size = batch_size
+        self.classes = np.asarray(classes)
+        self.registry = registry
+        self.name = name
+        self.publish_every = publish_every
+        self.publish_interval_s = publish_interval_s
+        self.promote = promote
+        self._rows: List[Sequence[float]] = []
+        self._labels: List[int] = []
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+        self.samples = 0
+        self.updates = 0
+        self.dropped_batches = 0
+        self._local_version = 0
+        self.published = 0
+        self._published_at: Optional[Tuple[int, float]] = None  # (updates, monotonic time)
+
+    def observe(self, symbol: str, features: Sequence[float], price: float) -> None:
+        """Called on the decision path for every scored bar; O(1) apart from the batch hand-off."""
+        sample = self.labeler.observe(symbol, features, price)
+        if sample is None:
+            return
+        self._rows.append(sample[0])
+        self._labels.append(sample[1])
+        if len(self._rows) >= self.batch_size:
+            batch = (np.asarray(self._rows, dtype=float), np.asarray(self._labels))
+            self._rows, self._labels = [], []
+            try:
+                self._queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                self.dropped_batches += 1
+
+    def update(self, X: np.ndarray, y: np.ndarray) -> Optional[int]:
+        """One partial_fit step and hot swap; returns the version now served."""
+        if self.updates == 0:
+            self.estimator.partial_fit(X, y, classes=self.classes)
+        else:
+            self.estimator.partial_fit(X, y)
+        self.updates += 1
+        self.samples += len(y)
+        model = copy.deepcopy(self.estimator)
+        try:
+            compiled = compile_model(model)
+        except TypeError:
+            compiled = None
+        if self.registry is not None and self.name:
+            version = self.model_manager.version
+            if self._publish_due():
+                version = self.registry.publish(self.name, model, {"online": True, "samples": self.samples,
+                                                                   "updates": self.updates},
+                                                promote=self.promote, compiled=compiled)
+                self.published += 1
+                self._published_at = (self.updates, time.monotonic())
+        else:
+            self._local_version += 1
+            version = self._local_version
+        self.model_manager.swap(model, compiled, version=version)
+        return version
+
+    def _publish_due(self) -> bool:
+        if self._published_at is None:
+            return True
+        updates, at = self._published_at
+        return ((self.publish_every is not None and self.updates - updates >= self.publish_every)
+                or (self.publish_interval_s is not None and time.monotonic() - at >= self.publish_interval_s))
+
+    async def run(self) -> None:
+        while True:
+            X, y = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.update, X, y)
+            except Exception:
+                log.exception("online update on %d samples failed", len(y))
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"samples": self.samples, "updates": self.updates, "buffered": len(self._rows),
+                "pending_batches": self._queue.qsize(), "dropped_batches": self.dropped_batches,
+                "published": self.published, "version": self.model_manager.version}
@@ -0,0 +1,49 @@
+from __future__ import annotations
+import hashlib
+import time
+from bisect import bisect
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+class HashRing:
+    """Consistent-hash ring mapping symbols to partitions; resizing moves only ~1/n of the symbols."""
+
+    def __init__(self, partitions: int, vnodes: int = 64):
+        if partitions < 1:
+            raise ValueError("partitions must be >= 1")
+        self.partitions = partitions
+        points = sorted((_hash(f"{p}:{v}"), p) for p in range(partitions) for v in range(vnodes))
+        self._points = [h for h, _ in points]
+        self._owners = [p for _, p in points]
+        self._cache: Dict[str, int] = {}
+
+    def partition(self, key: str) -> int:
+        p = self._cache.get(key)
+        if p is None:
+            i = bisect(self._points, _hash(key)) % len(self._points)
+            p = self._cache[key] = self._owners[i]
+        return p
+
+@dataclass
+class PartitionStats:
+    index: int
+    depth: int = 0
+    processed: int = 0
+    errors: int = 0
+    coalesced: int = 0
+    busy_s: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {"partition": self.index, "depth": self.depth, "processed": self.processed, "errors": self.errors,
+                "coalesced": self.coalesced, "ticks_per_sec": self.processed / elapsed, "utilization": self.busy_s / elapsed}
+
+def symbols_by_partition(ring: HashRing, symbols: List[str]) -> Dict[int, List[str]]:
+    out: Dict[int, List[str]] = {p: [] for p in range(ring.partitions)}
+    for s in symbols:
+        out[ring.partition(s)].append(s)
+    return out
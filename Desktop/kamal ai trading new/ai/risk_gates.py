@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Dict
+from typing import Dict, List, Optional
 from dataclasses import dataclass
+import numpy as np
 
 class RiskError(Exception):
     pass
@@ -14,11 +15,38 @@ class AccountSnapshot:
     max_total_exposure: float
     daily_loss: float
     max_daily_loss: float
+    realized_pnl: float = 0.0
+    unrealized_pnl: float = 0.0
+
+PER_TRADE_CAP = "pretrade: exceed per-trade risk cap"
+TOTAL_EXPOSURE = "pretrade: total exposure breach"
+DAILY_LOSS = "pretrade: daily loss breached"
 
 def gate_pretrade(account: AccountSnapshot, notional: float) -> None:
     if notional > account.capital * account.max_risk_per_trade:
-        raise RiskError("pretrade: exceed per-trade risk cap")
+        raise RiskError(PER_TRADE_CAP)
     if (account.exposure + notional) > account.max_total_exposure:
-        raise RiskError("pretrade: total exposure breach")
+        raise RiskError(TOTAL_EXPOSURE)
     if account.daily_loss > account.max_daily_loss:
-        raise RiskError("pretrade: daily loss breached")
+        raise RiskError(DAILY_LOSS)
+
+def gate_pretrade_batch(account: AccountSnapshot, notionals, cumulative: bool = False) -> List[Optional[str]]:
+    """gate_pretrade over an array of candidate notionals: the first violated rule per entry, or
+    None where it passes. Entries are independent unless ``cumulative``: then each passing entry
+    adds to the exposure seen by the later ones, as if every order were booked when accepted."""
+    notionals = np.asarray(notionals, dtype=float)
+    reasons = np.select([notionals > account.capital * account.max_risk_per_trade,
+                         (account.exposure + notionals) > account.max_total_exposure,
+                         np.full(notionals.shape, account.daily_loss > account.max_daily_loss)],
+                        [PER_TRADE_CAP, TOTAL_EXPOSURE, DAILY_LOSS], default="")
+    out = [r or None for r in reasons.tolist()]
+    if cumulative:
+        exposure = account.exposure
+        for i, (n, r) in enumerate(zip(notionals.tolist(), out)):
+            if r is not None or n != n:
+                continue
+            if exposure + n > account.max_total_exposure:
+                out[i] = TOTAL_EXPOSURE
+            else:
+                exposure += n
+    return out
@@ -0,0 +1,107 @@
+"""Shadow scoring of candidate models on live feature batches.
+
+The production model's batch and probabilities are handed to a single background thread, which
+scores every registered shadow on the same rows and records per-model latency and divergence
+from production (mean/max |dp| on the positive class, and BUY/SELL flips at 0.5). Shadow output
+never leaves this module. When the backlog exceeds ``max_pending`` batches, new work is dropped
+and counted instead of queueing behind the live path.
+"""
+from __future__ import annotations
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import numpy as np
+from core.latency import LatencyHistogram
+
+log = logging.getLogger(__name__)
+
+def positive_proba(model: Any, X) -> np.ndarray:
+    """P(class 1) per row, with ModelManager's fallback for models without predict_proba."""
+    if hasattr(model, "predict_proba"):
+        return np.asarray(model.predict_proba(X), dtype=float)[:, 1]
+    return np.asarray(model.predict(X), dtype=float)
+
+@dataclass
+class ShadowStats:
+    name: str
+    sample_rate: float = 1.0
+    batches: int = 0
+    rows: int = 0
+    errors: int = 0
+    abs_diff_sum: float = 0.0
+    max_abs_diff: float = 0.0
+    flips: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def as_dict(self) -> Dict[str, float]:
+        n = max(self.rows, 1)
+        return {"model": self.name, "batches": self.batches, "rows": self.rows, "errors": self.errors,
+                "mean_abs_diff": self.abs_diff_sum / n, "max_abs_diff": self.max_abs_diff, "flip_rate": self.flips / n,
+                "p50_ms": self.latency.percentile(0.5) / 1e6, "p99_ms": self.latency.percentile(0.99) / 1e6}
+
+class ShadowRunner:
+    def __init__(self, executor: Optional[Executor] = None, max_pending: int = 64):
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self.max_pending = max_pending
+        self.models: Dict[str, Any] = {}
+        self.stats: Dict[str, ShadowStats] = {}
+        self.primary_latency = LatencyHistogram()
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, model: Any, sample_rate: float = 1.0) -> None:
+        self.stats[name] = ShadowStats(name, sample_rate)
+        self.models = {**self.models, name: model}
+
+    def remove(self, name: str) -> None:
+        self.models = {k: v for k, v in self.models.items() if k != name}
+
+    def submit(self, X, primary: np.ndarray, primary_ns: int) -> None:
+        """Queue one scored batch for shadow evaluation. Never blocks the caller."""
+        self.primary_latency.record(primary_ns)
+        models = [(n, m) for n, m in self.models.items() if random.random() < self.stats[n].sample_rate]
+        if not models:
+            return
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending += 1
+        X = np.array(X, dtype=float)
+        self.executor.submit(self._score, models, X, np.array(primary, dtype=float)[:, 1])
+
+    def _score(self, models: List[tuple], X: np.ndarray, primary: np.ndarray) -> None:
+        try:
+            for name, model in models:
+                st = self.stats[name]
+                t0 = time.perf_counter_ns()
+                try:
+                    p = positive_proba(model, X)
+                except Exception:
+                    st.errors += 1
+                    log.exception("shadow model %s failed", name)
+                    continue
+                st.latency.record(time.perf_counter_ns() - t0)
+                diff = np.abs(p - primary)
+                st.batches += 1
+                st.rows += len(p)
+                st.abs_diff_sum += float(diff.sum())
+                st.max_abs_diff = max(st.max_abs_diff, float(diff.max(initial=0.0)))
+                st.flips += int(((p > 0.5) != (primary > 0.5)).sum())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        h = self.primary_latency
+        return {"primary": {"calls": h.count, "p50_ms": h.percentile(0.5) / 1e6, "p99_ms": h.percentile(0.99) / 1e6},
+                "dropped": self.dropped, "pending": self._pending,
+                "shadows": [self.stats[n].as_dict() for n in self.models]}
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
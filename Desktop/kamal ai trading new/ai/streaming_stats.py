@@ -0,0 +1,114 @@
+"""O(1)-per-update streaming statistics used by the feature store.
+
+Windowed sums are kept as a running total of ``new - evicted`` deltas on shift-centred
+values. Every ``size`` pushes the window re-centres on its newest value and recomputes the
+sums from the buffer, so rounding error from the running updates never outlives one window
+and the variance does not suffer cancellation as prices wander from the shift (amortized
+O(1)). The schedule is deterministic, which lets a vectorized batch pass replay the exact
+same arithmetic with cumulative sums (ai.feature_graph).
+"""
+from __future__ import annotations
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+class RollingWindow:
+    __slots__ = ("size", "buf", "shift", "s", "sq", "_i", "_min", "_max", "track_minmax")
+
+    def __init__(self, size: int, track_minmax: bool = False):
+        if size < 1:
+            raise ValueError("window size must be >= 1")
+        self.size = size
+        self.buf: Deque[float] = deque(maxlen=size)
+        self.shift: Optional[float] = None
+        self.s = 0.0
+        self.sq = 0.0
+        self._i = 0
+        self.track_minmax = track_minmax
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+
+    def push(self, x: float) -> None:
+        if self.shift is None:
+            self.shift = x
+        d = x - self.shift
+        if len(self.buf) == self.size:
+            od = self.buf[0] - self.shift
+            self.s += d - od
+            self.sq += d * d - od * od
+        else:
+            self.s += d
+            self.sq += d * d
+        self.buf.append(x)
+        if self.track_minmax:
+            i = self._i
+            while self._min and self._min[-1][1] >= x:
+                self._min.pop()
+            self._min.append((i, x))
+            while self._max and self._max[-1][1] <= x:
+                self._max.pop()
+            self._max.append((i, x))
+            expired = i - self.size
+            if self._min[0][0] <= expired:
+                self._min.popleft()
+            if self._max[0][0] <= expired:
+                self._max.popleft()
+        self._i += 1
+        if self._i % self.size == 0:
+            self._recentre()
+
+    def _recentre(self) -> None:
+        shift = self.buf[-1]
+        s = sq = 0.0
+        for v in self.buf:
+            dv = v - shift
+            s += dv
+            sq += dv * dv
+        self.shift, self.s, self.sq = shift, s, sq
+
+    def __len__(self) -> int:
+        return len(self.buf)
+
+    @property
+    def last(self) -> float:
+        return self.buf[-1]
+
+    @property
+    def mean(self) -> float:
+        n = len(self.buf)
+        return self.shift + self.s / n if n else 0.0
+
+    @property
+    def var(self) -> float:
+        """Population variance of the window."""
+        n = len(self.buf)
+        if n == 0:
+            return 0.0
+        m = self.s / n
+        return max(self.sq / n - m * m, 0.0)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1] if self._min else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1] if self._max else 0.0
+
+class EMA:
+    __slots__ = ("alpha", "value", "ready")
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1)
+        self.value = 0.0
+        self.ready = False
+
+    def push(self, x: float) -> None:
+        if self.ready:
+            self.value += self.alpha * (x - self.value)
+        else:
+            self.value, self.ready = x, True
@@ -0,0 +1,190 @@
+"""Per-symbol rolling features for a whole universe in one set of numpy arrays.
+
+Each symbol owns a row of a (symbols x max_window) price ring buffer plus per-window running
+sums and shifts, updated with the same shifted add/remove deltas and the same every-``w``-pushes
+re-centring as ai.streaming_stats.RollingWindow, so a row's features equal those of a
+RollingFeatureComputer fed only that symbol's prices.
+
+``snapshot``/``restore`` persist the whole state to one memory-mapped file (fixed header, JSON
+layout, 64-byte aligned arrays) so a restarted engine resumes with full windows.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"KFSN"
+SNAPSHOT_VERSION = 2  # 2: one shift per window
+_HEADER = struct.Struct("<4sII")
+_STATE = ("buf", "sums", "shift", "count", "pos")
+
+def _align(n: int) -> int:
+    return (n + 63) & ~63
+
+def _waves(rows: np.ndarray) -> List[np.ndarray]:
+    """Split entry indices into waves holding each row at most once, k-th occurrences in wave k."""
+    if len(np.unique(rows)) == len(rows):
+        return [np.arange(len(rows))]
+    order = np.argsort(rows, kind="stable")
+    starts = np.r_[0, np.flatnonzero(np.diff(rows[order])) + 1]
+    occurrence = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    return [order[occurrence == k] for k in range(occurrence.max() + 1)]
+
+class VectorFeatureStore:
+    def __init__(self, window_sizes: Sequence[int] = (3, 8, 21), capacity: int = 256):
+        self.window_sizes = list(window_sizes)
+        self.width = max(self.window_sizes)
+        self.feature_names: List[str] = [f"ma_{w}" for w in self.window_sizes] + ["momentum_8"]
+        self.rows: Dict[str, int] = {}
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int) -> None:
+        k = len(self.window_sizes)
+        self.buf = np.zeros((capacity, self.width))
+        self.sums = np.zeros((capacity, k))
+        self.shift = np.zeros((capacity, k))
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.pos = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self, capacity: int) -> None:
+        old = tuple(getattr(self, name) for name in _STATE)
+        n = len(old[2])
+        self._alloc(capacity)
+        for new, prev in zip((getattr(self, name) for name in _STATE), old):
+            new[:n] = prev
+
+    def row(self, symbol: str) -> int:
+        r = self.rows.get(symbol)
+        if r is None:
+            r = self.rows[symbol] = len(self.rows)
+            if r >= len(self.shift):
+                self._grow(2 * len(self.shift))
+        return r
+
+    def update(self, symbols: Sequence[str], prices) -> np.ndarray:
+        """Apply one price per entry; repeated symbols are applied in order. Returns the row of each entry."""
+        rows = np.fromiter((self.row(s) for s in symbols), dtype=np.int64, count=len(symbols))
+        prices = np.asarray(prices, dtype=float)
+        for idx in _waves(rows):
+            self._apply(rows[idx], prices[idx])
+        return rows
+
+    def update_features(self, symbols: Sequence[str], prices) -> np.ndarray:
+        """Like update, but returns each entry's feature row as of its own update (what a per-tick loop
+        calling update + features would have seen)."""
+        rows = np.fromiter((self.row(s) for s in symbols), dtype=np.int64, count=len(symbols))
+        prices = np.asarray(prices, dtype=float)
+        out = np.empty((len(rows), len(self.feature_names)))
+        for idx in _waves(rows):
+            self._apply(rows[idx], prices[idx])
+            out[idx] = self.matrix(rows[idx])
+        return out
+
+    def _apply(self, rows: np.ndarray, prices: np.ndarray) -> None:
+        pos, count = self.pos[rows], self.count[rows]
+        first = count == 0
+        self.shift[rows[first]] = prices[first, None]
+        for j, w in enumerate(self.window_sizes):
+            shift = self.shift[rows, j]
+            full = count >= w
+            old = self.buf[rows, (pos - w) % self.width]
+            od = np.where(full, old - shift, 0.0)
+            self.sums[rows, j] += (prices - shift) - od
+        self.buf[rows, pos] = prices
+        self.pos[rows] = (pos + 1) % self.width
+        self.count[rows] = count + 1
+        for j, w in enumerate(self.window_sizes):
+            due = (count + 1) % w == 0
+            if due.any():
+                self._recentre(rows[due], j, w)
+
+    def _recentre(self, rows: np.ndarray, j: int, w: int) -> None:
+        """Re-centre window ``j`` of ``rows`` on their newest price and recompute its sum from the buffer."""
+        cols = (self.pos[rows, None] - w + np.arange(w)) % self.width  # oldest .. newest
+        vals = self.buf[rows[:, None], cols]
+        shift = vals[:, -1]
+        self.sums[rows, j] = np.cumsum(vals - shift[:, None], axis=1)[:, -1]
+        self.shift[rows, j] = shift
+
+    def matrix(self, rows=None) -> np.ndarray:
+        """Dense (len(rows) x len(feature_names)) feature matrix, ready for a batched predict_proba."""
+        if rows is None:
+            rows = np.arange(len(self.rows))
+        rows = np.asarray(rows, dtype=np.int64)
+        n = np.minimum(self.count[rows, None], np.array(self.window_sizes))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ma = np.where(n > 0, self.shift[rows] + self.sums[rows] / n, 0.0)
+        last = self.buf[rows, (self.pos[rows] - 1) % self.width]
+        if 8 in self.window_sizes:
+            momentum = last - ma[:, self.window_sizes.index(8)]
+        else:
+            momentum = np.zeros(len(rows))
+        momentum = np.where(self.count[rows] > 0, momentum, 0.0)
+        return np.column_stack([ma, momentum])
+
+    def features(self, symbol: str) -> Dict[str, float]:
+        r = self.rows.get(symbol)
+        if r is None:
+            return {name: 0.0 for name in self.feature_names}
+        return dict(zip(self.feature_names, self.matrix([r])[0].tolist()))
+
+    def snapshot(self, path: str) -> int:
+        """Write the state of every known symbol to ``path`` atomically. Returns the file size."""
+        n = len(self.rows)
+        arrays = [(name, getattr(self, name)[:n]) for name in _STATE]
+        layout, offset = [], 0
+        for name, a in arrays:
+            layout.append({"name": name, "dtype": a.dtype.str, "shape": list(a.shape), "offset": offset})
+            offset = _align(offset + a.nbytes)
+        meta = json.dumps({"window_sizes": self.window_sizes, "symbols": list(self.rows),
+                           "saved_at": time.time(), "arrays": layout}).encode()
+        base = _align(_HEADER.size + len(meta))
+        size = base + offset
+        tmp = f"{path}.tmp"
+        mm = np.memmap(tmp, dtype=np.uint8, mode="w+", shape=(size,))
+        try:
+            mm[:_HEADER.size] = np.frombuffer(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta)), np.uint8)
+            mm[_HEADER.size:_HEADER.size + len(meta)] = np.frombuffer(meta, np.uint8)
+            for (_, a), spec in zip(arrays, layout):
+                start = base + spec["offset"]
+                mm[start:start + a.nbytes] = np.ascontiguousarray(a).view(np.uint8).reshape(-1)
+            mm.flush()
+        finally:
+            del mm
+        os.replace(tmp, path)
+        return size
+
+    @classmethod
+    def restore(cls, path: str, max_age_s: Optional[float] = None) -> Optional["VectorFeatureStore"]:
+        """Load a snapshot written by ``snapshot``. Returns None when the file is missing, older than
+        ``max_age_s``, or unreadable (truncated, corrupt or another SNAPSHOT_VERSION): the caller
+        then cold-starts with empty windows."""
+        try:
+            mm = np.memmap(path, dtype=np.uint8, mode="r")
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, meta_len = _HEADER.unpack(mm[:_HEADER.size].tobytes())
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"not a version {SNAPSHOT_VERSION} feature snapshot (magic={magic!r}, version={version})")
+            meta = json.loads(mm[_HEADER.size:_HEADER.size + meta_len].tobytes())
+            if max_age_s is not None and time.time() - meta["saved_at"] > max_age_s:
+                return None
+            symbols = meta["symbols"]
+            store = cls(meta["window_sizes"], capacity=max(256, 1 << max(len(symbols) - 1, 0).bit_length()))
+            store.rows = {s: i for i, s in enumerate(symbols)}
+            base = _align(_HEADER.size + meta_len)
+            for spec in meta["arrays"]:
+                dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+                view = np.ndarray(shape, dtype=dtype, buffer=mm, offset=base + spec["offset"])
+                getattr(store, spec["name"])[:len(symbols)] = view
+        except (struct.error, ValueError, TypeError, KeyError, AttributeError) as e:
+            log.warning("ignoring unreadable feature snapshot %s: %s", path, e)
+            return None
+        return store
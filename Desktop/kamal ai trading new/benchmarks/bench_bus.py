@@ -0,0 +1,43 @@
+"""Tick throughput through the event bus: per-item create_task publishing vs the task-free batched path.
+
+Run from the project root: python -m benchmarks.bench_bus [n_ticks]
+"""
+from __future__ import annotations
+import asyncio
+import sys
+import time
+from datetime import datetime
+from core.bus import EventBus
+from core.events import MarketBar
+
+async def _per_task(bus: EventBus, bars) -> None:
+    q = bus.topic("ticks")
+    for bar in bars:
+        asyncio.create_task(bus.publish("ticks", bar))
+    seen = 0
+    while seen < len(bars):
+        await q.get()
+        q.task_done()
+        seen += 1
+
+async def _batched(bus: EventBus, bars) -> None:
+    q = bus.subscribe("ticks")
+    for bar in bars:
+        bus.publish_nowait("ticks", bar)
+    seen = 0
+    while seen < len(bars):
+        batch = await q.get_batch(256)
+        q.batch_done(len(batch))
+        seen += len(batch)
+
+def run(n: int = 200_000) -> None:
+    ts = datetime(2024, 1, 1)
+    bars = [MarketBar("NIFTY", ts, 1.0, 1.0, 1.0, float(i), 1.0) for i in range(n)]
+    for name, fn in (("create_task per tick", _per_task), ("publish_nowait + get_batch", _batched)):
+        t0 = time.perf_counter()
+        asyncio.run(fn(EventBus(), bars))
+        dt = time.perf_counter() - t0
+        print(f"{name:28s} {n / dt:>12,.0f} ticks/sec")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
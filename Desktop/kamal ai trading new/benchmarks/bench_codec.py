@@ -0,0 +1,36 @@
+"""Binary event codec vs pickle on MarketBar lists and columnar batches.
+
+Run from the project root: python -m benchmarks.bench_codec [n_events]
+"""
+from __future__ import annotations
+import pickle
+import sys
+import time
+from datetime import datetime, timedelta
+from core.batch import MarketBarBatch
+from core.codec import decode_bar_batch, decode_events, encode_bar_batch, encode_events
+from core.events import MarketBar
+
+def _time(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+def run(n: int = 1_000_000) -> None:
+    t0 = datetime(2024, 1, 1, 9, 15)
+    symbols = ["NIFTY", "BANKNIFTY", "FINNIFTY", "RELIANCE"]
+    bars = [MarketBar(symbols[i % 4], t0 + timedelta(microseconds=i), 1.0, 2.0, 0.5, float(i), 10.0) for i in range(n)]
+    batch = MarketBarBatch.from_bars(bars)
+    rows = [
+        ("pickle list[MarketBar]", lambda: pickle.dumps(bars, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ("codec list[MarketBar]", lambda: encode_events(bars), decode_events),
+        ("codec MarketBarBatch", lambda: encode_bar_batch(batch), decode_bar_batch),
+    ]
+    print(f"{n:,} bars")
+    for name, enc, dec in rows:
+        data, t_enc = _time(enc)
+        _, t_dec = _time(dec, data)
+        print(f"{name:24s} encode {t_enc * 1e3:8.1f} ms  decode {t_dec * 1e3:8.1f} ms  size {len(data) / 1e6:7.1f} MB")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,54 @@
+"""Model-call throughput and per-request latency: one predict_proba per tick vs the InferenceBatcher.
+
+Each symbol is an independent coroutine scoring ``rounds`` ticks in order, as the agent's
+partition workers would. Run from the project root: python -m benchmarks.bench_inference [rounds]
+"""
+from __future__ import annotations
+import asyncio
+import sys
+import time
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from ai.inference_batcher import InferenceBatcher
+from ai.model_manager import ModelManager
+
+def _model() -> ModelManager:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 4))
+    return ModelManager(LogisticRegression().fit(X, X[:, 3] > 0))
+
+async def _symbol(score, rounds: int, lat: list) -> None:
+    row = [100.0, 100.5, 101.0, 0.3]
+    for _ in range(rounds):
+        t0 = time.perf_counter_ns()
+        await score(row)
+        lat.append(time.perf_counter_ns() - t0)
+
+async def _run(score, symbols: int, rounds: int, lat: list) -> None:
+    await asyncio.gather(*(_symbol(score, rounds, lat) for _ in range(symbols)))
+
+def run(rounds: int = 20) -> None:
+    mm = _model()
+
+    async def direct(row):
+        return mm.predict_proba([row])[0]
+
+    print(f"{'symbols':>7} {'mode':18} {'rows/sec':>12} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>10}")
+    for symbols in (1, 100, 2000):
+        modes = [("direct", lambda: (direct, None))]
+        for window in (0.0, 1.0):
+            for max_batch in (256, 2048):
+                modes.append((f"batch {window:g}ms/{max_batch}",
+                              lambda w=window, b=max_batch: (lambda bt: (bt.predict_proba, bt))(InferenceBatcher(mm, b, w))))
+        for name, make in modes:
+            score, batcher = make()
+            lat: list = []
+            t0 = time.perf_counter()
+            asyncio.run(_run(score, symbols, rounds, lat))
+            dt = time.perf_counter() - t0
+            p50, p99 = np.percentile(lat, [50, 99]) / 1e6
+            mean_batch = batcher.stats()["mean_batch"] if batcher else 1.0
+            print(f"{symbols:>7} {name:18} {len(lat) / dt:>12,.0f} {p50:>8.3f} {p99:>8.3f} {mean_batch:>10.1f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,38 @@
+"""Per-order cost of the compiled pre-trade rule engine vs gate_pretrade called per order.
+
+Run from the project root: python -m benchmarks.bench_risk_rules [repeats]
+"""
+from __future__ import annotations
+import sys
+import time
+import numpy as np
+from ai.risk_gates import AccountSnapshot, RiskError, gate_pretrade
+from risk_management.rule_engine import RuleEngine
+
+def run(repeats: int = 200) -> None:
+    acct = AccountSnapshot(capital=1_000_000, exposure=200_000.0, per_symbol_exposure={f"S{i}": 1.0 for i in range(3)},
+                           max_risk_per_trade=0.02, max_total_exposure=500_000, daily_loss=0.0, max_daily_loss=20_000)
+    engine = RuleEngine.load()
+    rng = np.random.default_rng(0)
+    print(f"{'orders':>7} {'engine us/order':>16} {'gate_pretrade us/order':>23} {'rules':>6}")
+    for n in (10, 100, 500, 2000):
+        notionals = rng.uniform(0, 30_000, n)
+        lots = rng.integers(1, 15, n)
+        stops = rng.random(n) > 0.1
+        symbols = [f"S{i % 7}" for i in range(n)]
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            engine.evaluate(acct, notionals, lots, stops, symbols)
+        engine_us = (time.perf_counter() - t0) / repeats / n * 1e6
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            for x in notionals.tolist():
+                try:
+                    gate_pretrade(acct, x)
+                except RiskError:
+                    pass
+        gate_us = (time.perf_counter() - t0) / repeats / n * 1e6
+        print(f"{n:>7} {engine_us:>16.3f} {gate_us:>23.3f} {len(engine.rules):>6}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
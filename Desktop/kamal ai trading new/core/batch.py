@@ -0,0 +1,124 @@
+"""Columnar MarketBar storage: one numpy structured array per batch instead of one object per bar."""
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from core.events import TZ_AWARE, MarketBar, from_ns, to_ns
+
+BAR_DTYPE = np.dtype([("sym", "<u4"), ("ts", "<i8"), ("o", "<f8"), ("h", "<f8"), ("l", "<f8"), ("c", "<f8"), ("v", "<f8"), ("ingest_ns", "<i8")])
+
+class SymbolTable:
+    """Interns symbol strings to dense integer ids; shared by every batch built against it."""
+
+    def __init__(self, symbols: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for s in symbols:
+            self.intern(s)
+
+    def intern(self, symbol: str) -> int:
+        i = self._ids.get(symbol)
+        if i is None:
+            i = self._ids[symbol] = len(self._names)
+            self._names.append(symbol)
+        return i
+
+    def id(self, symbol: str) -> int:
+        return self._ids[symbol]
+
+    def name(self, i: int) -> str:
+        return self._names[i]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._ids
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._names)
+
+class MarketBarBatch:
+    """Bars as a BAR_DTYPE array. Slicing returns views (no copy); integer indexing and iteration
+    materialize MarketBar objects for code that still works bar by bar."""
+
+    __slots__ = ("data", "symbols")
+
+    def __init__(self, data: np.ndarray, symbols: SymbolTable):
+        if data.dtype != BAR_DTYPE:
+            raise TypeError(f"expected BAR_DTYPE, got {data.dtype}")
+        self.data = data
+        self.symbols = symbols
+
+    @classmethod
+    def empty(cls, n: int, symbols: Optional[SymbolTable] = None) -> "MarketBarBatch":
+        return cls(np.zeros(n, dtype=BAR_DTYPE), SymbolTable() if symbols is None else symbols)
+
+    @classmethod
+    def from_bars(cls, bars: Iterable[MarketBar], symbols: Optional[SymbolTable] = None) -> "MarketBarBatch":
+        symbols = SymbolTable() if symbols is None else symbols
+        rows = [(symbols.intern(b.symbol), to_ns(b.ts), b.o, b.h, b.l, b.c, b.v, b.ingest_ns) for b in bars]
+        return cls(np.array(rows, dtype=BAR_DTYPE), symbols)
+
+    @classmethod
+    def from_frame(cls, df, symbol: str, symbols: Optional[SymbolTable] = None) -> "MarketBarBatch":
+        """Build from a single-symbol OHLCV DataFrame (open/high/low/close/volume, DatetimeIndex)."""
+        symbols = SymbolTable() if symbols is None else symbols
+        out = cls.empty(len(df), symbols)
+        d = out.data
+        if df.index.tz is not None:
+            raise ValueError(TZ_AWARE)
+        d["sym"] = symbols.intern(symbol)
+        d["ts"] = df.index.as_unit("ns").asi8
+        for col, src in (("o", "open"), ("h", "high"), ("l", "low"), ("c", "close"), ("v", "volume")):
+            d[col] = df[src].to_numpy(dtype="f8") if src in df else 0.0
+        return out
+
+    @classmethod
+    def concat(cls, batches: Iterable["MarketBarBatch"]) -> "MarketBarBatch":
+        batches = list(batches)
+        if not batches:
+            return cls.empty(0)
+        symbols = batches[0].symbols
+        if any(b.symbols is not symbols for b in batches):
+            raise ValueError("batches must share one SymbolTable")
+        return cls(np.concatenate([b.data for b in batches]), symbols)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def bar(self, i: int) -> MarketBar:
+        r = self.data[i]
+        return MarketBar(self.symbols.name(int(r["sym"])), from_ns(int(r["ts"])), float(r["o"]), float(r["h"]), float(r["l"]), float(r["c"]), float(r["v"]), int(r["ingest_ns"]))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.bar(key)
+        return MarketBarBatch(self.data[key], self.symbols)
+
+    def __iter__(self) -> Iterator[MarketBar]:
+        names = self.symbols._names
+        for sym, ts, o, h, l, c, v, ingest_ns in self.data.tolist():
+            yield MarketBar(names[sym], from_ns(ts), o, h, l, c, v, ingest_ns)
+
+    def for_symbol(self, symbol: str) -> "MarketBarBatch":
+        if symbol not in self.symbols:
+            return MarketBarBatch(self.data[:0], self.symbols)
+        return self[self.data["sym"] == self.symbols.id(symbol)]
+
+    def latest_by_symbol(self) -> "MarketBarBatch":
+        """Last bar of each symbol, kept in stream order."""
+        sym = self.data["sym"][::-1]
+        _, idx = np.unique(sym, return_index=True)
+        return self[np.sort(len(sym) - 1 - idx)]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[name]
+
+    def to_frame(self):
+        """OHLCV DataFrame indexed by timestamp, in the column layout the trading strategies expect."""
+        import pandas as pd
+        d = self.data
+        names = np.array(self.symbols._names, dtype=object)
+        return pd.DataFrame({"symbol": names[d["sym"]] if len(d) else [], "open": d["o"], "high": d["h"], "low": d["l"], "close": d["c"], "volume": d["v"]},
+                            index=pd.to_datetime(d["ts"], unit="ns").rename("ts"))
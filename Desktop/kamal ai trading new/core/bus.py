@@ -1,14 +1,256 @@
 from __future__ import annotations
 import asyncio
-from collections import defaultdict
-from typing import Any, DefaultDict
+import weakref
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+def symbol_key(item: Any) -> Hashable:
+    return item.symbol
+
+async def _get_batch(q, max_n: int, timeout: Optional[float]) -> list:
+    batch = []
+    if q.empty():
+        if timeout is not None and timeout <= 0:
+            return batch
+        try:
+            batch.append(await (q.get() if timeout is None else asyncio.wait_for(q.get(), timeout)))
+        except asyncio.TimeoutError:
+            return batch
+    while len(batch) < max_n and not q.empty():
+        batch.append(q.get_nowait())
+    return batch
+
+@dataclass(frozen=True)
+class TopicPolicy:
+    maxsize: int = 0
+    overflow: str = BLOCK
+    conflate_key: Optional[Callable[[Any], Hashable]] = None
+    conflate_merge: Optional[Callable[[Any, Any], Any]] = None
+    broadcast: bool = False
+
+class BoundedQueue(asyncio.Queue):
+    """Ring-buffer queue: when full, BLOCK waits, DROP_OLDEST evicts the head, DROP_NEWEST discards the new item."""
+
+    def __init__(self, maxsize: int = 0, overflow: str = BLOCK):
+        if overflow not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        super().__init__(maxsize)
+        self.overflow = overflow
+        self.dropped = 0
+        self.merged = 0
+
+    def _init(self, maxsize):
+        self._queue = deque()
+
+    def put_nowait(self, item):
+        if self.full() and self.overflow != BLOCK:
+            self.dropped += 1
+            if self.overflow == DROP_NEWEST:
+                return
+            self._get()
+            self.task_done()
+        super().put_nowait(item)
+
+    async def put(self, item):
+        if self.overflow == BLOCK:
+            return await super().put(item)
+        self.put_nowait(item)
+
+    def put_many(self, items) -> None:
+        for item in items:
+            self.put_nowait(item)
+
+    async def get_batch(self, max_n: int = 256, timeout: Optional[float] = None) -> list:
+        """Wait up to ``timeout`` for one item, then take whatever else is queued, up to ``max_n``."""
+        return await _get_batch(self, max_n, timeout)
+
+    def batch_done(self, n: int) -> None:
+        """task_done for ``n`` items at once. What "done" means is up to the consumer: AutoTradeAgent
+        calls it once a batch is dispatched to its partitions, not once the bars are handled."""
+        if n > self._unfinished_tasks:
+            raise ValueError("batch_done() called too many times")
+        self._unfinished_tasks -= n
+        if self._unfinished_tasks == 0:
+            self._finished.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {"depth": self.qsize(), "dropped": self.dropped, "merged": self.merged}
+
+class ConflatingQueue(BoundedQueue):
+    """Keeps only the latest item per key; a newer item replaces the queued one in place, or is
+    combined with it as ``merge(queued, new)`` (e.g. core.events.merge_bars)."""
+
+    def __init__(self, key: Callable[[Any], Hashable], maxsize: int = 0, overflow: str = BLOCK,
+                 merge: Optional[Callable[[Any, Any], Any]] = None):
+        self.key = key
+        self.merge = merge
+        super().__init__(maxsize, overflow)
+
+    def _init(self, maxsize):
+        self._queue = OrderedDict()
+
+    def _put(self, item):
+        self._queue[self.key(item)] = item
+
+    def _get(self):
+        return self._queue.popitem(last=False)[1]
+
+    def put_nowait(self, item):
+        k = self.key(item)
+        if k in self._queue:
+            self._queue[k] = item if self.merge is None else self.merge(self._queue[k], item)
+            self.merged += 1
+            return
+        super().put_nowait(item)
+
+    async def put(self, item):
+        if self.key(item) in self._queue:
+            return self.put_nowait(item)
+        return await super().put(item)
+
+class BroadcastTopic:
+    """Append-only ring shared by all subscribers; each Subscription reads it with its own cursor.
+
+    Publishing never blocks: a subscriber that falls more than ``capacity`` items behind
+    loses the overwritten items (counted in ``Subscription.missed``).
+    """
+
+    def __init__(self, capacity: int = 4096):
+        if capacity <= 0:
+            raise ValueError("broadcast capacity must be positive")
+        self.capacity = capacity
+        self._buf: list = [None] * capacity
+        self._head = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self._subs: weakref.WeakSet = weakref.WeakSet()
+
+    @property
+    def head(self) -> int:
+        return self._head
+
+    def put_nowait(self, item) -> None:
+        self._buf[self._head % self.capacity] = item
+        self._head += 1
+        self._wake()
+
+    def put_many(self, items) -> None:
+        buf, cap, head = self._buf, self.capacity, self._head
+        for item in items:
+            buf[head % cap] = item
+            head += 1
+        self._head = head
+        self._wake()
+
+    def _wake(self) -> None:
+        w, self._waiter = self._waiter, None
+        if w is not None and not w.done():
+            w.set_result(None)
+
+    async def put(self, item) -> None:
+        self.put_nowait(item)
+
+    def subscribe(self) -> "Subscription":
+        sub = Subscription(self)
+        self._subs.add(sub)
+        return sub
+
+    async def _wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._waiter is None or self._waiter.get_loop() is not loop:
+            self._waiter = loop.create_future()
+        await asyncio.shield(self._waiter)
+
+    def stats(self) -> Dict[str, int]:
+        subs = list(self._subs)
+        return {"depth": max((s.lag for s in subs), default=0), "dropped": sum(s.missed for s in subs), "merged": 0, "subscribers": len(subs)}
+
+class Subscription:
+    """Cursor over a BroadcastTopic; mirrors the asyncio.Queue consumer API (get/get_nowait/task_done)."""
+
+    def __init__(self, topic: BroadcastTopic):
+        self._topic = topic
+        self.cursor = topic.head
+        self.missed = 0
+
+    @property
+    def lag(self) -> int:
+        return self._topic.head - self.cursor
+
+    def qsize(self) -> int:
+        return min(self.lag, self._topic.capacity)
+
+    def empty(self) -> bool:
+        return self.lag == 0
+
+    def skip_to_head(self) -> int:
+        skipped = self.lag
+        self.missed += skipped
+        self.cursor = self._topic.head
+        return skipped
+
+    def get_nowait(self):
+        t = self._topic
+        lag = t.head - self.cursor
+        if lag == 0:
+            raise asyncio.QueueEmpty
+        if lag > t.capacity:
+            self.missed += lag - t.capacity
+            self.cursor = t.head - t.capacity
+        item = t._buf[self.cursor % t.capacity]
+        self.cursor += 1
+        return item
+
+    async def get(self):
+        while self.empty():
+            await self._topic._wait()
+        return self.get_nowait()
+
+    async def get_batch(self, max_n: int = 256, timeout: Optional[float] = None) -> list:
+        return await _get_batch(self, max_n, timeout)
+
+    def task_done(self) -> None:
+        pass
+
+    def batch_done(self, n: int) -> None:
+        pass
+
+def make_queue(policy: TopicPolicy):
+    if policy.broadcast:
+        return BroadcastTopic(policy.maxsize or 4096)
+    if policy.conflate_key is not None:
+        return ConflatingQueue(policy.conflate_key, policy.maxsize, policy.overflow, policy.conflate_merge)
+    return BoundedQueue(policy.maxsize, policy.overflow)
 
 class EventBus:
-    def __init__(self):
-        self._queues: DefaultDict[str, asyncio.Queue] = defaultdict(lambda: asyncio.Queue())
+    def __init__(self, policies: Dict[str, TopicPolicy] | None = None):
+        self._policies: Dict[str, TopicPolicy] = dict(policies or {})
+        self._queues: Dict[str, Any] = {}
+
+    def configure(self, name: str, policy: TopicPolicy) -> None:
+        q = self._queues.get(name)
+        if q is not None and q.stats()["depth"]:
+            raise ValueError(f"topic {name!r} already has pending items")
+        self._policies[name] = policy
+        self._queues.pop(name, None)
 
     def topic(self, name: str) -> asyncio.Queue:
-        return self._queues[name]
+        q = self._queues.get(name)
+        if q is None:
+            q = self._queues[name] = make_queue(self._policies.get(name, TopicPolicy()))
+        return q
+
+    def subscribe(self, name: str):
+        """Consumer handle: a private cursor on broadcast topics, the shared queue otherwise."""
+        q = self.topic(name)
+        return q.subscribe() if isinstance(q, BroadcastTopic) else q
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: q.stats() for name, q in self._queues.items()}
 
     async def publish(self, topic: str, item: Any) -> None:
         await self.topic(topic).put(item)
@@ -16,15 +258,27 @@ class EventBus:
     def publish_nowait(self, topic: str, item: Any) -> None:
         self.topic(topic).put_nowait(item)
 
-    async def listen(self, topic: str, handler):
+    def publish_many(self, topic: str, items) -> None:
+        self.topic(topic).put_many(items)
+
+    async def get_batch(self, topic: str, max_n: int = 256, timeout: Optional[float] = None) -> list:
         q = self.topic(topic)
+        if isinstance(q, BroadcastTopic):
+            raise TypeError(f"topic {topic!r} is broadcast; call get_batch on a subscription")
+        batch = await q.get_batch(max_n, timeout)
+        q.batch_done(len(batch))
+        return batch
+
+    async def listen(self, topic: str, handler, max_batch: int = 256):
+        q = self.subscribe(topic)
         while True:
-            item = await q.get()
+            batch = await q.get_batch(max_batch)
             try:
-                res = handler(item)
-                if asyncio.iscoroutine(res):
-                    await res
+                for item in batch:
+                    res = handler(item)
+                    if asyncio.iscoroutine(res):
+                        await res
             finally:
-                q.task_done()
+                q.batch_done(len(batch))
 
 global_bus = EventBus()
@@ -0,0 +1,264 @@
+"""Versioned binary codec for core.events types, for recording, IPC and journaling.
+
+A payload is a header, one string table shared by every record (symbols, ids, sides, ...),
+the meta key schemas, and then one fixed-layout numpy record block per event type.
+The string table is a u32 byte length per string followed by their UTF-8 bytes, so strings
+may contain any character. ``meta`` must be a dict of JSON types that round-trip unchanged
+(str keys, lists not tuples), else encoding raises CodecError; each distinct key set is
+stored once and records carry only a schema id plus their values. Timestamps are naive UTC,
+as everywhere in core.events; tz-aware datetimes are rejected by core.events.to_ns.
+"""
+from __future__ import annotations
+import json
+import math
+import struct
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+from core.events import MarketBar, Signal, OrderIntent, TradeFill, to_ns
+from core.batch import BAR_DTYPE, MarketBarBatch, SymbolTable
+
+MAGIC = b"KEVC"
+VERSION = 3  # 2: length-prefixed string table; 3: bar ingest_ns column
+_HEADER = struct.Struct("<4sBBxxI")  # magic, version, frame count, event count
+_FRAME = struct.Struct("<BxxxII")  # kind, record count, meta blob length
+_U32 = struct.Struct("<I")
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+KIND_BAR, KIND_SIGNAL, KIND_ORDER, KIND_FILL, KIND_BAR_BATCH = 1, 2, 3, 4, 5
+
+SIGNAL_DTYPE = np.dtype([("id", "<u4"), ("sym", "<u4"), ("ts", "<i8"), ("kind", "<u4"), ("strength", "<f8"), ("meta", "<u4")])
+ORDER_DTYPE = np.dtype([("id", "<u4"), ("sym", "<u4"), ("qty", "<f8"), ("side", "<u4"), ("price", "<f8"), ("type", "<u4"), ("meta", "<u4")])
+FILL_DTYPE = np.dtype([("order_id", "<u4"), ("qty", "<f8"), ("avg_price", "<f8"), ("ts", "<i8"), ("meta", "<u4")])
+
+class CodecError(ValueError):
+    pass
+
+class _Strings:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def column(self, values) -> List[int]:
+        ids = self.ids
+        out = []
+        for v in values:
+            i = ids.get(v)
+            if i is None:
+                i = ids[v] = len(ids)
+            out.append(i)
+        return out
+
+def _ts_column(values: Sequence) -> np.ndarray:
+    try:
+        us = [(t - _EPOCH) // _US for t in values]  # to_ns inlined; tz-aware values raise TypeError
+    except TypeError:
+        try:
+            return np.fromiter(map(to_ns, values), dtype="<i8", count=len(values))
+        except ValueError as e:
+            raise CodecError(str(e)) from None
+    return np.array(us, dtype="<i8") * 1000
+
+def _ts_values(ns: np.ndarray) -> list:
+    return (ns // 1000).astype("datetime64[us]").tolist()
+
+_JSON_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+def _is_json(v) -> bool:
+    """True for values that json round-trips unchanged: no tuples, no non-str keys, no subclasses."""
+    t = type(v)
+    if t in _JSON_SCALARS:
+        return True
+    if t is list:
+        return all(map(_is_json, v))
+    if t is dict:
+        return all(type(k) is str and _is_json(x) for k, x in v.items())
+    return False
+
+class _Schemas:
+    def __init__(self):
+        self.ids: Dict[Tuple[str, ...], int] = {}
+
+    def encode(self, metas) -> Tuple[List[int], bytes]:
+        ids, sids, values = self.ids, [], []
+        for m in metas:
+            if not (type(m) is dict and _is_json(m)):
+                raise CodecError(f"meta is not JSON (str keys; str, number, bool, None, list, dict values): {m!r}")
+            keys = tuple(m)
+            i = ids.get(keys)
+            if i is None:
+                i = ids[keys] = len(ids)
+            sids.append(i)
+            values.append(list(m.values()))
+        return sids, json.dumps(values, separators=(",", ":")).encode()
+
+def _metas(schemas: List[List[str]], sids, blob: bytes) -> List[Dict[str, Any]]:
+    values = json.loads(blob)
+    return [dict(zip(schemas[s], v)) for s, v in zip(sids.tolist(), values)]
+
+def _encode_frame(kind: int, events: list, strings: _Strings, schemas: _Schemas) -> Tuple[bytes, bytes]:
+    n = len(events)
+    if kind == KIND_BAR:
+        rec = np.empty(n, dtype=BAR_DTYPE)
+        rec["sym"] = strings.column([e.symbol for e in events])
+        rec["ts"] = _ts_column([e.ts for e in events])
+        for f in ("o", "h", "l", "c", "v", "ingest_ns"):
+            rec[f] = [getattr(e, f) for e in events]
+        return rec.tobytes(), b""
+    if kind == KIND_SIGNAL:
+        rec = np.empty(n, dtype=SIGNAL_DTYPE)
+        rec["id"] = strings.column([e.id for e in events])
+        rec["sym"] = strings.column([e.symbol for e in events])
+        rec["ts"] = _ts_column([e.ts for e in events])
+        rec["kind"] = strings.column([e.kind for e in events])
+        rec["strength"] = [e.strength for e in events]
+    elif kind == KIND_ORDER:
+        rec = np.empty(n, dtype=ORDER_DTYPE)
+        rec["id"] = strings.column([e.id for e in events])
+        rec["sym"] = strings.column([e.symbol for e in events])
+        rec["qty"] = [e.qty for e in events]
+        rec["side"] = strings.column([e.side for e in events])
+        rec["price"] = [math.nan if e.price is None else e.price for e in events]
+        rec["type"] = strings.column([e.type for e in events])
+    else:
+        rec = np.empty(n, dtype=FILL_DTYPE)
+        rec["order_id"] = strings.column([e.order_id for e in events])
+        rec["qty"] = [e.executed_qty for e in events]
+        rec["avg_price"] = [e.avg_price for e in events]
+        rec["ts"] = _ts_column([e.ts for e in events])
+    rec["meta"], blob = schemas.encode([e.meta for e in events])
+    return rec.tobytes(), blob
+
+def _decode_frame(kind: int, rec: np.ndarray, strings: List[str], schemas: List[List[str]], blob: bytes) -> list:
+    if kind == KIND_BAR_BATCH:
+        return list(MarketBarBatch(rec, SymbolTable(strings)))
+    s = strings.__getitem__
+    if kind == KIND_BAR:
+        cols = [rec[f].tolist() for f in ("o", "h", "l", "c", "v", "ingest_ns")]
+        return list(map(MarketBar, map(s, rec["sym"].tolist()), _ts_values(rec["ts"]), *cols))
+    metas = _metas(schemas, rec["meta"], blob)
+    if kind == KIND_SIGNAL:
+        return list(map(Signal, map(s, rec["id"].tolist()), map(s, rec["sym"].tolist()), _ts_values(rec["ts"]),
+                        map(s, rec["kind"].tolist()), rec["strength"].tolist(), metas))
+    if kind == KIND_ORDER:
+        prices = [None if p != p else p for p in rec["price"].tolist()]
+        return list(map(OrderIntent, map(s, rec["id"].tolist()), map(s, rec["sym"].tolist()), rec["qty"].tolist(),
+                        map(s, rec["side"].tolist()), prices, map(s, rec["type"].tolist()), metas))
+    return list(map(TradeFill, map(s, rec["order_id"].tolist()), rec["qty"].tolist(), rec["avg_price"].tolist(),
+                    _ts_values(rec["ts"]), metas))
+
+_KINDS = {MarketBar: KIND_BAR, Signal: KIND_SIGNAL, OrderIntent: KIND_ORDER, TradeFill: KIND_FILL}
+_DTYPES = {KIND_BAR: BAR_DTYPE, KIND_SIGNAL: SIGNAL_DTYPE, KIND_ORDER: ORDER_DTYPE, KIND_FILL: FILL_DTYPE, KIND_BAR_BATCH: BAR_DTYPE}
+
+def _pack(frames: List[Tuple[int, int, bytes, bytes]], total: int, strings: List[str], schemas: List[Tuple[str, ...]], order: bytes) -> bytes:
+    encoded = [s.encode() for s in strings]
+    lengths = np.fromiter(map(len, encoded), dtype="<u4", count=len(encoded)).tobytes()
+    blob = b"".join(encoded)
+    head = json.dumps([list(k) for k in schemas], separators=(",", ":")).encode()
+    parts = [_HEADER.pack(MAGIC, VERSION, len(frames), total),
+             _U32.pack(len(strings)), lengths, _U32.pack(len(blob)), blob,
+             _U32.pack(len(head)), head,
+             _U32.pack(len(order)), order]
+    for kind, n, rec, meta in frames:
+        parts += [_FRAME.pack(kind, n, len(meta)), rec, meta]
+    return b"".join(parts)
+
+def _split(blob: bytes, ends: List[int]) -> List[str]:
+    if ends and ends[-1] != len(blob):
+        raise CodecError("string table does not match its lengths")
+    text = blob.decode()
+    if len(text) == len(blob):  # ASCII: byte offsets are character offsets
+        return [text[a:b] for a, b in zip([0] + ends[:-1], ends)]
+    return [blob[a:b].decode() for a, b in zip([0] + ends[:-1], ends)]
+
+def _unpack(data: bytes):
+    mv = memoryview(data)
+    try:
+        magic, version, n_frames, total = _HEADER.unpack_from(mv, 0)
+    except struct.error as e:
+        raise CodecError("truncated event payload") from e
+    if magic != MAGIC:
+        raise CodecError("not an event payload")
+    if version != VERSION:
+        raise CodecError(f"unsupported codec version {version}")
+    off = _HEADER.size
+
+    def chunk():
+        nonlocal off
+        (n,) = _U32.unpack_from(mv, off)
+        start = off + 4
+        off = start + n
+        if off > len(mv):
+            raise CodecError("truncated event payload")
+        return bytes(mv[start:off])
+
+    try:
+        n_strings = _U32.unpack_from(mv, off)[0]
+        ends = np.cumsum(np.frombuffer(mv, dtype="<u4", count=n_strings, offset=off + 4), dtype=np.int64).tolist()
+        off += 4 + 4 * n_strings
+        blob = chunk()
+        strings = _split(blob, ends)
+        schemas = json.loads(chunk())
+        order = chunk()
+    except (struct.error, ValueError) as e:
+        raise CodecError("truncated or corrupt event payload") from e
+    frames = []
+    for _ in range(n_frames):
+        if off + _FRAME.size > len(mv):
+            raise CodecError("truncated event payload")
+        kind, n, meta_len = _FRAME.unpack_from(mv, off)
+        off += _FRAME.size
+        dtype = _DTYPES.get(kind)
+        if dtype is None:
+            raise CodecError(f"unknown frame kind {kind}")
+        end = off + n * dtype.itemsize
+        if end + meta_len > len(mv):
+            raise CodecError("truncated event payload")
+        rec = np.frombuffer(mv, dtype=dtype, count=n, offset=off)
+        frames.append((kind, rec, bytes(mv[end:end + meta_len])))
+        off = end + meta_len
+    return total, strings, schemas, order, frames
+
+def encode_events(events: Sequence[Any]) -> bytes:
+    """Encode a list of MarketBar/Signal/OrderIntent/TradeFill (mixed types allowed, order kept)."""
+    kinds = [_KINDS.get(type(e)) for e in events]
+    if None in kinds:
+        raise CodecError(f"cannot encode {type(events[kinds.index(None)]).__name__}")
+    present = sorted(set(kinds))
+    strings, schemas = _Strings(), _Schemas()
+    frames = []
+    for kind in present:
+        group = events if len(present) == 1 else [e for e, k in zip(events, kinds) if k == kind]
+        rec, meta = _encode_frame(kind, group, strings, schemas)
+        frames.append((kind, len(group), rec, meta))
+    order = bytes(kinds) if len(present) > 1 else b""
+    return _pack(frames, len(events), list(strings.ids), list(schemas.ids), order)
+
+def decode_events(data: bytes) -> list:
+    """Inverse of encode_events; a bar batch payload decodes to its MarketBars."""
+    total, strings, schemas, order, frames = _unpack(data)
+    try:
+        decoded = {kind: iter(_decode_frame(kind, rec, strings, schemas, meta)) for kind, rec, meta in frames}
+        if not order:
+            return list(next(iter(decoded.values()), ()))
+        return [next(decoded[k]) for k in order]
+    except (ValueError, TypeError, KeyError, IndexError, StopIteration) as e:  # records disagree with the tables
+        raise CodecError("corrupt event payload") from e
+
+def encode(event: Any) -> bytes:
+    return encode_events([event])
+
+def decode(data: bytes) -> Any:
+    (event,) = decode_events(data)
+    return event
+
+def encode_bar_batch(batch: MarketBarBatch) -> bytes:
+    """Columnar fast path: the batch array is written as-is, symbols via its SymbolTable."""
+    return _pack([(KIND_BAR_BATCH, len(batch), batch.data.tobytes(), b"")], len(batch), batch.symbols.names, [], b"")
+
+def decode_bar_batch(data: bytes) -> MarketBarBatch:
+    """Zero-copy over ``data``: the returned batch's array is a read-only view of the payload."""
+    _, strings, _, _, frames = _unpack(data)
+    if len(frames) != 1 or frames[0][0] != KIND_BAR_BATCH:
+        raise CodecError("payload is not a bar batch")
+    return MarketBarBatch(frames[0][1], SymbolTable(strings))
@@ -1,13 +1,29 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Iterator, Optional
 from uuid import uuid4
 
+_EPOCH = datetime(1970, 1, 1)
+_NS = timedelta(microseconds=1)
+
 def new_id() -> str:
     return str(uuid4())
 
-@dataclass(frozen=True)
+TZ_AWARE = "tz-aware timestamps are not accepted: convert them to naive UTC first"
+
+def to_ns(ts: datetime) -> int:
+    """Epoch nanoseconds of a naive UTC datetime. Every encoder goes through here, so a tz-aware
+    timestamp is rejected (ValueError) the same way on every transport."""
+    if ts.tzinfo is not None:
+        raise ValueError(TZ_AWARE)
+    return (ts - _EPOCH) // _NS * 1000
+
+def from_ns(ns: int) -> datetime:
+    """Inverse of to_ns, as a naive UTC datetime (microsecond resolution)."""
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+@dataclass(frozen=True, slots=True)
 class MarketBar:
     symbol: str
     ts: datetime
@@ -16,8 +32,9 @@ class MarketBar:
     l: float
     c: float
     v: float
+    ingest_ns: int = field(default=0, compare=False)  # time.monotonic_ns() when the tick entered the process
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Signal:
     id: str
     symbol: str
@@ -26,7 +43,7 @@ class Signal:
     strength: float
     meta: Dict[str, Any]
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OrderIntent:
     id: str
     symbol: str
@@ -36,10 +53,36 @@ class OrderIntent:
     type: str
     meta: Dict[str, Any]
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TradeFill:
     order_id: str
     executed_qty: float
     avg_price: float
     ts: datetime
     meta: Dict[str, Any]
+
+@dataclass(frozen=True, slots=True)
+class MarkPrice:
+    symbol: str
+    price: float
+    ts: Optional[datetime] = None
+
+@dataclass(frozen=True, slots=True)
+class OrderExplanation:
+    order_id: str
+    text: str
+    cached: bool = False
+
+def merge_bars(older: MarketBar, newer: MarketBar) -> MarketBar:
+    """One bar spanning both: first open, extreme high/low, last close, summed volume. The
+    newer bar's ts and ingest_ns are kept, since the merged bar is as fresh as its last price."""
+    return MarketBar(newer.symbol, newer.ts, older.o, max(older.h, newer.h), min(older.l, newer.l), newer.c,
+                     older.v + newer.v, newer.ingest_ns)
+
+def iter_bars(items: Iterable[Any]) -> Iterator[MarketBar]:
+    """Flatten a mix of MarketBar and batch items (anything iterable over bars) into single bars."""
+    for item in items:
+        if isinstance(item, MarketBar):
+            yield item
+        else:
+            yield from item
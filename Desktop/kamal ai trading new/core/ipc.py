@@ -0,0 +1,189 @@
+"""Shared-memory transport for EventBus topics between processes on one host.
+
+A ShmRing is owned by a single writer process and holds fixed-size binary records;
+any number of processes attach a ShmReader with their own cursor. Use one ring per
+topic per producer, and ``forward``/``pump`` to bridge rings to local bus topics.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import math
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Tuple
+
+from core.events import MarketBar, OrderIntent, from_ns, to_ns
+
+_MAGIC = b"KBUS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHII")  # magic, version, codec id, capacity, slot size
+_HEAD_OFF = 16  # u64: sequence number of the next record to be written
+_DATA_OFF = 64
+_U64 = struct.Struct("<Q")
+
+class RecordCodec:
+    def __init__(self, codec_id: int, fmt: str, encode: Callable[[Any], Tuple], decode: Callable[[Tuple], Any]):
+        self.codec_id = codec_id
+        self.struct = struct.Struct(fmt)
+        self.encode = encode
+        self.decode = decode
+
+def _fixed(s: str, n: int) -> bytes:
+    b = s.encode()
+    if len(b) > n:
+        raise ValueError(f"{s!r} does not fit in {n} bytes")
+    return b
+
+def _text(b: bytes) -> str:
+    return b.rstrip(b"\0").decode()
+
+def _encode_order(o: OrderIntent) -> Tuple:
+    meta = json.dumps(o.meta, separators=(",", ":"), default=str).encode()
+    if len(meta) > 200:
+        raise ValueError(f"order {o.id} meta is {len(meta)} bytes, limit is 200")
+    price = math.nan if o.price is None else o.price
+    return (_fixed(o.id, 36), _fixed(o.symbol, 16), o.qty, _fixed(o.side, 4), price, _fixed(o.type, 8), meta)
+
+def _decode_order(t: Tuple) -> OrderIntent:
+    price = None if math.isnan(t[4]) else t[4]
+    return OrderIntent(id=_text(t[0]), symbol=_text(t[1]), qty=t[2], side=_text(t[3]), price=price, type=_text(t[5]), meta=json.loads(_text(t[6]) or "{}"))
+
+# ingest_ns travels with the bar: CLOCK_MONOTONIC is shared by all processes on the host
+BAR_CODEC = RecordCodec(1, "<16sq5dq", lambda b: (_fixed(b.symbol, 16), to_ns(b.ts), b.o, b.h, b.l, b.c, b.v, b.ingest_ns),
+                        lambda t: MarketBar(_text(t[0]), from_ns(t[1]), *t[2:]))
+ORDER_CODEC = RecordCodec(2, "<36s16sd4sd8s200s", _encode_order, _decode_order)
+CODECS: Dict[int, RecordCodec] = {BAR_CODEC.codec_id: BAR_CODEC, ORDER_CODEC.codec_id: ORDER_CODEC}
+
+class ShmRing:
+    """Writer side. Each slot is a u64 sequence stamp followed by the record; the stamp is odd while
+    the slot is being written, so readers can detect torn or lapped reads without a lock."""
+
+    def __init__(self, name: str, codec: RecordCodec, capacity: int = 65536):
+        self.codec = codec
+        self.capacity = capacity
+        self.slot = (8 + codec.struct.size + 7) & ~7
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=_DATA_OFF + capacity * self.slot)
+        self._buf = self.shm.buf
+        self._head = 0
+        _HEADER.pack_into(self._buf, 0, _MAGIC, _VERSION, codec.codec_id, capacity, self.slot)
+        _U64.pack_into(self._buf, _HEAD_OFF, 0)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def put_nowait(self, item) -> None:
+        n, buf = self._head, self._buf
+        off = _DATA_OFF + (n % self.capacity) * self.slot
+        _U64.pack_into(buf, off, 2 * n + 1)
+        self.codec.struct.pack_into(buf, off + 8, *self.codec.encode(item))
+        _U64.pack_into(buf, off, 2 * n + 2)
+        self._head = n + 1
+        _U64.pack_into(buf, _HEAD_OFF, n + 1)
+
+    async def put(self, item) -> None:
+        self.put_nowait(item)
+
+    def put_many(self, items) -> None:
+        for item in items:
+            self.put_nowait(item)
+
+    def close(self, unlink: bool = True) -> None:
+        self._buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # a reader must not register the segment with its resource tracker: the tracker would
+    # unlink it when the reader exits, although the writer owns it
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no track flag
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+class ShmReader:
+    """Reader side; exposes the same get_batch/batch_done consumer API as bus subscriptions."""
+
+    def __init__(self, name: str, from_start: bool = False):
+        self.shm = _attach(name)
+        self._buf = self.shm.buf
+        magic, version, codec_id, self.capacity, self.slot = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{name} is not a v{_VERSION} event ring")
+        self.codec = CODECS[codec_id]
+        self.cursor = 0 if from_start else self.head
+        self.missed = 0
+
+    @property
+    def head(self) -> int:
+        return _U64.unpack_from(self._buf, _HEAD_OFF)[0]
+
+    @property
+    def lag(self) -> int:
+        return self.head - self.cursor
+
+    def empty(self) -> bool:
+        return self.lag == 0
+
+    def _skip_lapped(self, head: int) -> None:
+        # leave one slot of headroom for the record the writer may be in the middle of
+        cursor = max(self.cursor + 1, head - self.capacity + 1)
+        self.missed += cursor - self.cursor
+        self.cursor = cursor
+
+    def read_batch(self, max_n: int = 256) -> list:
+        out = []
+        buf, cap, slot, rec = self._buf, self.capacity, self.slot, self.codec.struct
+        head = self.head
+        if head - self.cursor > cap:
+            self._skip_lapped(head)
+        while self.cursor < head and len(out) < max_n:
+            n = self.cursor
+            off = _DATA_OFF + (n % cap) * slot
+            stamp = 2 * n + 2
+            if _U64.unpack_from(buf, off)[0] == stamp:
+                fields = rec.unpack_from(buf, off + 8)
+                if _U64.unpack_from(buf, off)[0] == stamp:
+                    out.append(self.codec.decode(fields))
+                    self.cursor = n + 1
+                    continue
+            head = self.head
+            self._skip_lapped(head)
+        return out
+
+    async def get_batch(self, max_n: int = 256, timeout: float | None = None, poll_interval: float = 0.0005) -> list:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            batch = self.read_batch(max_n)
+            if batch or (deadline is not None and loop.time() >= deadline):
+                return batch
+            await asyncio.sleep(poll_interval)
+
+    def batch_done(self, n: int) -> None:
+        pass
+
+    def close(self) -> None:
+        self._buf = None
+        self.shm.close()
+
+async def forward(bus, topic: str, ring: ShmRing, max_batch: int = 256) -> None:
+    """Copy a local bus topic into a shared-memory ring for other processes."""
+    q = bus.subscribe(topic)
+    while True:
+        batch = await q.get_batch(max_batch)
+        try:
+            ring.put_many(batch)
+        finally:
+            q.batch_done(len(batch))
+
+async def pump(reader: ShmReader, bus, topic: str, max_batch: int = 256) -> None:
+    """Republish records written by another process onto a local bus topic."""
+    while True:
+        bus.publish_many(topic, await reader.get_batch(max_batch))
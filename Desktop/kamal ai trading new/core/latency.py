@@ -0,0 +1,138 @@
+"""Per-stage latency histograms for the tick-to-order path.
+
+Stages record ``time.monotonic_ns()`` deltas into HDR-style log-linear histograms:
+exact below 2**sub_bits ns, then 2**sub_bits buckets per power of two (~3% error at 5 bits).
+"""
+from __future__ import annotations
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Tuple
+
+now_ns = time.monotonic_ns
+
+# stage names used across the pipeline
+STAGE_BUS = "bus"                  # ingest -> picked up by the agent
+STAGE_FEATURES = "features"        # RollingFeatureComputer.update + features
+STAGE_PREDICT = "predict"          # ModelManager.predict_proba
+STAGE_RISK = "risk_gate"           # gate_pretrade
+STAGE_EXPLAIN = "explain"          # scheduling the explanation (the LLM call itself is off-path)
+STAGE_LLM = "llm"                  # LLM round trip, recorded by ai.explanations
+STAGE_PUBLISH = "publish"          # publish_order_intent
+STAGE_TICK_TO_ORDER = "tick_to_order"
+
+class LatencyHistogram:
+    def __init__(self, sub_bits: int = 5):
+        self.sub_bits = sub_bits
+        self.counts: List[int] = [0] * ((65 - sub_bits) << sub_bits)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, v: int) -> int:
+        s = self.sub_bits
+        if v < (1 << s):
+            return v
+        shift = v.bit_length() - s - 1
+        return ((shift + 1) << s) + (v >> shift) - (1 << s)
+
+    def _upper(self, i: int) -> int:
+        s = self.sub_bits
+        if i < (2 << s):
+            return i
+        shift = (i >> s) - 1
+        top = (i & ((1 << s) - 1)) + (1 << s)
+        return ((top + 1) << shift) - 1
+
+    def record(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        self.counts[self._index(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> int:
+        """Upper bound (ns) of the bucket holding the q-th quantile, 0 <= q <= 1."""
+        if self.count == 0:
+            return 0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self._upper(i), self.max)
+        return self.max
+
+    def cumulative(self, bounds_ns: List[int]) -> List[int]:
+        """Counts of samples whose bucket lies at or below each bound (bounds ascending)."""
+        out, seen, i = [], 0, 0
+        n = len(self.counts)
+        for b in bounds_ns:
+            while i < n and self._upper(i) <= b:
+                seen += self.counts[i]
+                i += 1
+            out.append(seen)
+        return out
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class LatencyRecorder:
+    def __init__(self, sub_bits: int = 5):
+        self.sub_bits = sub_bits
+        self.stages: Dict[str, LatencyHistogram] = {}
+
+    def record(self, stage: str, ns: int) -> None:
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = LatencyHistogram(self.sub_bits)
+        h.record(ns)
+
+    def since(self, stage: str, start_ns: int) -> int:
+        """Record the time elapsed since ``start_ns`` and return the current timestamp."""
+        t = now_ns()
+        self.record(stage, t - start_ns)
+        return t
+
+    def items(self) -> Iterator[Tuple[str, LatencyHistogram]]:
+        return iter(list(self.stages.items()))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: {"count": h.count, "mean_ms": h.mean() / 1e6, "p50_ms": h.percentile(0.5) / 1e6,
+                       "p99_ms": h.percentile(0.99) / 1e6, "p999_ms": h.percentile(0.999) / 1e6, "max_ms": h.max / 1e6}
+                for name, h in self.items()}
+
+    def reset(self) -> None:
+        self.stages.clear()
+
+global_latency = LatencyRecorder()
+
+@dataclass(frozen=True)
+class LatencyBudget:
+    """Per-tick deadline = ingest_ns + budget. Decisions past it are dropped; with less than
+    ``min_predict_ms`` left the model is skipped, and with less than ``min_explain_ms`` left no
+    explanation is requested. A skipped model means no trade unless ``fallback_max_age_ms`` is
+    set: then the symbol's last model score is reused if it is at most that old."""
+    budget_ms: float = 800.0
+    min_predict_ms: float = 50.0
+    min_explain_ms: float = 200.0
+    fallback_max_age_ms: float = 0.0
+
+    @classmethod
+    def from_policies(cls, policies: Mapping[str, Any]) -> "LatencyBudget":
+        safeguards = (policies.get("ai_policies") or {}).get("safeguards") or {}
+        return cls(budget_ms=float(safeguards.get("block_if_latency_ms_above", cls.budget_ms)))
+
+    @classmethod
+    def load(cls, path: str = "config/ai_policies.yaml") -> "LatencyBudget":
+        if not os.path.exists(path):
+            return cls()
+        import yaml
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls.from_policies(yaml.safe_load(fh) or {})
+
+    def deadline(self, ingest_ns: int) -> int:
+        """Monotonic deadline for a tick, or 0 (none) when its ingest time is unknown."""
+        return ingest_ns + int(self.budget_ms * 1e6) if ingest_ns else 0
@@ -0,0 +1,184 @@
+"""Pre-trade limits from every source, compiled once and checked for a whole batch of orders.
+
+Sources:
+- the account: per-trade cap, total exposure and daily loss, as in ai.risk_gates;
+- config/trading_config.yaml: max_daily_loss, max_lots_per_order, require_stoploss;
+- profiles/trader_profile.yaml: max_concurrent_positions, daily_loss_limit_pct.
+
+Each active rule compiles to a term ``x[col] * weight + bias > 0`` on one order column
+(notional, lots, missing stop-loss, or the batch's notional / new positions up to and including
+the order). The bias comes from account scalars, computed once per call. ``evaluate`` checks
+every rule against every order in one (orders x rules) numpy pass and reports the first violated
+rule per order, in plan order. The batch columns are cumulative sums over the orders accepted
+earlier in plan order, so together the batch cannot exceed the exposure or position limits: a
+first pass checks each order alone, a second counts every order that passed alone. Only when
+that pushes some order over a limit does a scalar walk settle the rest of the batch in order,
+followed by a final pass. With ``cumulative=False`` each order is checked alone against the
+account, as a caller deciding one order at a time with no record of earlier ones would. NaN
+inputs fail.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+
+NOTIONAL, LOTS, NO_STOP, BATCH_NOTIONAL, BATCH_OPENS = range(5)
+
+PER_TRADE_RISK = "per_trade_risk"
+TOTAL_EXPOSURE = "total_exposure"
+DAILY_LOSS = "daily_loss"
+MAX_DAILY_LOSS = "max_daily_loss"
+DAILY_LOSS_LIMIT_PCT = "daily_loss_limit_pct"
+MAX_LOTS_PER_ORDER = "max_lots_per_order"
+REQUIRE_STOPLOSS = "require_stoploss"
+MAX_CONCURRENT_POSITIONS = "max_concurrent_positions"
+
+def _opt(value: Any, kind: type = float) -> Any:
+    return None if value is None else kind(value)
+
+@dataclass(frozen=True)
+class RiskLimits:
+    """Limits from the config files; None disables a rule."""
+    max_daily_loss: Optional[float] = None
+    daily_loss_limit_pct: Optional[float] = None
+    max_lots_per_order: Optional[float] = None
+    require_stoploss: bool = False
+    max_concurrent_positions: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, trading: Mapping[str, Any], profile: Mapping[str, Any]) -> "RiskLimits":
+        trader, risk = profile.get("trader") or {}, profile.get("risk") or {}
+        return cls(max_daily_loss=_opt(trading.get("max_daily_loss")),
+                   daily_loss_limit_pct=_opt(risk.get("daily_loss_limit_pct")),
+                   max_lots_per_order=_opt(trading.get("max_lots_per_order")),
+                   require_stoploss=bool(trading.get("require_stoploss", False)),
+                   max_concurrent_positions=_opt(trader.get("max_concurrent_positions"), int))
+
+    @classmethod
+    def load(cls, trading_path: str = "config/trading_config.yaml",
+             profile_path: str = "profiles/trader_profile.yaml") -> "RiskLimits":
+        import yaml
+        docs = []
+        for path in (trading_path, profile_path):
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as fh:
+                    docs.append(yaml.safe_load(fh) or {})
+            else:
+                docs.append({})
+        return cls.from_config(*docs)
+
+# bias(account, open_positions) for each rule; violated when x[col] * weight + bias > 0
+_Bias = Callable[[Any, int], float]
+
+class RuleEngine:
+    def __init__(self, limits: RiskLimits = RiskLimits()):
+        self.limits = limits
+        plan: List[Tuple[str, int, float, _Bias]] = [
+            (PER_TRADE_RISK, NOTIONAL, 1.0, lambda a, _: -a.capital * a.max_risk_per_trade),
+            (TOTAL_EXPOSURE, BATCH_NOTIONAL, 1.0, lambda a, _: a.exposure - a.max_total_exposure),
+            (DAILY_LOSS, NOTIONAL, 0.0, lambda a, _: a.daily_loss - a.max_daily_loss),
+        ]
+        if limits.max_daily_loss is not None:
+            plan.append((MAX_DAILY_LOSS, NOTIONAL, 0.0, lambda a, _: a.daily_loss - limits.max_daily_loss))
+        if limits.daily_loss_limit_pct is not None:
+            plan.append((DAILY_LOSS_LIMIT_PCT, NOTIONAL, 0.0,
+                         lambda a, _: a.daily_loss - a.capital * limits.daily_loss_limit_pct / 100.0))
+        if limits.max_lots_per_order is not None:
+            plan.append((MAX_LOTS_PER_ORDER, LOTS, 1.0, lambda a, _: -limits.max_lots_per_order))
+        if limits.require_stoploss:
+            plan.append((REQUIRE_STOPLOSS, NO_STOP, 1.0, lambda a, _: -0.5))
+        if limits.max_concurrent_positions is not None:
+            cap = limits.max_concurrent_positions
+            plan.append((MAX_CONCURRENT_POSITIONS, BATCH_OPENS, 1.0, lambda a, n: n - cap))
+        self.rules: Tuple[str, ...] = tuple(name for name, *_ in plan)
+        self._cols = np.array([col for _, col, _, _ in plan], dtype=np.intp)
+        self._weights = np.array([w for _, _, w, _ in plan], dtype=float)
+        self._biases: Tuple[_Bias, ...] = tuple(b for *_, b in plan)
+        self._names = np.array(self.rules + ("",), dtype=object)
+
+    @classmethod
+    def load(cls, trading_path: str = "config/trading_config.yaml",
+             profile_path: str = "profiles/trader_profile.yaml") -> "RuleEngine":
+        return cls(RiskLimits.load(trading_path, profile_path))
+
+    def evaluate(self, account: Any, notionals, lots=None, has_stoploss=None, symbols: Optional[Sequence[str]] = None,
+                 open_positions: Optional[int] = None, cumulative: bool = True) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """(passed, violated rule or None) per order. ``account`` is an ai.risk_gates.AccountSnapshot
+        (or any object with its fields). Missing ``lots`` count as 0; missing ``has_stoploss`` as no
+        stop-loss. With ``symbols``, an order opens a position when neither ``account`` nor an
+        earlier accepted order holds its symbol (without them, none does); ``open_positions``
+        defaults to the number of symbols with exposure."""
+        notionals = np.asarray(notionals, dtype=float)
+        n = notionals.shape[0]
+        X = np.zeros((n, 5))
+        X[:, NOTIONAL] = notionals
+        if lots is not None:
+            X[:, LOTS] = lots
+        X[:, NO_STOP] = 1.0 if has_stoploss is None else ~np.asarray(has_stoploss, dtype=bool)
+        held = account.per_symbol_exposure
+        new = np.zeros(n, dtype=bool)
+        codes = np.zeros(n, dtype=np.intp)
+        if symbols is not None:
+            new[:] = [not held.get(s) for s in symbols]
+            codes = np.unique(np.asarray(symbols, dtype=object).astype(str), return_inverse=True)[1].reshape(n)
+        if open_positions is None:
+            open_positions = sum(1 for v in held.values() if v)
+        bias = np.array([b(account, open_positions) for b in self._biases])
+        # failing alone fails in any batch, so only orders that pass alone can count
+        passed, bad, _ = self._pass(X, bias, notionals, new, codes, np.zeros(n, dtype=bool))
+        ok = passed.copy()
+        if cumulative:
+            passed, bad, before = self._pass(X, bias, notionals, new, codes, ok)
+        late = np.flatnonzero(ok & ~passed)
+        if late.size:
+            self._settle(X, bias, notionals, new, codes, ok, int(late[0]), before)
+            passed, bad, _ = self._pass(X, bias, notionals, new, codes, ok)
+        first = bad.argmax(axis=1)
+        first[passed] = len(self.rules)
+        return passed, [r or None for r in self._names[first].tolist()]
+
+    def _pass(self, X, bias, notionals, new, codes, ok) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Fill the batch columns counting the ``ok`` orders and check every rule: (passed, bad,
+        number of positions opened by ``ok`` orders before each order)."""
+        n = len(notionals)
+        idx = np.arange(n)
+        counted = np.where(ok, notionals, 0.0)
+        X[:, BATCH_NOTIONAL] = np.concatenate(([0.0], np.cumsum(counted)[:-1])) + notionals
+        first_ok = np.full(codes.max(initial=-1) + 1, n)
+        np.minimum.at(first_ok, codes[ok], idx[ok])
+        opens = new & (idx <= first_ok[codes])
+        before = np.concatenate(([0], np.cumsum(opens & ok)[:-1]))
+        X[:, BATCH_OPENS] = np.where(opens, before + 1.0, -np.inf)
+        bad = ~(X[:, self._cols] * self._weights + bias <= 0)
+        return ~bad.any(axis=1), bad, before
+
+    def _settle(self, X, bias, notionals, new, codes, ok, start: int, before) -> None:
+        """From ``start``, the first order that stopped fitting once earlier orders counted, drop
+        each order from ``ok`` that does not fit given the orders still ok before it. One scalar
+        walk over the rest of the batch; only the batch rules can change from here on."""
+        rules = [(col, w, b) for col, w, b in zip(self._cols.tolist(), self._weights.tolist(), bias.tolist())
+                 if col in (BATCH_NOTIONAL, BATCH_OPENS)]
+        run = float(X[start, BATCH_NOTIONAL] - notionals[start])
+        n_open = int(before[start])
+        opened = set(codes[:start][ok[:start] & new[:start]].tolist())
+        for i in range(start, len(ok)):
+            if not ok[i]:
+                continue
+            opens = bool(new[i]) and int(codes[i]) not in opened
+            x = {BATCH_NOTIONAL: run + notionals[i], BATCH_OPENS: n_open + 1.0 if opens else -np.inf}
+            if any(not (x[col] * w + b <= 0) for col, w, b in rules):
+                ok[i] = False
+                continue
+            run += notionals[i]
+            if opens:
+                opened.add(int(codes[i]))
+                n_open += 1
+
+    def check(self, account: Any, notional: float, lots: Optional[float] = None, has_stoploss: Optional[bool] = None,
+              symbol: Optional[str] = None, open_positions: Optional[int] = None) -> Optional[str]:
+        """evaluate for a single order: the violated rule, or None."""
+        _, reasons = self.evaluate(account, [notional], None if lots is None else [lots],
+                                   None if has_stoploss is None else [has_stoploss],
+                                   None if symbol is None else [symbol], open_positions)
+        return reasons[0]
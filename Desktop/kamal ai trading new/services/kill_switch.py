@@ -1,7 +1,9 @@
 
 from fastapi import FastAPI, HTTPException, Header, Request
 from fastapi.responses import PlainTextResponse
-from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+from core.latency import global_latency
 import os
 
 app = FastAPI(title="Kamal AI Trading - Control Service")
@@ -14,6 +16,30 @@ ORDERS_PUBLISHED = Counter("kamal_orders_published_total", "Total orders publish
 AGENT_DECISIONS = Counter("kamal_agent_decisions_total", "Total decisions made")
 SYSTEM_ENABLED = Gauge("kamal_system_enabled", "System is enabled (1) or disabled (0)")
 
+LATENCY_BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 800, 1000, 2500, 5000]
+
+class LatencyCollector:
+    """Exposes core.latency stage histograms as Prometheus histograms plus p50/p99/p999/max gauges."""
+
+    def __init__(self, recorder=global_latency):
+        self.recorder = recorder
+
+    def collect(self):
+        hist = HistogramMetricFamily("kamal_stage_latency_seconds", "Tick-to-order pipeline latency per stage", labels=["stage"])
+        quant = GaugeMetricFamily("kamal_stage_latency_quantile_seconds", "Stage latency quantiles from the HDR histogram", labels=["stage", "quantile"])
+        bounds = [int(ms * 1e6) for ms in LATENCY_BUCKETS_MS]
+        for stage, h in self.recorder.items():
+            cum = h.cumulative(bounds)
+            buckets = [(str(ms / 1000), c) for ms, c in zip(LATENCY_BUCKETS_MS, cum)] + [("+Inf", h.count)]
+            hist.add_metric([stage], buckets, h.total / 1e9)
+            for q in ("0.5", "0.99", "0.999"):
+                quant.add_metric([stage, q], h.percentile(float(q)) / 1e9)
+            quant.add_metric([stage, "1"], h.max / 1e9)
+        yield hist
+        yield quant
+
+REGISTRY.register(LatencyCollector())
+
 @app.on_event("startup")
 def startup():
     SYSTEM_ENABLED.set(1 if _enabled else 0)
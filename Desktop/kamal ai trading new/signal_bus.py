@@ -1,35 +1,82 @@
 import asyncio
-from core.bus import global_bus
-from core.events import Signal, MarketBar, OrderIntent
+from dataclasses import replace
+from typing import Iterable
+from core.bus import global_bus, TopicPolicy, symbol_key
+from core.latency import now_ns
+from core.events import Signal, MarketBar, OrderIntent, OrderExplanation, TradeFill, MarkPrice
 
 TOPIC_TICKS = 'ticks'
 TOPIC_SIGNALS = 'signals'
 TOPIC_ORDERS = 'orders'
 TOPIC_FILLS = 'fills'
 TOPIC_RISK = 'risk_alerts'
+TOPIC_EXPLANATIONS = 'explanations'
+TOPIC_MARKS = 'marks'
+
+# explanations are informational: a bounded broadcast ring, so UIs can come and go and an
+# unconsumed topic never grows
+global_bus.configure(TOPIC_EXPLANATIONS, TopicPolicy(maxsize=4096, broadcast=True))
+# only the latest mark per symbol matters to the account ledger
+global_bus.configure(TOPIC_MARKS, TopicPolicy(conflate_key=symbol_key))
+
+def _publish_fast(topic: str, item) -> None:
+    # only a full BLOCK-policy topic needs a task to wait for room
+    try:
+        global_bus.publish_nowait(topic, item)
+    except asyncio.QueueFull:
+        asyncio.create_task(global_bus.publish(topic, item))
 
 def publish_signal(signal: Signal) -> None:
-    asyncio.create_task(global_bus.publish(TOPIC_SIGNALS, signal))
+    _publish_fast(TOPIC_SIGNALS, signal)
 
 async def publish_signal_sync(signal: Signal) -> None:
     await global_bus.publish(TOPIC_SIGNALS, signal)
 
 def get_signals_queue():
-    return global_bus.topic(TOPIC_SIGNALS)
+    return global_bus.subscribe(TOPIC_SIGNALS)
 
 def publish_tick(market_bar: MarketBar) -> None:
-    asyncio.create_task(global_bus.publish(TOPIC_TICKS, market_bar))
+    # connectors should set ingest_ns when they build the bar; stamping here is the fallback
+    if not market_bar.ingest_ns:
+        market_bar = replace(market_bar, ingest_ns=now_ns())
+    _publish_fast(TOPIC_TICKS, market_bar)
+
+def publish_ticks(market_bars: Iterable[MarketBar]) -> None:
+    for bar in market_bars:
+        publish_tick(bar)
+
+def publish_bar_batch(batch) -> None:
+    """Publish a core.batch.MarketBarBatch as one message; consumers flatten it with core.events.iter_bars."""
+    # as publish_tick: stamp the rows the connector left at 0 (a read-only batch is stamped on a copy)
+    ingest = batch.data["ingest_ns"]
+    missing = ingest == 0
+    if missing.any():
+        if not batch.data.flags.writeable:
+            batch = type(batch)(batch.data.copy(), batch.symbols)
+            ingest = batch.data["ingest_ns"]
+        ingest[missing] = now_ns()
+    _publish_fast(TOPIC_TICKS, batch)
 
 async def publish_order_intent(order: OrderIntent) -> None:
     await global_bus.publish(TOPIC_ORDERS, order)
 
-async def consume_signals_forever(handler):
+def publish_fill(fill: TradeFill) -> None:
+    _publish_fast(TOPIC_FILLS, fill)
+
+def publish_mark(mark: MarkPrice) -> None:
+    _publish_fast(TOPIC_MARKS, mark)
+
+def publish_explanation(explanation: OrderExplanation) -> None:
+    _publish_fast(TOPIC_EXPLANATIONS, explanation)
+
+async def consume_signals_forever(handler, max_batch: int = 256):
     q = get_signals_queue()
     while True:
-        sig = await q.get()
+        batch = await q.get_batch(max_batch)
         try:
-            res = handler(sig)
-            if asyncio.iscoroutine(res):
-                await res
+            for sig in batch:
+                res = handler(sig)
+                if asyncio.iscoroutine(res):
+                    await res
         finally:
-            q.task_done()
+            q.batch_done(len(batch))
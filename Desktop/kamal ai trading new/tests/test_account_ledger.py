@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime
+import pytest
+
+pytest.importorskip("numpy")
+from ai.account_ledger import AccountLedger
+from ai.risk_gates import AccountSnapshot, RiskError, gate_pretrade
+from core.events import MarkPrice, OrderIntent, TradeFill
+from risk_management.pre_trade import RiskError as PreTradeRiskError, check_daily_loss
+
+DAY1, DAY2 = datetime(2024, 1, 2, 10), datetime(2024, 1, 3, 10)
+
+def _acct(**kw):
+    base = dict(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                max_total_exposure=50000, daily_loss=0.0, max_daily_loss=1000)
+    return AccountSnapshot(**{**base, **kw})
+
+def _order(symbol, side, qty):
+    return OrderIntent(id=f"{symbol}-{side}-{qty}", symbol=symbol, qty=qty, side=side, price=None, type="MARKET", meta={})
+
+def _fill(order, qty, price, ts=DAY1):
+    return TradeFill(order.id, qty, price, ts, {})
+
+def test_fills_and_marks_update_positions_and_pnl():
+    led = AccountLedger(_acct())
+    buy = _order("NIFTY", "BUY", 10)
+    led.expect(buy)
+    led.on_fill(_fill(buy, 4, 100.0))
+    led.on_fill(_fill(buy, 6, 110.0))  # partial fills average in: 10 @ 106
+    led.mark("NIFTY", 120.0)
+    snap = led.snapshot
+    assert snap.exposure == pytest.approx(1200.0) and snap.per_symbol_exposure["NIFTY"] == pytest.approx(1200.0)
+    assert snap.unrealized_pnl == pytest.approx(140.0) and snap.realized_pnl == 0.0
+    sell = _order("NIFTY", "SELL", 15)
+    led.expect(sell)
+    led.on_fill(_fill(sell, 15, 100.0))  # closes 10 at a 60 loss, opens 5 short @ 100
+    snap = led.snapshot
+    assert snap.realized_pnl == pytest.approx(-60.0)
+    assert snap.unrealized_pnl == pytest.approx(0.0) and snap.exposure == pytest.approx(500.0)
+    assert snap.capital == pytest.approx(100000 - 60.0)
+    assert snap.daily_loss == pytest.approx(60.0)
+    led.mark("NIFTY", 90.0)
+    assert led.snapshot.unrealized_pnl == pytest.approx(50.0)
+    assert led.stats()["tracked_orders"] == 0  # both orders fully filled
+
+def test_snapshots_are_immutable_views_and_swap_per_event():
+    led = AccountLedger(_acct())
+    buy = _order("BANKNIFTY", "BUY", 1)
+    led.expect(buy)
+    before = led.snapshot
+    led.on_fill(_fill(buy, 1, 400.0))
+    assert before.exposure == 0.0 and led.snapshot is not before
+    with pytest.raises(TypeError):
+        led.snapshot.per_symbol_exposure["BANKNIFTY"] = 0.0
+
+def test_daily_loss_blocks_gates_and_resets_on_new_day():
+    led = AccountLedger(_acct())
+    buy = _order("X", "BUY", 100)
+    led.expect(buy)
+    led.on_fill(_fill(buy, 100, 50.0))
+    led.on_event(MarkPrice("X", 38.0, DAY1))  # 1200 unrealized loss today
+    with pytest.raises(RiskError):
+        gate_pretrade(led.snapshot, 100.0)
+    with pytest.raises(PreTradeRiskError):
+        check_daily_loss(led.snapshot)
+    led.on_event(MarkPrice("X", 39.0, DAY2))  # new day: only today's move counts
+    assert led.snapshot.daily_loss == 0.0
+    gate_pretrade(led.snapshot, 100.0)
+
+def test_unknown_fills_are_counted_and_meta_attribution_works():
+    led = AccountLedger(_acct())
+    led.on_fill(TradeFill("nope", 1, 10.0, DAY1, {}))
+    led.on_fill(TradeFill("ext", 2, 10.0, DAY1, {"symbol": "Y", "side": "SELL"}))
+    assert led.stats()["unmatched_fills"] == 1
+    assert led.positions["Y"].qty == -2 and led.snapshot.exposure == pytest.approx(20.0)
+
+def test_ledger_consumes_fills_and_marks_from_the_bus():
+    from signal_bus import publish_fill, publish_mark
+
+    led = AccountLedger(_acct())
+    buy = _order("Z", "BUY", 5)
+    led.expect(buy)
+
+    async def main():
+        task = asyncio.create_task(led.run())
+        publish_fill(_fill(buy, 5, 10.0))
+        await asyncio.sleep(0.01)
+        for p in (11.0, 12.0, 13.0):  # conflated: only the last mark is applied
+            publish_mark(MarkPrice("Z", p))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert led.snapshot.unrealized_pnl == pytest.approx(15.0)
+    assert led.stats()["fills"] == 1 and led.stats()["marks"] == 1
+
+def test_pending_orders_reserve_exposure_and_a_position_slot():
+    led = AccountLedger(_acct())
+    a, b = _order("A", "BUY", 10), _order("B", "SELL", 4)
+    led.expect(a, 1000.0)
+    led.expect(b, 400.0)
+    snap = led.snapshot
+    assert snap.exposure == pytest.approx(1400.0) and dict(snap.per_symbol_exposure) == {"A": 1000.0, "B": 400.0}
+    led.on_fill(_fill(a, 4, 100.0))  # releases 4/10 of the reservation, books 400 of exposure
+    assert led.snapshot.exposure == pytest.approx(600.0 + 400.0 + 400.0)
+    assert led.snapshot.per_symbol_exposure["A"] == pytest.approx(400.0 + 600.0)
+    assert led.cancel(b.id) and not led.cancel(b.id)
+    assert led.snapshot.per_symbol_exposure["B"] == 0.0
+    led.on_fill(_fill(a, 6, 100.0))
+    assert led.snapshot.exposure == pytest.approx(1000.0) and led.stats()["pending_exposure"] == 0.0
+
+def test_a_burst_of_ticks_without_fills_stays_within_the_limits(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("joblib")
+    from ai.agent import AutoTradeAgent
+    from ai.model_manager import ModelManager
+    from core.bus import global_bus
+    from core.events import MarketBar
+    from core.latency import LatencyBudget
+    from risk_management.rule_engine import RiskLimits, RuleEngine
+    from signal_bus import TOPIC_ORDERS, TOPIC_TICKS, publish_tick
+
+    class _Bullish:
+        def predict_proba(self, X):
+            return np.tile([0.1, 0.9], (len(X), 1))
+
+    monkeypatch.setattr(global_bus, "_queues", {})
+    acct = _acct(max_total_exposure=9000)  # 1800 per order: room for 5
+    led = AccountLedger(acct)
+    agent = AutoTradeAgent(ModelManager(_Bullish()), acct, workers=4, ledger=led,
+                           rules=RuleEngine(RiskLimits(max_concurrent_positions=3)),
+                           latency_budget=LatencyBudget(budget_ms=60000))
+
+    async def main():
+        orders = global_bus.subscribe(TOPIC_ORDERS)
+        task = asyncio.create_task(agent.run())
+        for i in range(40):
+            publish_tick(MarketBar(f"S{i % 8}", DAY1, 100.0, 100.0, 100.0, 100.0, 1.0))
+        await asyncio.wait_for(global_bus.topic(TOPIC_TICKS).join(), 5)
+        await asyncio.wait_for(agent.drain(), 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return [orders.get_nowait() for _ in range(orders.qsize())]
+
+    sent = asyncio.run(main())
+    assert len(sent) == 5
+    assert len({o.symbol for o in sent}) <= 3
+    assert sum(o.qty * 100.0 for o in sent) <= 9000 + 1e-6
+    assert led.snapshot.exposure == pytest.approx(9000.0) and led.stats()["tracked_orders"] == 5
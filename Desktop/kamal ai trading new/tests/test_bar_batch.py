@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime
+from core.events import MarketBar, iter_bars
+
+np = pytest.importorskip("numpy")
+from core.batch import MarketBarBatch, SymbolTable
+
+def _bars():
+    return [MarketBar(s, datetime(2024, 1, 1, 9, 15, i), 1.0, 2.0, 0.5, float(i), 10.0 * i)
+            for i, s in enumerate(["NIFTY", "BANKNIFTY", "NIFTY", "FINNIFTY", "BANKNIFTY"])]
+
+def test_round_trip_and_iteration():
+    batch = MarketBarBatch.from_bars(_bars())
+    assert len(batch) == 5
+    assert list(batch) == _bars()
+    assert batch[3] == _bars()[3]
+    assert list(iter_bars([_bars()[0], batch])) == _bars()[:1] + _bars()
+
+def test_ingest_ns_is_carried_and_stamped_on_publish():
+    from dataclasses import replace
+    from signal_bus import TOPIC_TICKS, global_bus, publish_bar_batch
+    bars = [replace(b, ingest_ns=0 if i % 2 else 1000 + i) for i, b in enumerate(_bars())]
+    batch = MarketBarBatch.from_bars(bars)
+    assert [b.ingest_ns for b in batch] == [b.ingest_ns for b in bars]
+    assert batch[2].ingest_ns == 1002
+    q = global_bus.topic(TOPIC_TICKS)
+    while not q.empty():
+        q.get_nowait()
+    batch.data.flags.writeable = False
+    publish_bar_batch(batch)
+    stamped = list(iter_bars([q.get_nowait()]))
+    assert [b.ingest_ns for b in stamped[::2]] == [1000, 1002, 1004]
+    assert all(b.ingest_ns > 0 for b in stamped)
+    assert batch.data["ingest_ns"][1] == 0
+
+def test_slices_are_views():
+    batch = MarketBarBatch.from_bars(_bars())
+    view = batch[1:3]
+    assert np.shares_memory(view.data, batch.data)
+    view.data["c"][0] = 99.0
+    assert batch[1].c == 99.0
+
+def test_symbol_selection_and_latest():
+    symbols = SymbolTable(["NIFTY"])
+    batch = MarketBarBatch.from_bars(_bars(), symbols)
+    assert [b.c for b in batch.for_symbol("NIFTY")] == [0.0, 2.0]
+    assert len(batch.for_symbol("SENSEX")) == 0
+    assert [(b.symbol, b.c) for b in batch.latest_by_symbol()] == [("NIFTY", 2.0), ("FINNIFTY", 3.0), ("BANKNIFTY", 4.0)]
+
+def test_frame_round_trip():
+    pytest.importorskip("pandas")
+    nifty = MarketBarBatch.from_bars(_bars()).for_symbol("NIFTY")
+    assert list(MarketBarBatch.from_frame(nifty.to_frame(), "NIFTY")) == list(nifty)
+
+def test_tz_aware_timestamps_are_rejected_on_every_transport():
+    from datetime import timedelta, timezone
+    from core.codec import CodecError, encode
+    from core.ipc import BAR_CODEC
+    aware = MarketBar("NIFTY", datetime(2024, 1, 1, 9, 15, tzinfo=timezone(timedelta(hours=5, minutes=30))), 1.0, 1.0, 1.0, 1.0, 1.0)
+    for convert, error in ((MarketBarBatch.from_bars, ValueError), (lambda b: BAR_CODEC.encode(b[0]), ValueError),
+                           (lambda b: encode(b[0]), CodecError)):
+        with pytest.raises(error, match="tz-aware"):
+            convert([aware])
+    pd = pytest.importorskip("pandas")
+    df = MarketBarBatch.from_bars(_bars()).for_symbol("NIFTY").to_frame().tz_localize("UTC")
+    with pytest.raises(ValueError, match="tz-aware"):
+        MarketBarBatch.from_frame(df, "NIFTY")
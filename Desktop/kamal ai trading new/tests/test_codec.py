@@ -0,0 +1,99 @@
+import pickle
+import random
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("numpy")
+from core.events import MarketBar, Signal, OrderIntent, TradeFill
+from core.batch import MarketBarBatch
+from core.codec import CodecError, decode, decode_bar_batch, decode_events, encode, encode_bar_batch, encode_events
+
+SYMBOLS = ["NIFTY", "BANKNIFTY", "FINNIFTY", "RELIANCE", "टाटा"]
+
+def _ts(rng):
+    return datetime(2024, 1, 1) + timedelta(microseconds=rng.randrange(10**13))
+
+def _meta(rng):
+    choices = [{}, {"score": rng.random()}, {"score": rng.random(), "explanation": "momentum", "ok": True},
+               {"lots": rng.randrange(10), "tags": ["a", "b"], "nested": {"x": None}}]
+    return rng.choice(choices)
+
+def _event(rng):
+    sym, f = rng.choice(SYMBOLS), rng.uniform(-1e6, 1e6)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return MarketBar(sym, _ts(rng), f, f + 1, f - 1, f, rng.random() * 1e5)
+    if kind == 1:
+        return Signal(str(rng.randrange(10**9)), sym, _ts(rng), rng.choice(["buy", "sell"]), rng.random(), _meta(rng))
+    if kind == 2:
+        return OrderIntent(str(rng.randrange(10**9)), sym, rng.random() * 100, rng.choice(["BUY", "SELL"]),
+                           rng.choice([None, f]), rng.choice(["MARKET", "LIMIT"]), _meta(rng))
+    return TradeFill(str(rng.randrange(10**9)), rng.random() * 100, f, _ts(rng), _meta(rng))
+
+@pytest.mark.parametrize("seed", range(25))
+def test_round_trip_random_event_lists(seed):
+    rng = random.Random(seed)
+    events = [_event(rng) for _ in range(rng.randrange(0, 200))]
+    assert decode_events(encode_events(events)) == events
+
+def test_single_event_and_homogeneous_list():
+    rng = random.Random(0)
+    bars = [MarketBar("NIFTY", _ts(rng), 1.0, 2.0, 0.5, 1.5, 100.0) for _ in range(50)]
+    assert decode_events(encode_events(bars)) == bars
+    assert decode(encode(bars[0])) == bars[0]
+
+def test_encoding_is_smaller_than_pickle():
+    rng = random.Random(1)
+    events = [_event(rng) for _ in range(1000)]
+    assert len(encode_events(events)) < len(pickle.dumps(events, protocol=pickle.HIGHEST_PROTOCOL))
+
+def test_bar_batch_round_trip():
+    batch = MarketBarBatch.from_bars([MarketBar(s, datetime(2024, 1, 1, 9, 15, i), 1.0, 2.0, 0.5, float(i), 1.0) for i, s in enumerate(SYMBOLS)])
+    out = decode_bar_batch(encode_bar_batch(batch))
+    assert list(out) == list(batch)
+    assert decode_events(encode_bar_batch(batch)) == list(batch)
+
+def test_ingest_ns_survives_every_bar_transport():
+    bars = [MarketBar(s, datetime(2024, 1, 1), 1.0, 2.0, 0.5, 1.5, 1.0, 10**15 + i) for i, s in enumerate(SYMBOLS)]
+    expected = [b.ingest_ns for b in bars]
+    assert [b.ingest_ns for b in decode_events(encode_events(bars))] == expected
+    assert decode(encode(bars[1])).ingest_ns == expected[1]
+    batch = MarketBarBatch.from_bars(bars)
+    assert [b.ingest_ns for b in decode_bar_batch(encode_bar_batch(batch))] == expected
+    assert [b.ingest_ns for b in decode_events(encode_bar_batch(batch))] == expected
+
+def test_strings_may_contain_nul_and_any_unicode():
+    ts = datetime(2024, 1, 1)
+    events = [Signal("a\0b", "\0", ts, "", 0.5, {"k\0": "v\0"}), Signal("", "टाटा\0x", ts, "buy\0sell", 0.1, {}),
+              TradeFill("\0\0", 1.0, 2.0, ts, {})]
+    assert decode_events(encode_events(events)) == events
+
+def test_tz_aware_timestamps_are_rejected():
+    aware = datetime(2024, 1, 1, 9, 15, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    with pytest.raises(CodecError, match="tz-aware"):
+        encode(MarketBar("NIFTY", aware, 1.0, 1.0, 1.0, 1.0, 1.0))
+
+def test_rejects_foreign_payloads():
+    with pytest.raises(CodecError):
+        decode_events(b"not an event payload")
+    data = bytearray(encode_events([]))
+    data[4] = 99
+    with pytest.raises(CodecError):
+        decode_events(bytes(data))
+    data = encode_events([TradeFill("order-1", 1.0, 2.0, datetime(2024, 1, 1), {})])
+    with pytest.raises(CodecError):
+        decode_events(data[:20])
+
+def test_every_truncation_is_a_codec_error():
+    rng = random.Random(3)
+    events = [_event(rng) for _ in range(12)]
+    batch = MarketBarBatch.from_bars([MarketBar(s, datetime(2024, 1, 1), 1.0, 2.0, 0.5, 1.5, 1.0) for s in SYMBOLS])
+    for data in (encode_events(events), encode_bar_batch(batch)):
+        for cut in range(len(data)):
+            with pytest.raises(CodecError):
+                decode_events(data[:cut])
+
+@pytest.mark.parametrize("meta", [{"t": (1, 2)}, {1: "x"}, {"n": {2: 0}}, {"s": {1}}, {"d": datetime(2024, 1, 1)}, {"l": [object()]}])
+def test_non_json_meta_is_rejected(meta):
+    with pytest.raises(CodecError, match="meta is not JSON"):
+        encode(TradeFill("o", 1.0, 2.0, datetime(2024, 1, 1), meta))
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression, Ridge
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+from ai.compiled_models import EVALUATORS, compile_model
+from ai.model_manager import ModelManager
+
+rng = np.random.default_rng(3)
+X = rng.normal(size=(800, 5))
+Y_BIN = (X[:, 0] + X[:, 1] ** 2 > 0.5).astype(int)
+Y_MULTI = np.digitize(X[:, 0], [-0.5, 0.5])
+Y_REG = 2 * X[:, 0] + np.sin(X[:, 1])
+X_TEST = rng.normal(size=(300, 5))
+
+CASES = [
+    (LogisticRegression(), Y_BIN), (LogisticRegression(), Y_MULTI), (LinearRegression(), Y_REG), (Ridge(), Y_REG),
+    (DecisionTreeClassifier(max_depth=6), Y_MULTI), (DecisionTreeRegressor(), Y_REG),
+    (RandomForestClassifier(20, max_depth=8, random_state=0), Y_BIN), (ExtraTreesClassifier(10, random_state=0), Y_MULTI),
+    (RandomForestRegressor(10, random_state=0), Y_REG), (GradientBoostingClassifier(n_estimators=30), Y_BIN),
+    (GradientBoostingClassifier(n_estimators=10), Y_MULTI), (GradientBoostingRegressor(n_estimators=30), Y_REG),
+]
+
+@pytest.mark.parametrize("model,y", CASES, ids=lambda c: type(c).__name__ if hasattr(c, "fit") else "")
+def test_compiled_predictions_match_sklearn(model, y):
+    model.fit(X, y)
+    compiled = compile_model(model)
+    if hasattr(model, "predict_proba"):
+        np.testing.assert_allclose(compiled.predict_proba(X_TEST), model.predict_proba(X_TEST), atol=1e-12)
+        assert np.array_equal(compiled.predict(X_TEST), model.predict(X_TEST))
+        # the scalar path taken for a single row agrees with the vectorized one
+        np.testing.assert_allclose(compiled.predict_proba(X_TEST[0]), model.predict_proba(X_TEST[:1]), atol=1e-12)
+    else:
+        np.testing.assert_allclose(compiled.predict(X_TEST), model.predict(X_TEST), atol=1e-12)
+    arrays = compiled.arrays()
+    restored = EVALUATORS[compiled.kind].from_arrays(arrays)
+    assert np.array_equal(restored.predict_proba(X_TEST), compiled.predict_proba(X_TEST))
+    if "children" in arrays:  # versions stored before children/is_leaf still load
+        old = {k: v for k, v in arrays.items() if k not in ("children", "is_leaf")}
+        old["right"], old["left"] = arrays["children"]
+        assert np.array_equal(EVALUATORS[compiled.kind].from_arrays(old).predict_proba(X_TEST), compiled.predict_proba(X_TEST))
+
+def test_missing_values_follow_the_learned_direction():
+    Xn = np.where(rng.random(X.shape) < 0.1, np.nan, X)
+    model = RandomForestClassifier(5, random_state=0).fit(Xn, Y_BIN)
+    probe = np.where(rng.random(X_TEST.shape) < 0.2, np.nan, X_TEST)
+    np.testing.assert_allclose(compile_model(model).predict_proba(probe), model.predict_proba(probe), atol=1e-12)
+
+def test_model_manager_switches_to_compiled_evaluator():
+    mm = ModelManager(LogisticRegression().fit(X, Y_BIN))
+    mm.compile(check_X=X_TEST)
+    assert mm.compiled is not None
+    np.testing.assert_allclose(mm.predict_proba([X_TEST[0]]), mm.model.predict_proba(X_TEST[:1]))
+    mm.train(X, 1 - Y_BIN)
+    assert mm.compiled is None
+
+def test_unsupported_models_are_rejected():
+    from sklearn.neighbors import KNeighborsClassifier
+    with pytest.raises(TypeError):
+        compile_model(KNeighborsClassifier().fit(X, Y_BIN))
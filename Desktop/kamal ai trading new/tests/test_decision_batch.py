@@ -0,0 +1,113 @@
+import asyncio
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("joblib")
+from ai.decision_maker import DecisionMaker
+from ai.model_manager import ModelManager
+from ai.risk_gates import AccountSnapshot
+from core.latency import now_ns
+
+class _RowWise:
+    """Scores each row independently with elementwise ops, so batch and single calls agree exactly."""
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        p = 1 / (1 + np.exp(-X[:, -1]))
+        return np.column_stack([1 - p, p])
+
+def _strip(res):
+    out = {k: v for k, v in res.items() if k not in ("order", "explanation")}
+    if "order" in res:
+        o = res["order"]
+        out["order"] = (o.symbol, o.qty, o.side, o.type, o.meta["score"], o.meta["ingest_ns"])
+    return out
+
+def test_decide_batch_matches_the_per_tick_loop():
+    rng = random.Random(4)
+    acct = AccountSnapshot(capital=100000, exposure=48500.0, per_symbol_exposure={}, max_risk_per_trade=0.015,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    single = DecisionMaker(ModelManager(_RowWise()))
+    batch = DecisionMaker(ModelManager(_RowWise()))
+    symbols = [f"S{i}" for i in range(12)]
+
+    async def main():
+        seen = {"ok": 0, "blocked": 0}
+        for cycle in range(40):
+            syms = [rng.choice(symbols) for _ in range(20)]  # repeats within a cycle
+            prices = [100 + rng.gauss(0, 3) for _ in syms]
+            t0 = now_ns()
+            ingest = list(range(t0, t0 + 20))
+            expected = [await single.decide_from_price(s, p, acct, ingest_ns=i) for s, p, i in zip(syms, prices, ingest)]
+            got = await batch.decide_batch(syms, prices, acct, ingest_ns=ingest)
+            assert [_strip(r) for r in got] == [_strip(r) for r in expected]
+            for r in got:
+                seen[r["decision"]] += 1
+        return seen
+
+    seen = asyncio.run(main())
+    assert seen["ok"] and seen["blocked"]  # both branches were exercised
+
+def test_daily_loss_blocks_the_whole_batch():
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=2000, max_daily_loss=1000)
+    res = asyncio.run(DecisionMaker(ModelManager(_RowWise())).decide_batch(["A", "B"], [10.0, 20.0], acct))
+    assert [r["reason"] for r in res] == ["pretrade: daily loss breached"] * 2
+
+@pytest.mark.parametrize("limits", [None, {"max_concurrent_positions": 4}])
+def test_with_a_ledger_the_batch_gates_like_the_per_tick_loop(limits):
+    from ai.account_ledger import AccountLedger
+    from risk_management.rule_engine import RiskLimits, RuleEngine
+    rng = random.Random(7)
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=12000, daily_loss=0, max_daily_loss=1000)
+    rules = None if limits is None else RuleEngine(RiskLimits(**limits))
+    single = DecisionMaker(ModelManager(_RowWise()), rules=rules, ledger=AccountLedger(acct))
+    batch = DecisionMaker(ModelManager(_RowWise()), rules=rules, ledger=AccountLedger(acct))
+    symbols = [f"S{i}" for i in range(10)]
+
+    async def main():
+        seen = {"ok": 0, "blocked": 0}
+        for cycle in range(6):
+            syms = [rng.choice(symbols) for _ in range(6)]
+            prices = [100 + rng.gauss(0, 3) for _ in syms]
+            expected = [await single.decide_from_price(s, p, acct) for s, p in zip(syms, prices)]
+            got = await batch.decide_batch(syms, prices, acct)
+            assert [_strip(r) for r in got] == [_strip(r) for r in expected]
+            assert batch.ledger.snapshot.exposure == pytest.approx(single.ledger.snapshot.exposure)
+            for r in got:
+                seen[r["decision"]] += 1
+        return seen
+
+    seen = asyncio.run(main())
+    assert seen["ok"] and seen["blocked"]
+
+def test_without_a_ledger_batch_entries_are_gated_independently():
+    from risk_management.rule_engine import RiskLimits, RuleEngine
+    acct = AccountSnapshot(capital=100000, exposure=1000.0, per_symbol_exposure={"A": 1000.0}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    dm = DecisionMaker(ModelManager(_RowWise()), rules=RuleEngine(RiskLimits(max_concurrent_positions=2)))
+    res = asyncio.run(dm.decide_batch(["B", "C", "B", "A"], [10.0, 20.0, 11.0, 30.0], acct))
+    assert [r["decision"] for r in res] == ["ok"] * 4  # nothing records B's order before C is gated
+    res = asyncio.run(dm.decide_from_price("C", 20.0, AccountSnapshot(**{**acct.__dict__, "per_symbol_exposure": {"A": 1.0, "B": 1.0}})))
+    assert (res["decision"], res["reason"]) == ("blocked", "max_concurrent_positions")
+
+def test_a_feature_hub_is_advanced_with_the_store():
+    from ai.feature_graph import FeatureGraph
+    from ai.feature_hub import FeatureHub
+    from trading_strategies.intraday import IntradayStrategy
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    hub = FeatureHub(FeatureGraph())
+    IntradayStrategy(hub)
+    dm = DecisionMaker(ModelManager(_RowWise()), hub=hub)
+
+    async def main():
+        for p in range(30):
+            await dm.decide_batch(["A", "B"], [100.0 + p, 50.0 - p], acct)
+            await dm.decide_from_price("A", 100.5 + p, acct)
+    asyncio.run(main())
+    assert hub.count("A") == 60 and hub.count("B") == 30
+    for s in ("A", "B"):
+        assert hub.values(s, ["intraday.ma_slow"])["intraday.ma_slow"] == dm.feature_store.features(s)["ma_21"]
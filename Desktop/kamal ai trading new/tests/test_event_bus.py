@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+from core.bus import EventBus, TopicPolicy, DROP_OLDEST, DROP_NEWEST, symbol_key
+from core.events import MarketBar, merge_bars
+
+def _bar(symbol, c):
+    return MarketBar(symbol=symbol, ts=datetime(2024, 1, 1), o=c, h=c, l=c, c=c, v=1.0)
+
+def _drain(q):
+    out = []
+    while not q.empty():
+        out.append(q.get_nowait())
+        q.task_done()
+    return out
+
+def test_drop_oldest_keeps_latest_items():
+    bus = EventBus({"t": TopicPolicy(maxsize=3, overflow=DROP_OLDEST)})
+    for i in range(5):
+        bus.publish_nowait("t", i)
+    assert _drain(bus.topic("t")) == [2, 3, 4]
+    assert bus.stats()["t"]["dropped"] == 2
+
+def test_drop_newest_keeps_first_items():
+    bus = EventBus({"t": TopicPolicy(maxsize=2, overflow=DROP_NEWEST)})
+    for i in range(4):
+        asyncio.run(bus.publish("t", i))
+    assert _drain(bus.topic("t")) == [0, 1]
+    assert bus.stats()["t"]["dropped"] == 2
+
+def test_conflate_by_symbol_keeps_latest_bar():
+    bus = EventBus()
+    bus.configure("ticks", TopicPolicy(conflate_key=symbol_key))
+    for sym, c in [("NIFTY", 1), ("BANKNIFTY", 2), ("NIFTY", 3), ("NIFTY", 4)]:
+        bus.publish_nowait("ticks", _bar(sym, c))
+    out = _drain(bus.topic("ticks"))
+    assert [(b.symbol, b.c) for b in out] == [("NIFTY", 4), ("BANKNIFTY", 2)]
+    assert bus.stats()["ticks"]["merged"] == 2
+    assert bus.topic("ticks")._unfinished_tasks == 0
+
+def test_conflate_with_merge_folds_bars_into_ohlcv():
+    bus = EventBus({"ticks": TopicPolicy(conflate_key=symbol_key, conflate_merge=merge_bars)})
+    for sym, c in [("NIFTY", 3), ("NIFTY", 5), ("BANKNIFTY", 2), ("NIFTY", 1), ("NIFTY", 4)]:
+        bus.publish_nowait("ticks", _bar(sym, c))
+    nifty, bank = _drain(bus.topic("ticks"))
+    assert (nifty.o, nifty.h, nifty.l, nifty.c, nifty.v) == (3, 5, 1, 4, 4.0)
+    assert bank.c == 2 and bus.stats()["ticks"]["merged"] == 3
+
+def test_broadcast_delivers_every_item_to_each_subscriber():
+    bus = EventBus({"ticks": TopicPolicy(broadcast=True, maxsize=8)})
+    a, b = bus.subscribe("ticks"), bus.subscribe("ticks")
+    for i in range(3):
+        bus.publish_nowait("ticks", i)
+    assert _drain(a) == [0, 1, 2]
+    assert b.lag == 3
+    assert asyncio.run(b.get()) == 0
+
+def test_broadcast_slow_subscriber_does_not_block_publisher():
+    bus = EventBus({"ticks": TopicPolicy(broadcast=True, maxsize=4)})
+    slow, lagging = bus.subscribe("ticks"), bus.subscribe("ticks")
+    for i in range(10):
+        bus.publish_nowait("ticks", i)
+    assert _drain(slow) == [6, 7, 8, 9]
+    assert slow.missed == 6
+    assert lagging.skip_to_head() == 10
+    assert lagging.empty()
+    bus.publish_nowait("ticks", 10)
+    assert lagging.get_nowait() == 10
+
+def test_broadcast_get_wakes_on_publish():
+    async def main():
+        bus = EventBus({"ticks": TopicPolicy(broadcast=True)})
+        subs = [bus.subscribe("ticks") for _ in range(2)]
+        waiters = [asyncio.create_task(s.get()) for s in subs]
+        await asyncio.sleep(0)
+        bus.publish_nowait("ticks", "x")
+        return await asyncio.gather(*waiters)
+    assert asyncio.run(main()) == ["x", "x"]
+
+def test_get_batch_drains_up_to_max_n():
+    async def main():
+        bus = EventBus()
+        bus.publish_many("t", range(5))
+        first = await bus.get_batch("t", max_n=3)
+        rest = await bus.get_batch("t", max_n=3)
+        empty = await bus.get_batch("t", max_n=3, timeout=0.01)
+        return first, rest, empty, bus.topic("t")._unfinished_tasks
+    assert asyncio.run(main()) == ([0, 1, 2], [3, 4], [], 0)
+
+def test_publish_tick_needs_no_running_loop():
+    import signal_bus
+    from core.bus import global_bus
+    signal_bus.publish_tick(_bar("NIFTY", 1))
+    assert _drain(global_bus.topic(signal_bus.TOPIC_TICKS))[0].c == 1
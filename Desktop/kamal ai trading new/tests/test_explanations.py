@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from ai.explanations import ExplanationService
+from ai.llm_interface import HTTPChatAdapter
+
+class _StubLLM(BaseHTTPRequestHandler):
+    calls = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        _StubLLM.calls.append(body["messages"][0]["content"])
+        time.sleep(0.05)
+        out = json.dumps({"choices": [{"message": {"content": f"stub #{len(_StubLLM.calls)}"}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    _StubLLM.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubLLM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+def test_quantized_prompts_are_deduplicated_and_cached(stub_server):
+    seen = []
+    svc = ExplanationService(HTTPChatAdapter(stub_server), on_explanation=seen.append)
+    feats = {"ma_3": 101.234, "momentum_8": 0.51234}
+
+    async def main():
+        assert svc.request("o1", "NIFTY", feats, 0.81) is None
+        assert svc.request("o2", "NIFTY", {"ma_3": 101.236, "momentum_8": 0.5121}, 0.79) is None  # same bucket
+        await svc.drain()
+        return svc.request("o3", "NIFTY", feats, 0.8)
+
+    cached = asyncio.run(main())
+    assert len(_StubLLM.calls) == 1 and cached == "stub #1"
+    assert {e.order_id: e.cached for e in seen} == {"o1": False, "o2": False, "o3": True}
+    assert svc.get("o2") == "stub #1"
+    assert svc.stats()["joined_inflight"] == 1 and svc.stats()["hits"] == 1
+
+def test_concurrency_and_rate_limits():
+    class Slow:
+        active = peak = 0
+
+        async def explain(self, prompt, max_tokens=256):
+            Slow.active += 1
+            Slow.peak = max(Slow.peak, Slow.active)
+            await asyncio.sleep(0.01)
+            Slow.active -= 1
+            return prompt
+
+    svc = ExplanationService(Slow(), max_concurrency=2, rate_per_s=50, burst=2)
+
+    async def main():
+        t0 = time.perf_counter()
+        for i in range(8):
+            svc.request(f"o{i}", "NIFTY", {"x": float(i)}, 0.5)
+        await svc.drain()
+        return time.perf_counter() - t0
+
+    elapsed = asyncio.run(main())
+    assert Slow.peak == 2 and svc.stats()["llm_calls"] == 8
+    assert elapsed >= 6 / 50 * 0.9  # burst of 2, then 50/s
+
+def test_orders_are_not_held_up_by_the_llm():
+    pytest.importorskip("joblib")
+    from ai.decision_maker import DecisionMaker
+    from ai.model_manager import ModelManager
+    from ai.risk_gates import AccountSnapshot
+    from core.bus import global_bus
+    from signal_bus import TOPIC_EXPLANATIONS
+
+    class Always:
+        def predict_proba(self, X):
+            return [[0.2, 0.8] for _ in X]
+
+    class Sleepy:
+        async def explain(self, prompt, max_tokens=256):
+            await asyncio.sleep(0.2)
+            return "late but cached"
+
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    dm = DecisionMaker(ModelManager(model=Always()), llm=Sleepy())
+
+    async def main():
+        sub = global_bus.subscribe(TOPIC_EXPLANATIONS)
+        t0 = time.perf_counter()
+        res = await dm.decide_from_price("NIFTY", 100.0, acct)
+        dm.explain(res)  # as the publisher does once the order is out
+        took = time.perf_counter() - t0
+        await dm.explainer.drain()
+        return res, took, sub.get_nowait()
+
+    res, took, event = asyncio.run(main())
+    assert res["decision"] == "ok" and res["explanation"] is None and took < 0.1
+    assert event.order_id == res["order"].id and event.text == "late but cached"
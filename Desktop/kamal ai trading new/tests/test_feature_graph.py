@@ -0,0 +1,107 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.feature_graph import FeatureGraph, FEATURES, close, high, label, rsi
+
+def test_identical_subexpressions_share_one_node():
+    g = FeatureGraph()
+    g.register("a.slow", close.rolling(21).mean())
+    g.register("b.ma_21", close.rolling(21).mean())
+    g.register("b.momentum", close - close.rolling(21).mean())
+    plan = g.plan(["a.slow", "b.ma_21", "b.momentum"])
+    assert [e.op for e in plan.nodes].count("rolling_mean") == 1
+    assert g.node_count == 3
+
+def test_plan_evaluates_only_requested_features():
+    g = FeatureGraph()
+    g.register("rsi", rsi(14))
+    g.register("high_20", high.rolling(20).max())
+    plan = g.plan(["high_20"])
+    assert plan.sources == ["high"]
+    assert {e.op for e in plan.nodes} == {"source", "rolling_max"}
+
+def test_conflicting_registration_is_rejected():
+    g = FeatureGraph()
+    g.register("x", close.rolling(3).mean())
+    g.register("x", close.rolling(3).mean())
+    with pytest.raises(ValueError):
+        g.register("x", close.rolling(4).mean())
+
+def test_cost_report_lists_nodes_and_consumers():
+    g = FeatureGraph()
+    g.register("ma", close.rolling(9).mean())
+    g.register("rsi", rsi(9))
+    plan = g.plan(["ma", "rsi"])
+    ev = plan.stream(profile=True)
+    for p in range(30):
+        ev.update(100.0 + p % 7)
+    report = plan.cost_report()
+    assert all(r["calls"] == 30 for r in report)
+    shift = next(r for r in report if r["node"] == "close.shift(1)")
+    assert shift["consumers"] == ["rsi"]
+
+def _ohlc(n, seed=2):
+    rng, p, rows = random.Random(seed), 20000.0, []
+    for _ in range(n):
+        p += rng.gauss(5, 20)
+        rows.append((p, p + rng.random() * 30, p - rng.random() * 30))
+    return rows
+
+def test_a_shared_node_runs_once_per_bar_across_consumers():
+    from ai.feature_hub import FeatureHub
+    from ai.feature_store import RollingFeatureComputer
+    from trading_strategies.intraday import IntradayStrategy
+    hub = FeatureHub(FeatureGraph(), profile=True)
+    IntradayStrategy(hub)
+    rfc = RollingFeatureComputer(hub=hub, symbol="NIFTY")
+    rows = _ohlc(120)
+    for c, h, l in rows:
+        rfc.update(c, h, l)
+    ma_21 = [r for r in hub.cost_report() if r["node"] == label(close.rolling(21).mean())]
+    assert len(ma_21) == 1
+    assert ma_21[0]["calls"] == len(rows)
+    assert {"intraday.ma_slow", "ma_21"} <= set(ma_21[0]["consumers"])
+    assert rfc.features()["ma_21"] == hub.values("NIFTY", ["intraday.ma_slow"])["intraday.ma_slow"]
+
+def test_store_provided_nodes_are_not_stepped_again():
+    from ai.feature_hub import FeatureHub
+    from ai.vector_features import VectorFeatureStore
+    from trading_strategies.intraday import IntradayStrategy
+    hub = FeatureHub(FeatureGraph(), profile=True)
+    IntradayStrategy(hub)
+    store = VectorFeatureStore()
+    hub.attach(store)
+    for c, h, l in _ohlc(60):
+        hub.update(["NIFTY", "BANK"], [c, c / 2], [h, h / 2], [l, l / 2])
+    report = {r["node"]: r["calls"] for r in hub.cost_report()}
+    assert report[label(close.rolling(21).mean())] == 0
+    assert report[label(close.rolling(9).mean())] == 120
+    assert hub.values("BANK", ["intraday.ma_slow"])["intraday.ma_slow"] == store.features("BANK")["ma_21"]
+    assert hub.count("NIFTY") == 60
+    with pytest.raises(RuntimeError):
+        hub.graph.register("late", close.rolling(5).mean())
+        hub.update(["NIFTY"], [1.0])
+
+def test_strategies_read_the_hub_like_a_batch_recompute():
+    pd = pytest.importorskip("pandas")
+    from ai.feature_hub import FeatureHub
+    from trading_strategies.delivery import DeliveryStrategy
+    from trading_strategies.intraday import IntradayStrategy
+    assert {"intraday.ma_slow", "intraday.rsi", "delivery.atr"} <= set(FEATURES.outputs)
+    hub = FeatureHub(FeatureGraph())
+    streamed = [IntradayStrategy(hub), DeliveryStrategy(hub)]
+    batch = [IntradayStrategy(), DeliveryStrategy()]
+    rows = _ohlc(160)
+    seen = 0
+    for i, (c, h, l) in enumerate(rows):
+        hub.update(["NIFTY"], [c], [h], [l])
+        df = pd.DataFrame(rows[:i + 1], columns=["close", "high", "low"])
+        for s, b in zip(streamed, batch):
+            got, want = s.generate(df, "NIFTY"), b.generate(df, "NIFTY")
+            assert (got is None) == (want is None)
+            if got is not None:
+                seen += 1
+                assert got.side == want.side
+                assert got.meta == pytest.approx(want.meta, rel=1e-9)
+    assert seen
@@ -0,0 +1,57 @@
+import os
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.feature_cache import FeatureMaterializer, feature_set_hash
+from ai.feature_graph import FeatureGraph, catalog
+
+NAMES = ["ma_3", "ma_21", "momentum_8", "rsi_14", "atr_14", "zscore_21", "std_21", "vwap_21",
+         "ema_9", "high_20", "low_20"]
+
+def _graph():
+    g = FeatureGraph()
+    for name in NAMES:
+        g.register(name, catalog(name))
+    return g
+
+def _ohlcv(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    close[500:600] = close[499]  # flat stretch: zero variance and zero losses
+    spread = np.abs(rng.normal(0, 0.3, n))
+    return {"open": close + rng.normal(0, 0.1, n), "high": close + spread, "low": close - spread,
+            "close": close, "volume": rng.integers(100, 1000, n).astype(float)}
+
+def test_streaming_matches_batch_bit_for_bit():
+    data = _ohlcv()
+    plan = _graph().plan(NAMES)
+    batch = plan.compute(data)
+    ev = plan.stream()
+    rows = []
+    for o, h, l, c, v in zip(data["open"], data["high"], data["low"], data["close"], data["volume"]):
+        ev.update(c, high=h, low=l, volume=v, open=o)
+        rows.append(ev.values())
+    for name in NAMES:
+        online = np.array([r[name] for r in rows])
+        assert np.array_equal(online.view(np.int64), batch[name].view(np.int64)), name
+
+def test_materializer_caches_and_invalidates(tmp_path):
+    g = _graph()
+    data = _ohlcv(500)
+    store = FeatureMaterializer(root=str(tmp_path), graph=g)
+    first = store.materialize("ABC", data, NAMES)
+    again = store.materialize("ABC", data, NAMES)
+    assert (store.misses, store.hits) == (1, 1)
+    assert isinstance(again["ma_21"], np.memmap)
+    for name in NAMES:
+        assert np.array_equal(np.asarray(first[name]), g.plan([name]).compute(data)[name], equal_nan=True)
+    revised = dict(data, close=data["close"] + 1.0)
+    store.materialize("ABC", revised, NAMES)
+    assert store.misses == 2
+    assert not [p for p in os.listdir(os.path.dirname(store.path("ABC", NAMES, data))) if p.startswith(".tmp-")]
+
+def test_feature_set_hash_tracks_definitions():
+    g1, g2 = FeatureGraph(), FeatureGraph()
+    g1.register("ma", catalog("ma_3"))
+    g2.register("ma", catalog("ma_4"))
+    assert feature_set_hash(["ma"], g1) != feature_set_hash(["ma"], g2)
@@ -0,0 +1,88 @@
+import random
+import statistics
+import pytest
+from ai.feature_store import RollingFeatureComputer
+from ai.streaming_stats import EMA, RollingWindow
+
+def _walk(n, seed=3, start=20000.0):
+    rng, p, out = random.Random(seed), start, []
+    for _ in range(n):
+        p += rng.gauss(0, 15)
+        out.append(p)
+    return out
+
+def test_rolling_window_matches_naive_statistics():
+    prices = _walk(500)
+    w = RollingWindow(21, track_minmax=True)
+    for i, p in enumerate(prices):
+        w.push(p)
+        window = prices[max(0, i - 20):i + 1]
+        assert w.mean == pytest.approx(sum(window) / len(window), rel=1e-12)
+        assert w.std == pytest.approx(statistics.pstdev(window), rel=1e-6, abs=1e-9)
+        assert (w.min, w.max) == (min(window), max(window))
+
+def test_rolling_window_does_not_drift_on_long_trending_runs():
+    rng, p, w = random.Random(7), 20000.0, RollingWindow(21)
+    for _ in range(200_000):  # trends far from the first price, where fixed-shift sums lose precision
+        p += 0.05 + rng.gauss(0, 0.5)
+        w.push(p)
+    window = list(w.buf)
+    assert w.mean == pytest.approx(statistics.fmean(window), rel=1e-12)
+    assert w.std == pytest.approx(statistics.pstdev(window), rel=1e-12)
+
+def test_ema_seeds_with_first_value():
+    e = EMA(9)
+    for p in (10.0, 20.0):
+        e.push(p)
+    assert e.value == pytest.approx(10.0 + 0.2 * 10.0)
+
+def test_default_features_keep_their_names_and_order():
+    fc = RollingFeatureComputer()
+    assert list(fc.features()) == ["ma_3", "ma_8", "ma_21", "momentum_8"]
+    for p in (1.0, 2.0, 3.0, 4.0):
+        fc.update(p)
+    f = fc.features()
+    assert f["ma_3"] == pytest.approx(3.0)
+    assert f["momentum_8"] == pytest.approx(4.0 - 2.5)
+
+def test_names_follow_the_plan_without_touching_the_shared_graph():
+    from ai.feature_graph import FEATURES, FeatureGraph
+    before = dict(FEATURES.outputs)
+    fc = RollingFeatureComputer(window_sizes=[3, 21], extras=["ma_21", "rsi_14"])
+    assert FEATURES.outputs == before
+    for p in (1.0, 2.0, 3.0):
+        fc.update(p)
+    f = fc.features()
+    assert list(f) == ["ma_3", "ma_21", "momentum_8", "rsi_14"]  # the repeated extra appears once
+    assert (f["ma_3"], f["ma_21"], f["momentum_8"]) == (2.0, 2.0, 0.0)
+    shared = FeatureGraph()
+    RollingFeatureComputer(graph=shared)
+    assert "ma_21" in shared
+
+def test_catalog_matches_pandas_definitions():
+    pd = pytest.importorskip("pandas")
+    rng = random.Random(5)
+    close = _walk(300)
+    high = [c + rng.random() * 10 for c in close]
+    low = [c - rng.random() * 10 for c in close]
+    vol = [rng.randrange(1, 1000) * 1.0 for _ in close]
+    fc = RollingFeatureComputer(extras=["rsi_14", "atr_14", "zscore_21", "vwap_21", "high_20", "low_20"])
+    for c, h, l, v in zip(close, high, low, vol):
+        fc.update(c, h, l, v)
+    f = fc.features()
+    df = pd.DataFrame({"close": close, "high": high, "low": low, "volume": vol})
+    delta = df["close"].diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = 100 - 100 / (1 + gain / loss.replace(0, 1e-9))
+    tr = pd.concat([df.high - df.low, (df.high - df.close.shift()).abs(), (df.low - df.close.shift()).abs()], axis=1).max(axis=1)
+    assert f["rsi_14"] == pytest.approx(rsi.iloc[-1], rel=1e-9)
+    assert f["atr_14"] == pytest.approx(tr.rolling(14).mean().iloc[-1], rel=1e-9)
+    tail = df.iloc[-21:]
+    assert f["vwap_21"] == pytest.approx((tail.close * tail.volume).sum() / tail.volume.sum(), rel=1e-12)
+    assert f["zscore_21"] == pytest.approx((close[-1] - tail.close.mean()) / tail.close.std(ddof=0), rel=1e-6)
+    assert (f["high_20"], f["low_20"]) == (max(high[-20:]), min(low[-20:]))
+
+def test_unknown_feature_is_rejected():
+    with pytest.raises(ValueError):
+        RollingFeatureComputer(extras=["macd_12"])
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.inference_batcher import InferenceBatcher
+from ai.model_manager import ModelManager
+
+class _Sigmoid:
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        self.calls.append(len(X))
+        p = 1 / (1 + np.exp(-X.sum(axis=1)))
+        return np.column_stack([1 - p, p])
+
+def test_concurrent_requests_share_one_call_and_match_direct_scores():
+    model = _Sigmoid()
+    batcher = InferenceBatcher(ModelManager(model), max_batch=64, max_wait_ms=0)
+    rows = [[i * 0.01, -0.5, 0.2] for i in range(150)]
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict_proba(r) for r in rows))
+
+    out = asyncio.run(main())
+    assert model.calls == [64, 64, 22]
+    assert np.array_equal(np.array(out), _Sigmoid().predict_proba(rows))
+    assert batcher.stats()["mean_batch"] == 50
+
+def test_window_collects_requests_arriving_late():
+    model = _Sigmoid()
+    batcher = InferenceBatcher(ModelManager(model), max_batch=256, max_wait_ms=20)
+
+    async def late(r):
+        await asyncio.sleep(0.002)
+        return await batcher.predict_proba(r)
+
+    async def main():
+        await asyncio.gather(batcher.predict_proba([0.0]), late([1.0]))
+
+    asyncio.run(main())
+    assert model.calls == [2]
+
+def test_model_errors_reach_every_caller():
+    class Broken:
+        def predict_proba(self, X):
+            raise RuntimeError("boom")
+    batcher = InferenceBatcher(ModelManager(Broken()), max_wait_ms=0)
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict_proba([1.0]) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(e, RuntimeError) for e in asyncio.run(main()))
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.inference_batcher import InferenceBatcher
+from ai.inference_executor import InferenceUnavailable, ProcessInference, ThreadInference
+from ai.model_manager import ModelManager
+
+class _Model:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def predict_proba(self, X):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        p = np.full(len(X), 0.8)
+        return np.column_stack([1 - p, p])
+
+def test_thread_inference_scores_off_the_loop_with_bounded_concurrency():
+    model = _Model(delay=0.02)
+    ex = ThreadInference(ModelManager(model), max_concurrency=2, timeout_ms=2000)
+
+    async def main():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        hb = asyncio.create_task(heartbeat())
+        out = await asyncio.gather(*(ex.predict_proba([[1.0, 2.0]]) for _ in range(6)))
+        hb.cancel()
+        return out, ticks
+
+    out, ticks = asyncio.run(main())
+    ex.close()
+    assert all(o[0][1] == 0.8 for o in out)
+    assert model.peak == 2
+    assert ticks > 10  # the loop kept running while the model slept
+
+def test_timeouts_raise_and_keep_the_slot_until_done():
+    model = _Model(delay=0.2)
+    ex = ThreadInference(ModelManager(model), max_concurrency=1, timeout_ms=20)
+
+    async def main():
+        for X in ([[0.0], [0.0]], [[0.0]]):  # the second call finds the slot still busy
+            with pytest.raises(InferenceUnavailable):
+                await ex.predict_proba(X)
+
+    asyncio.run(main())
+    assert ex.stats()["timeouts"] == 2
+    ex.close()
+
+def test_timed_out_inference_publishes_no_order():
+    from datetime import datetime
+    from ai.agent import AutoTradeAgent
+    from ai.risk_gates import AccountSnapshot
+    from core.bus import global_bus
+    from core.events import MarketBar
+    from core.latency import now_ns
+    from signal_bus import TOPIC_ORDERS
+
+    mm = ModelManager(_Model(delay=0.2))
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    ex = ThreadInference(mm, max_concurrency=4, timeout_ms=20)
+    agent = AutoTradeAgent(mm, acct, inference_executor=ex)
+    orders = global_bus.topic(TOPIC_ORDERS)
+
+    async def main():
+        before = orders.qsize()
+        await agent.handle_tick(MarketBar("NIFTY", datetime(2024, 1, 1), 100, 100, 100, 100, 1, now_ns()))
+        batch = await agent.decision_maker.decide_batch(["A", "B"], [10.0, 20.0], acct, ingest_ns=now_ns())
+        return orders.qsize() - before, batch
+
+    published, batch = asyncio.run(main())
+    ex.close()
+    assert published == 0
+    assert [r["decision"] for r in batch] == ["no_score", "no_score"]
+    assert agent.decision_maker.no_score == 3
+
+def test_batcher_hands_stacked_rows_to_the_executor():
+    model = _Model()
+    mm = ModelManager(model)
+    batcher = InferenceBatcher(mm, max_wait_ms=0, executor=ThreadInference(mm, timeout_ms=2000))
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict_proba([float(i)]) for i in range(5)))
+
+    assert [o[1] for o in asyncio.run(main())] == [0.8] * 5
+    assert batcher.stats()["batches"] == 1
+
+def test_process_inference_uses_shared_memory_and_follows_hot_swaps():
+    pytest.importorskip("sklearn")
+    from sklearn.linear_model import LogisticRegression
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    mm = ModelManager(LogisticRegression().fit(X, y))
+    flipped = LogisticRegression().fit(X, 1 - y)
+    ex = ProcessInference(mm, workers=1, max_rows=64)  # default 50 ms budget per call
+    ex.start()
+
+    async def main():
+        small = await ex.predict_proba(X[:10])
+        large = await ex.predict_proba(X)  # above max_rows: sent inline
+        pool = ex._pool
+        mm.swap(flipped, version=2)  # pickled in the background; the old model serves meanwhile
+        for _ in range(500):
+            swapped = await ex.predict_proba(X[:10])
+            if ex.reloads:
+                swapped = await ex.predict_proba(X[:10])
+                break
+            await asyncio.sleep(0.01)
+        assert ex._pool is pool  # reloaded in place, not respawned
+        return small, large, swapped
+
+    try:
+        small, large, swapped = asyncio.run(main())
+        assert len(ex._blobs) == 1  # the superseded model's blob is gone
+    finally:
+        ex.close()
+    np.testing.assert_allclose(small, LogisticRegression().fit(X, y).predict_proba(X[:10]))
+    np.testing.assert_allclose(large, LogisticRegression().fit(X, y).predict_proba(X))
+    np.testing.assert_allclose(swapped, flipped.predict_proba(X[:10]))
+
+class _Echo:
+    """Picklable: P(up) is the row's first feature, after ``delay`` seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def predict_proba(self, X):
+        time.sleep(self.delay)
+        p = np.asarray(X)[:, 0]
+        return np.column_stack([1 - p, p])
+
+def test_a_wider_call_does_not_free_buffers_still_in_use():
+    ex = ProcessInference(ModelManager(_Echo(0.3)), workers=1, max_concurrency=3, timeout_ms=5000)
+    ex.start()
+
+    async def main():
+        running = asyncio.create_task(ex.predict_proba(np.full((2, 3), 0.25)))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(ex.predict_proba(np.full((2, 3), 0.5)))  # waits for the worker
+        await asyncio.sleep(0.05)
+        wider = await ex.predict_proba(np.full((2, 5), 0.75))
+        return await running, await queued, wider
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        ex.close()
+    assert [r[0, 1] for r in results] == [0.25, 0.5, 0.75]
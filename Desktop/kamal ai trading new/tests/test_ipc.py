@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing as mp
+import os
+from datetime import datetime
+from core.events import MarketBar, OrderIntent
+from core.ipc import BAR_CODEC, ORDER_CODEC, ShmReader, ShmRing
+
+def _name(tag):
+    return f"kbus_test_{tag}_{os.getpid()}"
+
+def _bars(n, start=0):
+    return [MarketBar("NIFTY", datetime(2024, 1, 1, 9, 15, 0, i), 1.0, 2.0, 0.5, float(i), 10.0, ingest_ns=1000 + i) for i in range(start, start + n)]
+
+def test_bar_round_trip_through_ring():
+    ring = ShmRing(_name("bars"), BAR_CODEC, capacity=16)
+    try:
+        reader = ShmReader(ring.name)
+        ring.put_many(_bars(5))
+        got = reader.read_batch(3)
+        assert got == _bars(3)
+        assert got[0].ingest_ns == _bars(1)[0].ingest_ns
+        assert reader.read_batch() == _bars(2, 3)
+        reader.close()
+    finally:
+        ring.close()
+
+def test_order_round_trip_keeps_none_price_and_meta():
+    ring = ShmRing(_name("orders"), ORDER_CODEC, capacity=4)
+    try:
+        reader = ShmReader(ring.name)
+        order = OrderIntent(id="a" * 36, symbol="BANKNIFTY", qty=15.0, side="BUY", price=None, type="MARKET", meta={"score": 0.7})
+        ring.put_nowait(order)
+        assert reader.read_batch() == [order]
+        reader.close()
+    finally:
+        ring.close()
+
+def test_lapped_reader_skips_and_counts_missed():
+    ring = ShmRing(_name("lap"), BAR_CODEC, capacity=4)
+    try:
+        reader = ShmReader(ring.name)
+        ring.put_many(_bars(10))
+        got = reader.read_batch()
+        assert [b.c for b in got] == [7.0, 8.0, 9.0]
+        assert reader.missed == 7
+        reader.close()
+    finally:
+        ring.close()
+
+def _child_reader(name, n, out):
+    async def main():
+        reader = ShmReader(name, from_start=True)
+        seen = []
+        while len(seen) < n:
+            seen.extend(b.c for b in await reader.get_batch(timeout=5))
+        reader.close()
+        return sum(seen)
+    out.put(asyncio.run(main()))
+
+def test_reader_in_another_process():
+    ring = ShmRing(_name("proc"), BAR_CODEC, capacity=1024)
+    try:
+        out = mp.Queue()
+        p = mp.Process(target=_child_reader, args=(ring.name, 100, out))
+        p.start()
+        ring.put_many(_bars(100))
+        assert out.get(timeout=10) == float(sum(range(100)))
+        p.join(5)
+    finally:
+        ring.close()
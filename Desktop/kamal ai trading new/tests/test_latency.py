@@ -0,0 +1,157 @@
+import asyncio
+import random
+import time
+import pytest
+from core.latency import LatencyBudget, LatencyHistogram, LatencyRecorder, global_latency, now_ns
+
+def test_histogram_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = sorted(rng.randrange(1, 50_000_000) for _ in range(20_000))
+    h = LatencyHistogram()
+    for v in values:
+        h.record(v)
+    for q in (0.5, 0.9, 0.99, 0.999):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(h.percentile(q) - exact) / exact < 0.05
+    assert h.percentile(1.0) == h.max == values[-1]
+
+def test_small_values_are_exact_and_cumulative_counts():
+    h = LatencyHistogram()
+    for v in (1, 2, 3, 1000, 2_000_000):
+        h.record(v)
+    assert h.percentile(0.2) == 1
+    assert h.cumulative([3, 1_000_000, 10**9]) == [3, 4, 5]
+
+def test_recorder_snapshot_reports_stages():
+    r = LatencyRecorder()
+    r.record("predict", 2_000_000)
+    snap = r.snapshot()["predict"]
+    assert snap["count"] == 1
+    assert snap["max_ms"] == pytest.approx(2.0)
+
+def test_decision_records_stage_latency_and_order_timing():
+    pytest.importorskip("joblib")
+    from ai.decision_maker import DecisionMaker
+    from ai.model_manager import ModelManager
+    from ai.risk_gates import AccountSnapshot
+
+    class Always:
+        def predict_proba(self, X):
+            return [[0.2, 0.8] for _ in X]
+
+    global_latency.reset()
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    ingest = now_ns()
+    dm = DecisionMaker(ModelManager(model=Always()))
+    res = asyncio.run(dm.decide_from_price("NIFTY", 100.0, acct, ingest_ns=ingest))
+    asyncio.run(_explain(dm, res))
+    assert res["decision"] == "ok"
+    assert res["order"].meta["ingest_ns"] == ingest
+    assert res["order"].meta["decided_ns"] > ingest
+    assert {"features", "predict", "risk_gate", "explain"} <= set(global_latency.snapshot())
+
+async def _explain(dm, res):
+    dm.explain(res)
+    await dm.explainer.drain()
+
+def test_budget_reads_policy_safeguard():
+    assert LatencyBudget.from_policies({"ai_policies": {"safeguards": {"block_if_latency_ms_above": 250}}}).budget_ms == 250
+    assert LatencyBudget.from_policies({}).budget_ms == 800
+    assert LatencyBudget(budget_ms=1).deadline(0) == 0
+    assert LatencyBudget(budget_ms=1).deadline(10) == 1_000_010
+
+def test_decisions_short_circuit_and_drop_past_deadline():
+    pytest.importorskip("joblib")
+    from ai.decision_maker import DecisionMaker
+    from ai.model_manager import ModelManager
+    from ai.risk_gates import AccountSnapshot
+
+    class Counting:
+        calls = 0
+        def predict_proba(self, X):
+            Counting.calls += 1
+            return [[0.2, 0.8] for _ in X]
+
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    budget = LatencyBudget(budget_ms=1000, min_predict_ms=300, min_explain_ms=600, fallback_max_age_ms=60_000)
+    dm = DecisionMaker(ModelManager(model=Counting()), budget=budget)
+
+    async def go():
+        fresh = await dm.decide_from_price("A", 100.0, acct, ingest_ns=now_ns())
+        # 500 ms left: model still runs, explanation is skipped
+        tight = await dm.decide_from_price("A", 100.0, acct, ingest_ns=now_ns() - 500_000_000)
+        # 100 ms left: the symbol's recent score stands in for the model
+        rushed = await dm.decide_from_price("A", 100.0, acct, ingest_ns=now_ns() - 900_000_000)
+        stale = await dm.decide_from_price("A", 100.0, acct, ingest_ns=now_ns() - 2_000_000_000)
+        batch = await dm.decide_batch(["A", "B", "C"], [101.0, 50.0, 20.0], acct,
+                                      ingest_ns=[now_ns(), now_ns() - 900_000_000, now_ns() - 2_000_000_000])
+        for res in [fresh, tight, rushed, stale] + batch:
+            dm.explain(res)
+        await dm.explainer.drain()
+        return fresh, tight, rushed, stale, batch
+
+    fresh, tight, rushed, stale, batch = asyncio.run(go())
+    assert dm.explainer.get(fresh["order"].id) is not None and dm.explainer.get(tight["order"].id) is None
+    assert rushed["decision"] == "ok" and rushed["score"] == pytest.approx(0.8)
+    assert Counting.calls == 3  # fresh, tight, and one batched call for the in-budget row
+    assert stale["decision"] == "stale"
+    assert [r["decision"] for r in batch] == ["ok", "no_score", "stale"]  # B was never scored: no order
+    assert "order" not in batch[1]
+    assert dm.deadline_counts == {"stale": 2, "fallback_score": 1, "no_fallback": 1, "explanation_skipped": 2}
+
+def test_fallback_scores_need_opt_in_and_expire():
+    pytest.importorskip("joblib")
+    from ai.decision_maker import DecisionMaker
+    from ai.model_manager import ModelManager
+    from ai.risk_gates import AccountSnapshot
+
+    class Always:
+        def predict_proba(self, X):
+            return [[0.2, 0.8] for _ in X]
+
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    default = DecisionMaker(ModelManager(model=Always()), budget=LatencyBudget(budget_ms=1000, min_predict_ms=300))
+    aged = DecisionMaker(ModelManager(model=Always()),
+                         budget=LatencyBudget(budget_ms=1000, min_predict_ms=300, fallback_max_age_ms=5))
+
+    async def go(dm):
+        await dm.decide_from_price("A", 100.0, acct, ingest_ns=now_ns())
+        time.sleep(0.02)
+        return await dm.decide_from_price("A", 101.0, acct, ingest_ns=now_ns() - 900_000_000)
+
+    for dm in (default, aged):
+        res = asyncio.run(go(dm))
+        assert res["decision"] == "no_score" and "order" not in res
+        assert dm.deadline_counts["no_fallback"] == 1 and dm.deadline_counts["fallback_score"] == 0
+
+def test_orders_dropped_after_the_decision_are_not_explained(monkeypatch):
+    pytest.importorskip("joblib")
+    from datetime import datetime
+    from ai.agent import AutoTradeAgent
+    from ai.model_manager import ModelManager
+    from ai.risk_gates import AccountSnapshot
+    from core.events import MarketBar
+
+    class Always:
+        def predict_proba(self, X):
+            return [[0.2, 0.8] for _ in X]
+
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    agent = AutoTradeAgent(ModelManager(model=Always()), acct, latency_budget=LatencyBudget(budget_ms=50, min_predict_ms=0, min_explain_ms=0))
+    dm = agent.decision_maker
+    decide = dm.decide_from_price
+
+    async def slow_decide(*args, **kwargs):
+        res = await decide(*args, **kwargs)
+        await asyncio.sleep(0.1)  # the order is ready only after the tick's deadline
+        return res
+
+    monkeypatch.setattr(dm, "decide_from_price", slow_decide)
+    bar = MarketBar("NIFTY", datetime(2024, 1, 1), 100.0, 100.0, 100.0, 100.0, 1.0, ingest_ns=now_ns())
+    asyncio.run(agent.handle_tick(bar))
+    assert dm.deadline_counts["stale_after_decision"] == 1
+    assert dm.explainer.stats()["inflight"] == 0 and not dm.explainer.by_order
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from ai.model_manager import ModelManager
+from ai.model_registry import ModelRegistry
+
+rng = np.random.default_rng(1)
+X = rng.normal(size=(300, 4))
+Y = (X[:, 0] > 0).astype(int)
+
+def _mapped(a):
+    while getattr(a, "base", None) is not None:
+        a = a.base
+    return type(a).__name__ == "mmap"
+
+def test_publish_promote_and_load(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    assert reg.current("alpha") is None
+    v1 = reg.publish("alpha", LogisticRegression().fit(X, Y), {"auc": 0.61})
+    v2 = reg.publish("alpha", RandomForestClassifier(5, random_state=0).fit(X, Y))
+    assert (v1, v2) == (1, 2) and reg.versions("alpha") == [1, 2]
+    assert reg.current("alpha") is None  # nothing is served until promoted
+    with pytest.raises(FileNotFoundError):
+        reg.load("alpha")
+    reg.promote("alpha", 1)
+    model, compiled, meta = reg.load("alpha")
+    assert meta["version"] == 1 and meta["metadata"] == {"auc": 0.61} and meta["class"] == "LogisticRegression"
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    with pytest.raises(FileNotFoundError):
+        reg.promote("alpha", 7)
+
+def test_retention_prunes_old_versions_but_not_the_promoted_one(tmp_path):
+    reg = ModelRegistry(str(tmp_path), keep=2)
+    model = LogisticRegression().fit(X, Y)
+    reg.publish("alpha", model, promote=True)
+    for _ in range(4):
+        reg.publish("alpha", model)
+    assert reg.versions("alpha") == [1, 4, 5] and reg.current("alpha") == 1
+    reg.promote("alpha", 5)
+    assert reg.prune("alpha", 1) == [1, 4] and reg.versions("alpha") == [5]
+
+def test_arrays_are_memory_mapped(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    reg.publish("trees", RandomForestClassifier(5, random_state=0).fit(X, Y), promote=True)
+    model, compiled, _ = reg.load("trees")
+    assert _mapped(compiled.threshold) and not compiled.threshold.flags.writeable
+    hot = [compiled.feature, compiled.threshold, compiled.children, compiled.left, compiled.right,
+           compiled.is_leaf, compiled.missing_left, compiled.value, compiled.roots]
+    assert all(_mapped(a) for a in hot)  # nothing on the hot path is a private copy
+    compiled.scalar_pairs = 1 << 20
+    np.testing.assert_allclose(compiled.predict_proba(X[:3]), model.predict_proba(X[:3]), atol=1e-12)
+    assert all(_mapped(v.obj) for v in compiled._views)  # the scalar walk reads the mapped arrays too
+
+def test_follow_hot_swaps_the_live_manager(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    reg.publish("alpha", LogisticRegression().fit(X, Y), promote=True)
+    mm = ModelManager()
+    reg.load_into(mm, "alpha")
+    flipped = LogisticRegression().fit(X, 1 - Y)
+
+    async def main():
+        task = asyncio.create_task(reg.follow("alpha", mm, interval_s=0.01))
+        before = mm.predict_proba(X[:5])
+        reg.publish("alpha", flipped, promote=True)
+        for _ in range(200):
+            if mm.version == 2:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return before
+
+    before = asyncio.run(main())
+    assert mm.version == 2
+    np.testing.assert_allclose(mm.predict_proba(X[:5]), flipped.predict_proba(X[:5]), atol=1e-12)
+    assert not np.allclose(before, mm.predict_proba(X[:5]))
+
+def test_a_published_version_is_not_served_until_promoted(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    mm = ModelManager()
+    served = ModelManager()
+
+    async def main():
+        task = asyncio.create_task(reg.follow("alpha", mm, interval_s=0.01))
+        reg.publish("alpha", LogisticRegression().fit(X, Y))
+        await asyncio.sleep(0.1)
+        assert mm.version is None  # published only
+        reg.publish("alpha", LogisticRegression().fit(X, 1 - Y), promote=True)
+        reg.load_into(served, "alpha")
+        reg.publish("alpha", LogisticRegression().fit(X, Y))  # a later candidate
+        for _ in range(200):
+            if mm.version is not None:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(main())
+    assert mm.version == served.version == 2
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+from sklearn.linear_model import SGDClassifier
+from ai.model_manager import ModelManager
+from ai.model_registry import ModelRegistry
+from ai.online_learning import ForwardReturnLabeler, OnlineTrainer
+
+def test_labeler_joins_features_with_forward_returns():
+    lab = ForwardReturnLabeler(horizon=2)
+    out = [lab.observe("A", [float(i)], p) for i, p in enumerate([100.0, 101.0, 99.0, 102.0])]
+    assert out == [None, None, ([0.0], 0), ([1.0], 1)]
+    assert lab.observe("B", [9.0], 50.0) is None  # symbols are labeled independently
+
+def _stream(trainer, n, rng):
+    """Feature = sign of the next move, so the label is learnable."""
+    price = {s: 100.0 for s in "ABCD"}
+    for _ in range(n):
+        for s in price:
+            move = rng.choice([-1.0, 1.0])
+            trainer.observe(s, [move, rng.normal()], price[s])
+            price[s] *= 1 + 0.001 * move
+
+def test_trainer_learns_in_micro_batches_and_hot_swaps(tmp_path):
+    rng = np.random.default_rng(0)
+    mm = ModelManager()
+    registry = ModelRegistry(str(tmp_path), keep=2)
+    trainer = OnlineTrainer(mm, SGDClassifier(loss="log_loss", random_state=0), ForwardReturnLabeler(horizon=1),
+                            batch_size=64, max_pending_batches=32, registry=registry, name="online",
+                            publish_every=5, publish_interval_s=None)
+
+    async def main():
+        worker = asyncio.create_task(trainer.run())
+        _stream(trainer, 200, rng)
+        await trainer._queue.join()
+        worker.cancel()
+
+    asyncio.run(main())
+    # 4 symbols x 200 bars, the last bar of each still waiting for its forward return
+    assert trainer.updates == 12 and trainer.stats()["buffered"] == 796 - 12 * 64
+    # every update is swapped in live, but only updates 1, 6 and 11 are published; two are retained
+    assert trainer.published == 3 and registry.versions("online") == [2, 3]
+    assert mm.version == 3 and registry.current("online") is None  # published, not promoted
+    assert registry.metadata("online", 3)["metadata"]["updates"] == 11
+    assert mm.compiled is not None  # log-loss SGD compiles to a linear evaluator
+    X = np.column_stack([np.repeat([-1.0, 1.0], 50), rng.normal(size=100)])
+    acc = (np.asarray(mm.predict_proba(X))[:, 1] > 0.5) == (X[:, 0] > 0)
+    assert acc.mean() > 0.9
+
+def test_full_queue_drops_batches_instead_of_blocking():
+    mm = ModelManager()
+    trainer = OnlineTrainer(mm, SGDClassifier(loss="log_loss"), ForwardReturnLabeler(horizon=1), batch_size=4,
+                            max_pending_batches=1)
+    _stream(trainer, 4, np.random.default_rng(1))
+    assert trainer.stats()["pending_batches"] == 1 and trainer.dropped_batches == 2
+
+def test_estimator_without_partial_fit_is_rejected():
+    from sklearn.ensemble import RandomForestClassifier
+    with pytest.raises(TypeError):
+        OnlineTrainer(ModelManager(), RandomForestClassifier())
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime
+import pytest
+from ai.partitioning import HashRing, symbols_by_partition
+
+SYMBOLS = [f"SYM{i}" for i in range(2000)]
+
+def test_partition_is_stable_and_covers_all_workers():
+    ring = HashRing(8)
+    assert [ring.partition(s) for s in SYMBOLS] == [HashRing(8).partition(s) for s in SYMBOLS]
+    sizes = [len(v) for v in symbols_by_partition(ring, SYMBOLS).values()]
+    assert min(sizes) > 2000 / 8 / 2
+
+def test_adding_a_worker_moves_few_symbols():
+    before, after = HashRing(8), HashRing(9)
+    moved = sum(before.partition(s) != after.partition(s) for s in SYMBOLS)
+    assert moved < len(SYMBOLS) * 0.25
+
+def test_coalescing_agent_decides_once_per_symbol_on_a_backlog():
+    pytest.importorskip("joblib")
+    from ai.agent import AutoTradeAgent
+    from ai.model_manager import ModelManager
+    from ai.risk_gates import AccountSnapshot
+    from core.bus import global_bus
+    from core.events import MarketBar
+    from signal_bus import TOPIC_TICKS, publish_tick
+
+    acct = AccountSnapshot(capital=100000, exposure=0.0, per_symbol_exposure={}, max_risk_per_trade=0.02,
+                           max_total_exposure=50000, daily_loss=0, max_daily_loss=1000)
+    agent = AutoTradeAgent(ModelManager(), acct, workers=2, coalesce="ohlcv")
+    seen = []
+
+    async def record(bar):
+        seen.append(bar)
+
+    agent.handle_tick = record
+
+    async def main():
+        q = global_bus.subscribe(TOPIC_TICKS)
+        while not q.empty():
+            q.get_nowait()
+            q.task_done()
+        for i in range(300):  # queued before the agent starts: a 300-tick backlog
+            c = 100.0 + i
+            publish_tick(MarketBar(f"S{i % 3}", datetime(2024, 1, 1), c, c + 1, c - 1, c, 1.0))
+        task = asyncio.create_task(agent.run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert sorted(b.symbol for b in seen) == ["S0", "S1", "S2"]
+    s0 = next(b for b in seen if b.symbol == "S0")
+    assert (s0.o, s0.h, s0.l, s0.c, s0.v) == (100.0, 398.0, 99.0, 397.0, 100.0)
+    assert sum(p["coalesced"] for p in agent.partition_stats()) == 297
+    # the decisions were coalesced, but the features saw every tick
+    from ai.feature_store import RollingFeatureComputer
+    fc = RollingFeatureComputer()
+    for i in range(0, 300, 3):
+        fc.update(100.0 + i)
+    assert agent.decision_maker.feature_store.features("S0") == fc.features()
+
+def test_each_symbol_is_handled_in_order_by_one_worker(monkeypatch):
+    pytest.importorskip("joblib")
+    from ai.agent import AutoTradeAgent
+    from ai.model_manager import ModelManager
+    from core.bus import global_bus
+    from core.events import MarketBar
+    from signal_bus import TOPIC_TICKS, publish_tick
+
+    monkeypatch.setattr(global_bus, "_queues", {})  # fresh topic queues for this test's event loop
+    agent = AutoTradeAgent(ModelManager(), None, workers=4)
+    seen = {}
+
+    async def record(bar):
+        seen.setdefault(bar.symbol, []).append((asyncio.current_task(), bar.c))
+        await asyncio.sleep(0.001 * (int(bar.symbol[1:]) % 3))  # uneven work lets workers interleave
+
+    agent.handle_tick = record
+
+    async def main():
+        task = asyncio.create_task(agent.run())
+        for i in range(400):
+            publish_tick(MarketBar(f"S{i % 16}", datetime(2024, 1, 1), 0.0, 0.0, 0.0, float(i), 1.0))
+            if i % 50 == 0:
+                await asyncio.sleep(0)
+        await asyncio.wait_for(global_bus.topic(TOPIC_TICKS).join(), 5)  # dispatched...
+        await asyncio.wait_for(agent.drain(), 5)  # ...and handled
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert len(seen) == 16 and sum(map(len, seen.values())) == 400
+    workers = set()
+    for symbol, handled in seen.items():
+        tasks, prices = zip(*handled)
+        assert len(set(tasks)) == 1  # one worker per symbol...
+        assert list(prices) == sorted(prices)  # ...handling its bars in publish order
+        workers |= set(tasks)
+    assert len(workers) > 1  # and the symbols are spread over several workers
+
+def test_unknown_coalesce_mode_is_rejected():
+    pytest.importorskip("joblib")
+    from ai.agent import AutoTradeAgent
+    from ai.model_manager import ModelManager
+    with pytest.raises(ValueError):
+        AutoTradeAgent(ModelManager(), None, coalesce="newest")
@@ -0,0 +1,87 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.risk_gates import AccountSnapshot, gate_pretrade_batch, PER_TRADE_CAP, TOTAL_EXPOSURE, DAILY_LOSS
+from risk_management.rule_engine import RiskLimits, RuleEngine
+
+def _acct(**kw):
+    base = dict(capital=100000, exposure=20000.0, per_symbol_exposure={"A": 12000.0, "B": 8000.0},
+                max_risk_per_trade=0.02, max_total_exposure=50000, daily_loss=0.0, max_daily_loss=5000)
+    return AccountSnapshot(**{**base, **kw})
+
+def test_default_plan_matches_gate_pretrade_batch_for_single_orders():
+    rng = np.random.default_rng(3)
+    names = {PER_TRADE_CAP: "per_trade_risk", TOTAL_EXPOSURE: "total_exposure", DAILY_LOSS: "daily_loss", None: None}
+    engine = RuleEngine()
+    for exposure, daily_loss in [(20000.0, 0.0), (48900.0, 0.0), (0.0, 6000.0)]:
+        acct = _acct(exposure=exposure, daily_loss=daily_loss)
+        notionals = rng.uniform(0, 4000, 200)
+        expected = [names[r] for r in gate_pretrade_batch(acct, notionals)]
+        assert [engine.check(acct, x) for x in notionals] == expected
+
+def _sequential(engine, acct, notionals, lots, has_stoploss, symbols):
+    """Reference: accept orders one by one, each seeing the exposure and positions of earlier ones."""
+    limits, exposure = engine.limits, acct.exposure
+    held = {s for s, v in acct.per_symbol_exposure.items() if v}
+    out = []
+    for x, l, stop, s in zip(notionals, lots, has_stoploss, symbols):
+        checks = {"per_trade_risk": x > acct.capital * acct.max_risk_per_trade,
+                  "total_exposure": exposure + x > acct.max_total_exposure,
+                  "daily_loss": acct.daily_loss > acct.max_daily_loss,
+                  "max_daily_loss": acct.daily_loss > limits.max_daily_loss,
+                  "daily_loss_limit_pct": acct.daily_loss > acct.capital * limits.daily_loss_limit_pct / 100.0,
+                  "max_lots_per_order": l > limits.max_lots_per_order,
+                  "require_stoploss": not stop,
+                  "max_concurrent_positions": s not in held and len(held) >= limits.max_concurrent_positions}
+        reason = next((r for r in engine.rules if checks[r]), None)
+        if reason is None:
+            exposure += x
+            held.add(s)
+        out.append(reason)
+    return out
+
+def test_batch_counts_earlier_accepted_orders_against_the_limits():
+    engine = RuleEngine(RiskLimits(max_daily_loss=3000, daily_loss_limit_pct=2.0, max_lots_per_order=10,
+                                   require_stoploss=True, max_concurrent_positions=4))
+    acct = _acct()  # 30000 exposure headroom, A and B held
+    passed, reasons = engine.evaluate(acct, [1500] * 4, lots=[1] * 4, has_stoploss=[True] * 4,
+                                      symbols=["C", "D", "E", "C"])
+    assert reasons == [None, None, "max_concurrent_positions", None]  # C is already opened by the first order
+    passed, reasons = RuleEngine().evaluate(_acct(exposure=47000.0), [1500, 1900, 1400], symbols=["A", "A", "B"])
+    assert reasons == [None, "total_exposure", None] and passed.tolist() == [True, False, True]
+    _, reasons = RuleEngine().evaluate(_acct(exposure=47000.0), [1500, 1900, 1400], symbols=["A", "A", "B"],
+                                       cumulative=False)
+    assert reasons == [None, None, None]  # each alone fits
+
+    rng = np.random.default_rng(8)
+    for _ in range(50):
+        n = int(rng.integers(1, 40))
+        notionals = rng.uniform(0, 2100, n)
+        lots = rng.integers(1, 12, n)
+        stops = rng.random(n) > 0.1
+        symbols = [f"S{i}" for i in rng.integers(0, 8, n)]
+        acct = _acct(exposure=float(rng.uniform(20000, 50000)))
+        _, reasons = engine.evaluate(acct, notionals, lots, stops, symbols)
+        assert reasons == _sequential(engine, acct, notionals, lots, stops, symbols)
+
+def test_config_rules_report_the_first_violation():
+    engine = RuleEngine(RiskLimits(max_daily_loss=3000, daily_loss_limit_pct=2.0, max_lots_per_order=10,
+                                   require_stoploss=True, max_concurrent_positions=2))
+    acct = _acct()
+    passed, reasons = engine.evaluate(acct, [1000, 5000, 1000, 1000, 1000, 1000, float("nan")],
+                                      lots=[1, 1, 11, 1, 1, 1, 1], has_stoploss=[True, True, True, False, True, True, True],
+                                      symbols=["A", "A", "A", "A", "C", "B", "A"])
+    assert reasons == [None, "per_trade_risk", "max_lots_per_order", "require_stoploss", "max_concurrent_positions",
+                       None, "per_trade_risk"]
+    assert passed.tolist() == [True, False, False, False, False, True, False]
+    # 2% of 100k capital is tighter than both the 3000 config and 5000 account limits
+    assert engine.check(_acct(daily_loss=2500), 100, lots=1, has_stoploss=True) == "daily_loss_limit_pct"
+    assert engine.check(_acct(daily_loss=2500, capital=1e6), 100, lots=1, has_stoploss=True) is None
+    assert engine.check(acct, 100, lots=1) == "require_stoploss"
+
+def test_limits_load_from_repo_config():
+    limits = RiskLimits.load()
+    assert limits == RiskLimits(max_daily_loss=5000, daily_loss_limit_pct=2.0, max_lots_per_order=10,
+                                require_stoploss=True, max_concurrent_positions=4)
+    assert RuleEngine(limits).rules[-1] == "max_concurrent_positions"
+    assert RiskLimits.load("missing.yaml", "missing.yaml") == RiskLimits()
@@ -0,0 +1,59 @@
+import threading
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.model_manager import ModelManager
+from ai.shadow import ShadowRunner
+
+class _Const:
+    def __init__(self, p):
+        self.p = p
+
+    def predict_proba(self, X):
+        n = len(np.asarray(X))
+        return np.column_stack([np.full(n, 1 - self.p), np.full(n, self.p)])
+
+def test_shadow_divergence_and_latency_are_recorded():
+    mm = ModelManager(_Const(0.6))
+    mm.add_shadow("same", _Const(0.6))
+    mm.add_shadow("bearish", _Const(0.3))
+    X = np.zeros((10, 3))
+    for _ in range(5):
+        out = mm.predict_proba(X)
+        assert np.allclose(out[:, 1], 0.6)
+    mm.shadows.close()
+    report = mm.shadow_report()
+    assert report["primary"]["calls"] == 5
+    by_name = {s["model"]: s for s in report["shadows"]}
+    assert by_name["same"]["rows"] == 50 and by_name["same"]["flip_rate"] == 0
+    assert by_name["bearish"]["flip_rate"] == 1 and by_name["bearish"]["mean_abs_diff"] == pytest.approx(0.3)
+    assert by_name["bearish"]["p99_ms"] >= 0
+
+def test_slow_shadows_never_hold_up_the_primary():
+    gate = threading.Event()
+
+    class Stuck(_Const):
+        def predict_proba(self, X):
+            gate.wait(5)
+            return super().predict_proba(X)
+
+    mm = ModelManager(_Const(0.6))
+    mm.shadows = ShadowRunner(max_pending=2)
+    mm.add_shadow("stuck", Stuck(0.6))
+    for _ in range(10):
+        mm.predict_proba(np.zeros((1, 3)))
+    assert mm.shadows.dropped == 8
+    gate.set()
+    mm.shadows.close()
+    assert mm.shadow_report()["shadows"][0]["batches"] == 2
+
+def test_failing_shadow_is_counted_not_raised():
+    class Broken:
+        def predict_proba(self, X):
+            raise RuntimeError("bad candidate")
+
+    mm = ModelManager(_Const(0.6))
+    mm.add_shadow("broken", Broken())
+    assert np.allclose(mm.predict_proba(np.zeros((2, 3)))[:, 1], 0.6)
+    mm.shadows.close()
+    assert mm.shadow_report()["shadows"][0]["errors"] == 1
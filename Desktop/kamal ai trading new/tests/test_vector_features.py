@@ -0,0 +1,78 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+from ai.feature_store import RollingFeatureComputer
+from ai.vector_features import VectorFeatureStore
+
+def test_rows_match_per_symbol_streaming_computers_exactly():
+    rng = random.Random(11)
+    symbols = [f"SYM{i}" for i in range(40)]
+    store = VectorFeatureStore(capacity=4)
+    streaming = {s: RollingFeatureComputer() for s in symbols}
+    for _ in range(60):
+        batch = [rng.choice(symbols) for _ in range(25)]  # includes repeats within a batch
+        prices = [rng.uniform(100, 30000) for _ in batch]
+        store.update(batch, prices)
+        for s, p in zip(batch, prices):
+            streaming[s].update(p)
+    for s in symbols:
+        assert store.features(s) == streaming[s].features()
+
+def test_matrix_is_dense_and_ordered_by_rows():
+    store = VectorFeatureStore()
+    rows = store.update(["NIFTY", "BANKNIFTY"], [100.0, 200.0])
+    m = store.matrix(rows)
+    assert m.shape == (2, len(store.feature_names))
+    assert m[:, 0].tolist() == [100.0, 200.0]
+    assert store.features("UNKNOWN") == dict.fromkeys(store.feature_names, 0.0)
+
+def test_snapshot_restore_resumes_with_full_windows(tmp_path):
+    rng = random.Random(5)
+    symbols = [f"SYM{i}" for i in range(300)]
+    live = VectorFeatureStore()
+    for _ in range(30):
+        live.update(symbols, [rng.uniform(100, 200) for _ in symbols])
+    path = str(tmp_path / "features.snap")
+    live.snapshot(path)
+    restored = VectorFeatureStore.restore(path)
+    assert list(restored.rows) == symbols
+    for _ in range(5):
+        prices = [rng.uniform(100, 200) for _ in symbols]
+        live.update(symbols, prices)
+        restored.update(symbols, prices)
+    assert np.array_equal(restored.matrix(), live.matrix())
+    restored.update(["NEW"], [50.0])
+    assert restored.features("NEW")["ma_21"] == 50.0
+
+def test_restore_skips_missing_or_stale_snapshots(tmp_path):
+    path = str(tmp_path / "features.snap")
+    assert VectorFeatureStore.restore(path) is None
+    store = VectorFeatureStore()
+    store.update(["A"], [1.0])
+    store.snapshot(path)
+    assert VectorFeatureStore.restore(path, max_age_s=-1) is None
+    assert VectorFeatureStore.restore(path, max_age_s=60).features("A")["ma_3"] == 1.0
+
+def test_corrupt_or_foreign_snapshots_cold_start(tmp_path):
+    path = tmp_path / "features.snap"
+    store = VectorFeatureStore()
+    store.update(["A", "B"], [1.0, 2.0])
+    size = store.snapshot(str(path))
+    data = path.read_bytes()
+    for cut in (5, 40, 272, size // 2):
+        path.write_bytes(data[:cut])
+        assert VectorFeatureStore.restore(str(path)) is None
+    path.write_bytes(data[:4] + (1).to_bytes(4, "little") + data[8:])  # an older SNAPSHOT_VERSION
+    assert VectorFeatureStore.restore(str(path)) is None
+    path.write_bytes(data[:12] + b"#" * 20 + data[32:])
+    assert VectorFeatureStore.restore(str(path)) is None
+
+def test_decision_maker_starts_with_a_truncated_snapshot(tmp_path):
+    pytest.importorskip("joblib")
+    from ai.decision_maker import DecisionMaker
+    from ai.model_manager import ModelManager
+    path = tmp_path / "features.snap"
+    path.write_bytes(b"KFSN\x02\x00")
+    dm = DecisionMaker(ModelManager(), snapshot_path=str(path))
+    assert dm.feature_store.rows == {}
@@ -1,6 +1,17 @@
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
 import pandas as pd
+from ai.feature_graph import FEATURES, atr, high, low
+
+# the breakout levels are the previous bar's 20-bar range
+_EXPRS = {
+    "delivery.high_20": high.rolling(20).max().shift(1),
+    "delivery.low_20": low.rolling(20).min().shift(1),
+    "delivery.atr": atr(14),
+}
+for _name, _expr in _EXPRS.items():
+    FEATURES.register(_name, _expr)
+_PLAN = FEATURES.plan(list(_EXPRS))
 
 @dataclass
 class SwingSignal:
@@ -13,13 +24,25 @@ class SwingSignal:
     meta: Dict[str, Any]
 
 class DeliveryStrategy:
+    """With ``hub`` (ai.feature_hub.FeatureHub) the indicators are read from the hub, which the
+    caller has advanced through ``df``'s last bar; otherwise they are computed over ``df``."""
+
+    def __init__(self, hub=None):
+        self.hub = hub
+        if hub is not None:
+            for name, expr in _EXPRS.items():
+                hub.graph.register(name, expr)
+
     def generate(self, df: pd.DataFrame, symbol: str) -> Optional[SwingSignal]:
         if len(df) < 100:
             return None
-        df = df.copy()
-        high_20 = df["high"].rolling(20).max().iloc[-2]
-        low_20 = df["low"].rolling(20).min().iloc[-2]
-        atr = self._atr(df, 14).iloc[-1]
+        if self.hub is not None:
+            f = self.hub.values(symbol, list(_EXPRS))
+        else:
+            f = {name: v[-1] for name, v in _PLAN.compute(df).items()}
+        high_20 = f["delivery.high_20"]
+        low_20 = f["delivery.low_20"]
+        atr = f["delivery.atr"]
         price = float(df["close"].iloc[-1])
         if price > high_20:
             side = "buy"
@@ -35,10 +58,3 @@ class DeliveryStrategy:
             return None
         conf = 0.6
         return SwingSignal(side=side, confidence=conf, symbol=symbol, entry=entry, stop=stop, target=target, meta={"atr": float(atr)})
-
-    def _atr(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        high_low = df["high"] - df["low"]
-        high_close = (df["high"] - df["close"].shift()).abs()
-        low_close = (df["low"] - df["close"].shift()).abs()
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        return tr.rolling(period).mean()
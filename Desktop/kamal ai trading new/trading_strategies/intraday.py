@@ -1,6 +1,16 @@
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
 import pandas as pd
+from ai.feature_graph import FEATURES, close, rsi
+
+_EXPRS = {
+    "intraday.ma_fast": close.rolling(9).mean(),
+    "intraday.ma_slow": close.rolling(21).mean(),
+    "intraday.rsi": rsi(14),
+}
+for _name, _expr in _EXPRS.items():
+    FEATURES.register(_name, _expr)
+_PLAN = FEATURES.plan(list(_EXPRS))
 
 @dataclass
 class Signal:
@@ -11,27 +21,31 @@ class Signal:
     meta: Dict[str, Any]
 
 class IntradayStrategy:
+    """With ``hub`` (ai.feature_hub.FeatureHub) the indicators are read from the hub, which the
+    caller has advanced through ``df``'s last bar; otherwise they are computed over ``df``."""
+
+    def __init__(self, hub=None):
+        self.hub = hub
+        if hub is not None:
+            for name, expr in _EXPRS.items():
+                hub.graph.register(name, expr)
+
     def generate(self, df: pd.DataFrame, symbol: str) -> Optional[Signal]:
         if len(df) < 50:
             return None
-        df = df.copy()
-        df["ma_fast"] = df["close"].rolling(9).mean()
-        df["ma_slow"] = df["close"].rolling(21).mean()
-        rsi = self._rsi(df["close"], 14).iloc[-1]
+        if self.hub is not None:
+            f = self.hub.values(symbol, list(_EXPRS))
+        else:
+            f = {name: v[-1] for name, v in _PLAN.compute(df).items()}
+        ma_fast, ma_slow = f["intraday.ma_fast"], f["intraday.ma_slow"]
+        rsi = f["intraday.rsi"]
         price = float(df["close"].iloc[-1])
         side = None
-        if df["ma_fast"].iloc[-1] > df["ma_slow"].iloc[-1] and rsi < 70:
+        if ma_fast > ma_slow and rsi < 70:
             side = "buy"
-        elif df["ma_fast"].iloc[-1] < df["ma_slow"].iloc[-1] and rsi > 30:
+        elif ma_fast < ma_slow and rsi > 30:
             side = "sell"
         if side:
             conf = float(max(0.0, min(1.0, 1 - abs(50-rsi)/50)))
             return Signal(side=side, confidence=conf, symbol=symbol, price=price, meta={"rsi": float(rsi)})
         return None
-
-    def _rsi(self, series: pd.Series, period: int = 14) -> pd.Series:
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
-        rs = gain / (loss.replace(0, 1e-9))
-        return 100 - (100 / (1 + rs))